@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Fotobox Upload-Server (lokaler Ersatz für upload.php)
+Nimmt Uploads im selben Format wie upload.php entgegen, damit Upload-Durchsatz
+und Batch-Uploads ohne Webserver lokal gemessen werden können
+
+Verwendung:
+    python Server_Upload/dev_server.py --port 8090 --api-key geheim --latency 50
+    -> http_endpoint: http://127.0.0.1:8090/upload.php
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from flask import Flask, jsonify, request
+
+ALLOWED_EXTENSIONS = ('jpg', 'jpeg', 'png', 'gif')
+
+def create_app(upload_dir: str, api_key: str = '', latency: float = 0.0,
+               max_file_size: int = 10 * 1024 * 1024) -> Flask:
+    """
+    Erstellt den Upload-Server
+
+    Args:
+        upload_dir: Zielverzeichnis für hochgeladene Fotos
+        api_key: Erwarteter Bearer-Token (leer = keine Authentifizierung)
+        latency: Künstliche Verzögerung pro Request in Sekunden (Mobilfunk-Simulation)
+        max_file_size: Maximale Dateigröße in Bytes
+    """
+    app = Flask(__name__)
+    app.config['MAX_CONTENT_LENGTH'] = max_file_size + 1024 * 1024
+
+    stats_lock = threading.Lock()
+    stats = {'requests': 0, 'uploads': 0, 'bytes': 0, 'started': time.time()}
+    checksums = {}  # SHA-256 -> Upload-Eintrag (wie .checksums/ von upload.php)
+    upload_locks = {}  # upload_id -> Lock (Teilstücke eines Uploads nacheinander)
+
+    def check_auth():
+        """Prüft den Bearer-Token wie upload.php"""
+        if not api_key:
+            return None
+        auth_header = request.headers.get('Authorization', '')
+        if auth_header != f'Bearer {api_key}':
+            return jsonify({'error': 'Unauthorized', 'code': 401}), 401
+        return None
+
+    @app.before_request
+    def simulate_latency():
+        with stats_lock:
+            stats['requests'] += 1
+        if latency > 0:
+            time.sleep(latency)
+
+    @app.route('/upload.php', methods=['GET', 'HEAD', 'OPTIONS'])
+    def upload_info():
+        if request.method == 'OPTIONS':
+            return '', 200
+        if request.method == 'GET' and 'checksum' in request.args:
+            return checksum_probe()
+        return jsonify({'error': 'Method not allowed', 'code': 405}), 405
+
+    def checksum_probe():
+        """Pre-Flight: GET upload.php?checksum=<sha256>"""
+        auth_error = check_auth()
+        if auth_error:
+            return auth_error
+
+        checksum = request.args.get('checksum', '').strip().lower()
+        if not re.fullmatch(r'[a-f0-9]{64}', checksum):
+            return jsonify({'success': False, 'error': 'Invalid checksum', 'code': 400}), 400
+
+        with stats_lock:
+            entry = checksums.get(checksum)
+        return jsonify({'success': True, 'exists': entry is not None, 'data': entry})
+
+    def file_checksum(path: str) -> str:
+        sha256 = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                sha256.update(block)
+        return sha256.hexdigest()
+
+    def finalize_upload(source_path: str, original_name: str):
+        """Legt eine empfangene Datei wie upload.php ab und antwortet im selben Format"""
+        size = os.path.getsize(source_path)
+        if size > max_file_size:
+            os.remove(source_path)
+            max_mb = round(max_file_size / 1024 / 1024, 1)
+            return jsonify({'success': False, 'error': f'File too large. Max size: {max_mb}MB', 'code': 400}), 400
+
+        extension = os.path.splitext(original_name)[1].lower().lstrip('.')
+        if extension not in ALLOWED_EXTENSIONS:
+            extension = 'jpg'
+
+        now = datetime.datetime.now()
+        file_id = uuid.uuid4().hex[:8]
+        filename = f"fotobox_{now.strftime('%Y-%m-%d_%H-%M-%S')}_{file_id}.{extension}"
+        date_dir = now.strftime('%Y/%m/%d')
+        target_dir = os.path.join(upload_dir, date_dir)
+        os.makedirs(target_dir, exist_ok=True)
+
+        target_path = os.path.join(target_dir, filename)
+        shutil.move(source_path, target_path)
+
+        # Index unter der Prüfsumme der gespeicherten Datei und - falls der Client
+        # komprimiert hat - zusätzlich unter der des Originals (wie upload.php)
+        indexed = {file_checksum(target_path)}
+        metadata = request.form.get('metadata')
+        if metadata:
+            with open(os.path.splitext(target_path)[0] + '.json', 'w', encoding='utf-8') as f:
+                f.write(metadata)
+            try:
+                original_checksum = str(json.loads(metadata).get('original_checksum', '')).lower()
+            except (ValueError, AttributeError):
+                original_checksum = ''
+            if re.fullmatch(r'[a-f0-9]{64}', original_checksum):
+                indexed.add(original_checksum)
+
+        url = f"{request.host_url}uploads/{date_dir}/{filename}"
+        entry = {
+            'id': file_id,
+            'filename': filename,
+            'url': url,
+            'upload_time': now.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+        with stats_lock:
+            stats['uploads'] += 1
+            stats['bytes'] += size
+            for checksum in indexed:
+                checksums[checksum] = entry
+
+        return jsonify({
+            'success': True,
+            'message': 'File uploaded successfully',
+            'data': {
+                'id': file_id,
+                'filename': filename,
+                'url': url,
+                'thumbnail': None,
+                'size': size,
+                'upload_time': now.strftime('%Y-%m-%d %H:%M:%S')
+            }
+        })
+
+    @app.route('/upload.php', methods=['POST'])
+    def upload():
+        auth_error = check_auth()
+        if auth_error:
+            return auth_error
+
+        if 'action' in request.args:
+            return chunked_upload(request.args['action'])
+
+        file = request.files.get('photo')
+        if file is None or not file.filename:
+            return jsonify({'success': False, 'error': 'No file uploaded', 'code': 400}), 400
+
+        os.makedirs(upload_dir, exist_ok=True)
+        temp_fd, temp_path = tempfile.mkstemp(dir=upload_dir, suffix='.upload')
+        os.close(temp_fd)
+        file.save(temp_path)
+        return finalize_upload(temp_path, file.filename)
+
+    def upload_lock(upload_id: str) -> threading.Lock:
+        """Sperre pro Upload - Datei-I/O läuft außerhalb von stats_lock"""
+        with stats_lock:
+            return upload_locks.setdefault(upload_id, threading.Lock())
+
+    def chunked_upload(action: str):
+        """Fortsetzbarer Upload: ?action=init|chunk|commit&upload_id=<sha256> (wie upload.php)"""
+        upload_id = request.args.get('upload_id', '').lower()
+        if not re.fullmatch(r'[a-f0-9]{64}', upload_id):
+            return jsonify({'success': False, 'error': 'Invalid upload_id', 'code': 400}), 400
+
+        partial_dir = os.path.join(upload_dir, '.partial')
+        os.makedirs(partial_dir, exist_ok=True)
+        part_file = os.path.join(partial_dir, f'{upload_id}.part')
+        info_file = os.path.join(partial_dir, f'{upload_id}.json')
+
+        # Body vor dem Sperren empfangen - langsame Clients blockieren niemanden
+        data = request.get_data() if action == 'chunk' else b''
+
+        with upload_lock(upload_id):
+            if action == 'init':
+                size = request.form.get('size', 0, type=int)
+                if size <= 0 or size > max_file_size:
+                    return jsonify({'success': False, 'error': 'Invalid size', 'code': 400}), 400
+
+                info = None
+                if os.path.exists(info_file):
+                    with open(info_file, encoding='utf-8') as f:
+                        info = json.load(f)
+                if not info or info['size'] != size:
+                    if os.path.exists(part_file):
+                        os.remove(part_file)
+                    info = {'filename': os.path.basename(request.form.get('filename', 'photo.jpg')), 'size': size}
+                    with open(info_file, 'w', encoding='utf-8') as f:
+                        json.dump(info, f)
+
+                offset = os.path.getsize(part_file) if os.path.exists(part_file) else 0
+                return jsonify({'success': True, 'upload_id': upload_id, 'size': size, 'offset': offset})
+
+            if not os.path.exists(info_file):
+                return jsonify({'success': False, 'error': 'Unknown upload_id', 'code': 404}), 404
+            with open(info_file, encoding='utf-8') as f:
+                info = json.load(f)
+            current = os.path.getsize(part_file) if os.path.exists(part_file) else 0
+
+            if action == 'chunk':
+                offset = request.args.get('offset', -1, type=int)
+                if offset != current:
+                    return jsonify({'success': False, 'error': 'Offset mismatch', 'code': 409, 'offset': current}), 409
+
+                if current + len(data) > info['size']:
+                    os.remove(part_file)
+                    return jsonify({'success': False, 'error': 'Chunk exceeds announced size', 'code': 400}), 400
+                with open(part_file, 'ab') as f:
+                    f.write(data)
+                return jsonify({'success': True, 'offset': current + len(data)})
+
+            if action != 'commit':
+                return jsonify({'success': False, 'error': f'Unknown action: {action}', 'code': 400}), 400
+
+            if current != info['size']:
+                return jsonify({'success': False, 'error': 'Upload incomplete', 'code': 409, 'offset': current}), 409
+            if file_checksum(part_file) != upload_id:
+                os.remove(part_file)
+                os.remove(info_file)
+                return jsonify({'success': False, 'error': 'Checksum mismatch', 'code': 400}), 400
+            os.remove(info_file)
+            response = finalize_upload(part_file, info['filename'])
+
+        with stats_lock:
+            upload_locks.pop(upload_id, None)
+        return response
+
+    @app.route('/stats')
+    def server_stats():
+        """Empfangene Uploads und Durchsatz seit dem Start"""
+        with stats_lock:
+            result = dict(stats)
+        elapsed = time.time() - result.pop('started')
+        result['uptime'] = round(elapsed, 1)
+        result['mbit_per_second'] = round(result['bytes'] * 8 / elapsed / 1_000_000, 2) if elapsed > 0 else 0.0
+        return jsonify(result)
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description='Lokaler Fotobox Upload-Server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--upload-dir', default=os.path.join(tempfile.gettempdir(), 'fotobox_uploads'))
+    parser.add_argument('--api-key', default='')
+    parser.add_argument('--latency', type=float, default=0.0, help='Verzögerung pro Request in Millisekunden')
+    args = parser.parse_args()
+
+    os.makedirs(args.upload_dir, exist_ok=True)
+    app = create_app(args.upload_dir, args.api_key, args.latency / 1000.0)
+
+    print(f"☁️ Fotobox Upload-Server: http://{args.host}:{args.port}/upload.php")
+    print(f"📁 Upload-Verzeichnis: {args.upload_dir}")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,7 @@ ini_set('display_errors', '0');
 
 header('Content-Type: application/json; charset=utf-8');
 header('Access-Control-Allow-Origin: *');
-header('Access-Control-Allow-Methods: POST, OPTIONS');
+header('Access-Control-Allow-Methods: GET, POST, OPTIONS');
 header('Access-Control-Allow-Headers: Content-Type, Authorization');
 
 // Preflight OPTIONS Request
@@ -19,8 +19,9 @@ if ($_SERVER['REQUEST_METHOD'] === 'OPTIONS') {
     exit;
 }
 
-// Nur POST-Requests erlauben
-if ($_SERVER['REQUEST_METHOD'] !== 'POST') {
+// Nur POST-Requests erlauben (plus GET ?checksum= für Duplikat-Abfragen)
+$is_checksum_probe = $_SERVER['REQUEST_METHOD'] === 'GET' && isset($_GET['checksum']);
+if ($_SERVER['REQUEST_METHOD'] !== 'POST' && !$is_checksum_probe) {
     http_response_code(405);
     echo json_encode(['error' => 'Method not allowed', 'code' => 405]);
     exit;
@@ -252,48 +253,57 @@ function logUploadSafe($data, $upload_dir) {
     @file_put_contents($log_file, $json_content, LOCK_EX);
 }
 
-// Hauptlogik
-try {
-    // Auth prüfen
+// Index-Datei für eine SHA-256-Prüfsumme
+function checksumIndexPath($upload_dir, $checksum) {
+    return $upload_dir . '/.checksums/' . substr($checksum, 0, 2) . '/' . $checksum . '.json';
+}
+
+// Pre-Flight: Ist ein Foto mit dieser Prüfsumme bereits vorhanden?
+if ($is_checksum_probe) {
     checkAuth($config);
     
-    // Upload-Verzeichnis prüfen
-    if (!is_dir($config['UPLOAD_DIR'])) {
-        if (!@mkdir($config['UPLOAD_DIR'], 0755, true)) {
-            throw new Exception('Cannot create upload directory');
-        }
-    }
-    
-    // Datei-Upload prüfen
-    if (!isset($_FILES['photo'])) {
-        throw new Exception('No photo file provided');
+    $checksum = strtolower(trim($_GET['checksum']));
+    if (!preg_match('/^[a-f0-9]{64}$/', $checksum)) {
+        http_response_code(400);
+        echo json_encode(['success' => false, 'error' => 'Invalid checksum', 'code' => 400]);
+        exit;
     }
     
-    $file = $_FILES['photo'];
-    
-    // Upload-Fehler prüfen
-    if ($file['error'] !== UPLOAD_ERR_OK) {
-        throw new Exception('Upload error code: ' . $file['error']);
+    $entry = null;
+    $index_file = checksumIndexPath($config['UPLOAD_DIR'], $checksum);
+    if (file_exists($index_file)) {
+        $entry = @json_decode(@file_get_contents($index_file), true);
     }
     
+    http_response_code(200);
+    echo json_encode([
+        'success' => true,
+        'exists' => !empty($entry),
+        'data' => $entry ?: null
+    ], JSON_UNESCAPED_SLASHES);
+    exit;
+}
+
+// Upload abschließen: prüfen, ablegen, Thumbnail, Log und Prüfsummen-Index
+function finalizeUpload($config, $source_path, $original_name, $file_size, $upload_type, $is_php_upload) {
     // Dateigröße prüfen
-    if ($file['size'] > $config['MAX_FILE_SIZE']) {
+    if ($file_size > $config['MAX_FILE_SIZE']) {
         $max_mb = round($config['MAX_FILE_SIZE'] / 1024 / 1024, 1);
         throw new Exception("File too large. Max size: {$max_mb}MB");
     }
     
     // MIME-Type mit robuster Erkennung
-    $file_type = getMimeTypeRobust($file['tmp_name'], $file['name'], $file['type']);
+    $file_type = getMimeTypeRobust($source_path, $original_name, $upload_type);
     
     // Validiere als Bilddatei
-    if (!validateImageFile($file['tmp_name'], $file_type)) {
+    if (!validateImageFile($source_path, $file_type)) {
         throw new Exception('Invalid file type: ' . $file_type . '. Must be valid image (JPEG, PNG, GIF)');
     }
     
     // Eindeutigen Dateinamen generieren
     $timestamp = date('Y-m-d_H-i-s');
     $random = substr(md5(uniqid(mt_rand(), true)), 0, 8);
-    $extension = strtolower(pathinfo($file['name'], PATHINFO_EXTENSION));
+    $extension = strtolower(pathinfo($original_name, PATHINFO_EXTENSION));
     
     if (empty($extension) || !in_array($extension, ['jpg', 'jpeg', 'png', 'gif'])) {
         $extension = ($file_type === 'image/png') ? 'png' : 'jpg';
@@ -313,7 +323,10 @@ try {
     
     // Datei verschieben
     $target_path = $target_dir . '/' . $filename;
-    if (!@move_uploaded_file($file['tmp_name'], $target_path)) {
+    $moved = $is_php_upload
+        ? @move_uploaded_file($source_path, $target_path)
+        : @rename($source_path, $target_path);
+    if (!$moved) {
         throw new Exception('Failed to move uploaded file');
     }
     
@@ -332,8 +345,8 @@ try {
     $upload_data = [
         'id' => $random,
         'filename' => $filename,
-        'original_name' => $file['name'],
-        'size' => $file['size'],
+        'original_name' => $original_name,
+        'size' => $file_size,
         'type' => $file_type,
         'path' => $target_path,
         'url' => $config['BASE_URL'] . '/uploads/' . $date_dir . '/' . $filename,
@@ -342,9 +355,9 @@ try {
         'client_ip' => $_SERVER['REMOTE_ADDR'] ?? 'unknown',
         'user_agent' => $_SERVER['HTTP_USER_AGENT'] ?? 'unknown',
         'debug_info' => [
-            'original_mime' => $file['type'],
+            'original_mime' => $upload_type,
             'detected_mime' => $file_type,
-            'file_size' => $file['size'],
+            'file_size' => $file_size,
             'php_version' => PHP_VERSION
         ]
     ];
@@ -360,9 +373,27 @@ try {
     // Log erstellen
     logUploadSafe($upload_data, $config['UPLOAD_DIR']);
     
-    // Erfolgreiche Antwort
-    http_response_code(200);
-    echo json_encode([
+    // Prüfsummen-Index für Duplikat-Abfragen: gespeicherte Datei und - falls der Client
+    // komprimiert hat - die Prüfsumme des Originals (original_checksum in den Metadaten)
+    $checksums = [@hash_file('sha256', $target_path)];
+    $original_checksum = strtolower((string)($upload_data['metadata']['original_checksum'] ?? ''));
+    if (preg_match('/^[a-f0-9]{64}$/', $original_checksum)) {
+        $checksums[] = $original_checksum;
+    }
+    $index_entry = json_encode([
+        'id' => $upload_data['id'],
+        'filename' => $upload_data['filename'],
+        'url' => $upload_data['url'],
+        'upload_time' => $upload_data['upload_time']
+    ], JSON_UNESCAPED_SLASHES);
+    foreach (array_unique(array_filter($checksums)) as $checksum) {
+        $index_file = checksumIndexPath($config['UPLOAD_DIR'], $checksum);
+        if (is_dir(dirname($index_file)) || @mkdir(dirname($index_file), 0755, true)) {
+            @file_put_contents($index_file, $index_entry, LOCK_EX);
+        }
+    }
+    
+    return [
         'success' => true,
         'message' => 'File uploaded successfully',
         'data' => [
@@ -374,7 +405,151 @@ try {
             'upload_time' => $upload_data['upload_time'],
             'debug' => $upload_data['debug_info']
         ]
-    ], JSON_UNESCAPED_SLASHES);
+    ];
+}
+
+// Chunk-Upload: Teildatei und Info-Datei eines laufenden Uploads
+function partialUploadPaths($upload_dir, $upload_id) {
+    $partial_dir = $upload_dir . '/.partial';
+    return [$partial_dir . '/' . $upload_id . '.part', $partial_dir . '/' . $upload_id . '.json'];
+}
+
+// Chunk-Upload (fortsetzbar): ?action=init|chunk|commit&upload_id=<sha256>
+function handleChunkedUpload($config, $action) {
+    $upload_id = strtolower($_GET['upload_id'] ?? '');
+    if (!preg_match('/^[a-f0-9]{64}$/', $upload_id)) {
+        throw new Exception('Invalid upload_id');
+    }
+    
+    list($part_file, $info_file) = partialUploadPaths($config['UPLOAD_DIR'], $upload_id);
+    if (!is_dir(dirname($part_file)) && !@mkdir(dirname($part_file), 0755, true)) {
+        throw new Exception('Cannot create partial upload directory');
+    }
+    clearstatcache();
+    
+    // Upload anmelden bzw. Fortschritt abfragen
+    if ($action === 'init') {
+        $size = intval($_POST['size'] ?? 0);
+        if ($size <= 0 || $size > $config['MAX_FILE_SIZE']) {
+            $max_mb = round($config['MAX_FILE_SIZE'] / 1024 / 1024, 1);
+            throw new Exception("Invalid size. Max size: {$max_mb}MB");
+        }
+        
+        $info = null;
+        if (file_exists($info_file)) {
+            $info = @json_decode(@file_get_contents($info_file), true);
+        }
+        if (!$info || intval($info['size']) !== $size) {
+            @unlink($part_file);
+            $info = [
+                'filename' => basename($_POST['filename'] ?? 'photo.jpg'),
+                'size' => $size,
+                'created' => time()
+            ];
+            @file_put_contents($info_file, json_encode($info), LOCK_EX);
+        }
+        
+        return [
+            'success' => true,
+            'upload_id' => $upload_id,
+            'size' => $size,
+            'offset' => file_exists($part_file) ? filesize($part_file) : 0
+        ];
+    }
+    
+    $info = file_exists($info_file) ? @json_decode(@file_get_contents($info_file), true) : null;
+    if (!$info) {
+        http_response_code(404);
+        return ['success' => false, 'error' => 'Unknown upload_id', 'code' => 404];
+    }
+    
+    // Teilstück an Offset anhängen
+    if ($action === 'chunk') {
+        $offset = intval($_GET['offset'] ?? -1);
+        
+        $output = @fopen($part_file, 'ab');
+        if (!$output || !flock($output, LOCK_EX)) {
+            throw new Exception('Cannot open partial upload');
+        }
+        
+        $current = fstat($output)['size'];
+        if ($offset !== $current) {
+            flock($output, LOCK_UN);
+            fclose($output);
+            http_response_code(409);
+            return ['success' => false, 'error' => 'Offset mismatch', 'code' => 409, 'offset' => $current];
+        }
+        
+        $input = fopen('php://input', 'rb');
+        $written = stream_copy_to_stream($input, $output);
+        fclose($input);
+        flock($output, LOCK_UN);
+        fclose($output);
+        
+        if ($current + $written > intval($info['size'])) {
+            @unlink($part_file);
+            throw new Exception('Chunk exceeds announced size');
+        }
+        
+        return ['success' => true, 'offset' => $current + $written];
+    }
+    
+    // Abschließen: Größe und SHA-256 prüfen, dann wie ein normaler Upload ablegen
+    if ($action === 'commit') {
+        $received = file_exists($part_file) ? filesize($part_file) : 0;
+        if ($received !== intval($info['size'])) {
+            http_response_code(409);
+            return ['success' => false, 'error' => 'Upload incomplete', 'code' => 409, 'offset' => $received];
+        }
+        
+        if (hash_file('sha256', $part_file) !== $upload_id) {
+            @unlink($part_file);
+            @unlink($info_file);
+            throw new Exception('Checksum mismatch');
+        }
+        
+        $response = finalizeUpload($config, $part_file, $info['filename'], $received, '', false);
+        @unlink($info_file);
+        return $response;
+    }
+    
+    throw new Exception('Unknown action: ' . $action);
+}
+
+// Hauptlogik
+try {
+    // Auth prüfen
+    checkAuth($config);
+    
+    // Upload-Verzeichnis prüfen
+    if (!is_dir($config['UPLOAD_DIR'])) {
+        if (!@mkdir($config['UPLOAD_DIR'], 0755, true)) {
+            throw new Exception('Cannot create upload directory');
+        }
+    }
+    
+    if (isset($_GET['action'])) {
+        // Chunk-Upload (Status-Code setzt der Handler)
+        $response = handleChunkedUpload($config, $_GET['action']);
+    } else {
+        // Datei-Upload prüfen
+        if (!isset($_FILES['photo'])) {
+            throw new Exception('No photo file provided');
+        }
+        
+        $file = $_FILES['photo'];
+        
+        // Upload-Fehler prüfen
+        if ($file['error'] !== UPLOAD_ERR_OK) {
+            throw new Exception('Upload error code: ' . $file['error']);
+        }
+        
+        $response = finalizeUpload($config, $file['tmp_name'], $file['name'], $file['size'], $file['type'], true);
+        http_response_code(200);
+    }
+    
+    // Erfolgreiche Antwort
+    echo json_encode($response, JSON_UNESCAPED_SLASHES);
     
 } catch (Exception $e) {
     http_response_code(400);
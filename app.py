@@ -7,19 +7,26 @@ Phase 2: Erweiterte Funktionen - Overlays, Drucken, Upload
 import os
 import subprocess
 import datetime
-from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, flash
+from flask import Flask, Response, render_template, request, jsonify, send_file, redirect, url_for, flash
 from PIL import Image
 import json
 import threading
 import time
+import requests
 
 # Phase 2 Imports
 from config import get_config, save_config, set_setting
 from overlay_manager import OverlayManager
 from print_manager import PrintManager
-from upload_manager import UploadManager
+from upload_manager import UploadManager, http_session_pool
 from optimal_camera_manager import optimal_camera_manager
 from php_config_manager import php_config_manager
+from photo_catalog import photo_catalog
+from thumbnail_cache import ThumbnailCache
+from live_stream import LiveStreamBroadcaster, STREAM_BOUNDARY
+from post_capture_pipeline import PostCapturePipeline
+from upload_queue import UploadQueue
+from image_workers import ImageWorkerPool
 
 app = Flask(__name__)
 app.secret_key = 'fotobox_phase2_secret_key_change_in_production'
@@ -33,66 +40,153 @@ config_manager.create_directories()
 overlay_manager = OverlayManager(config)
 print_manager = PrintManager(config)  
 upload_manager = UploadManager(config)
+upload_queue = UploadQueue(config, upload_manager)
+thumbnail_cache = ThumbnailCache(config)
+
+# Pillow-Arbeit (Overlay, Druck-Vorbereitung, Upload-Komprimierung) auf alle CPU-Kerne verteilen
+image_workers = ImageWorkerPool(config)
+if image_workers.workers:
+    overlay_manager.image_workers = image_workers
+    print_manager.image_workers = image_workers
+    upload_manager.image_workers = image_workers
 
 # Verwende den optimalen camera manager (nur gphoto2 Python)
 camera = optimal_camera_manager
 
+# MJPEG-Live-Stream (ein Producer-Thread für alle Viewer)
+live_stream = LiveStreamBroadcaster(camera.get_preview_frame, config)
+
+# Nachbearbeitung nach der Aufnahme (Vorschau, Overlay, Druck, Upload) im Hintergrund
+post_capture_pipeline = PostCapturePipeline(config, thumbnail_cache, overlay_manager,
+                                            print_manager, upload_queue)
+camera.add_capture_hook(post_capture_pipeline.submit)
+
+# Upload-Bandbreite drosseln solange Live-View/Countdown oder eine Aufnahme laufen
+upload_manager.bandwidth.add_activity_probe(lambda: live_stream.viewer_count > 0)
+upload_manager.bandwidth.add_activity_probe(lambda: camera.worker.capture_pending)
+
+# Galerie-Paginierung
+GALLERY_PAGE_SIZE = 24
+GALLERY_MAX_PAGE_SIZE = 100
+UPLOAD_BATCH_MAX_SIZE = 100
+PRINT_LAYOUT_MAX_COPIES = 10
+
+# Fertige Fotos ändern sich nie (eindeutige Zeitstempel-Dateinamen) - 1 Jahr cachen
+PHOTO_CACHE_MAX_AGE = 365 * 24 * 60 * 60
+
+def send_file_cached(path, mimetype=None, immutable=True):
+    """
+    Liefert eine Datei mit Cache-Validatoren aus
+    
+    Starkes ETag aus Datei-Identität (Inode, mtime, Größe), Last-Modified,
+    304-Antworten bei If-None-Match/If-Modified-Since und Range-Requests
+    für fortsetzbare Downloads.
+    
+    Args:
+        path: Pfad zur Datei
+        mimetype: MIME-Type (optional, sonst aus Dateiendung)
+        immutable: True für fertige Fotos (langes Caching), False für
+                   veränderliche Dateien (immer revalidieren)
+    """
+    stat = os.stat(path)
+    etag = f"{stat.st_ino:x}-{stat.st_mtime_ns:x}-{stat.st_size:x}"
+    
+    response = send_file(
+        path,
+        mimetype=mimetype,
+        conditional=True,
+        etag=etag,
+        last_modified=stat.st_mtime,
+        max_age=PHOTO_CACHE_MAX_AGE if immutable else None  # None = no-cache
+    )
+    
+    if immutable:
+        response.cache_control.immutable = True
+    
+    return response
+
 class PhotoManager:
-    """Verwaltung der aufgenommenen Fotos"""
+    """Verwaltung der aufgenommenen Fotos (über den indexierten Foto-Katalog)"""
     
     @staticmethod
     def get_all_photos():
         """Gibt Liste aller Fotos zurück"""
-        photos = []
-        if os.path.exists(config.photo_dir):
-            for filename in os.listdir(config.photo_dir):
-                if filename.lower().endswith(('.jpg', '.jpeg', '.png')):
-                    filepath = os.path.join(config.photo_dir, filename)
-                    stat = os.stat(filepath)
-                    photos.append({
-                        'filename': filename,
-                        'size': stat.st_size,
-                        'created': datetime.datetime.fromtimestamp(stat.st_ctime),
-                        'url': f'/photo/{filename}'
-                    })
-        
-        # Sortiere nach Erstellungszeit (neueste zuerst)
-        photos.sort(key=lambda x: x['created'], reverse=True)
-        return photos
+        return photo_catalog.get_all()
+    
+    @staticmethod
+    def get_recent_photos(limit):
+        """Gibt die letzten N Fotos zurück"""
+        return photo_catalog.get_recent(limit)
+    
+    @staticmethod
+    def get_latest_photo():
+        """Gibt das neueste Foto zurück"""
+        return photo_catalog.latest()
     
     @staticmethod
     def get_photo_count():
         """Gibt Anzahl der Fotos zurück"""
-        return len(PhotoManager.get_all_photos())
+        return photo_catalog.count()
+
+# Katalog mit Dateien abgleichen, die außerhalb der Fotobox hinzugefügt wurden
+catalog_sync = photo_catalog.reconcile()
+print(f"🗂️ Foto-Katalog: {catalog_sync['total']} Fotos ({catalog_sync['updated']} aktualisiert, {catalog_sync['removed']} entfernt)")
 
 # Flask Routes
 
 @app.route('/')
 def index():
     """Hauptseite - Touch-UI"""
-    photos = PhotoManager.get_all_photos()
-    camera_status = camera.check_camera()
+    photos = PhotoManager.get_recent_photos(6)  # Zeige nur die letzten 6 Fotos
+    camera_status = camera.is_connected()
     
     return render_template('index.html', 
-                         photos=photos[:6],  # Zeige nur die letzten 6 Fotos
-                         photo_count=len(photos),
+                         photos=photos,
+                         photo_count=PhotoManager.get_photo_count(),
                          camera_connected=camera_status)
 
 @app.route('/api/take_photo', methods=['POST'])
 def api_take_photo():
     """API Endpoint zum Fotografieren"""
+    upload_manager.bandwidth.notify_activity()
     result = camera.take_photo()
     return jsonify(result)
 
+@app.route('/api/take_burst', methods=['POST'])
+def api_take_burst():
+    """Serienaufnahme (?count=4&interval=1.0) - gibt alle Dateinamen zurück"""
+    upload_manager.bandwidth.notify_activity()
+    count = request.args.get('count', type=int)
+    interval = request.args.get('interval', type=float)
+    result = camera.take_burst(count, interval)
+    return jsonify(result)
+
 @app.route('/capture', methods=['POST'])
 def capture_photo():
     """Alias für /api/take_photo (Kompatibilität)"""
+    upload_manager.bandwidth.notify_activity()
     result = camera.take_photo()
     return jsonify(result)
 
+@app.route('/api/photo_status/<filename>')
+def api_photo_status(filename):
+    """Nachbearbeitungs-Status eines Fotos (Vorschau, Overlay, Druck, Upload)"""
+    status = post_capture_pipeline.get_status(filename)
+    if status is None:
+        return jsonify({
+            'success': False,
+            'message': 'Kein Nachbearbeitungs-Job für dieses Foto'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'job': status
+    })
+
 @app.route('/api/start_live_preview', methods=['POST'])
 def api_start_live_preview():
     """API Endpoint zum Starten der Live-Vorschau"""
+    upload_manager.bandwidth.notify_activity()
     result = camera.start_live_preview()
     return jsonify(result)
 
@@ -105,22 +199,33 @@ def api_stop_live_preview():
 @app.route('/api/preview_image')
 def api_preview_image():
     """API Endpoint für aktuelles Preview-Bild"""
+    upload_manager.bandwidth.notify_activity()
     preview_path = camera.capture_preview_image()
     if preview_path and os.path.exists(preview_path):
-        return send_file(preview_path, mimetype='image/jpeg')
+        return send_file_cached(preview_path, mimetype='image/jpeg', immutable=False)
     else:
         return "Preview nicht verfügbar", 404
 
+@app.route('/api/live_stream')
+def api_live_stream():
+    """API Endpoint für MJPEG-Live-Ansicht (multipart/x-mixed-replace)"""
+    response = Response(
+        live_stream.frames(),
+        mimetype=f'multipart/x-mixed-replace; boundary={STREAM_BOUNDARY}'
+    )
+    response.cache_control.no_store = True
+    return response
+
 @app.route('/api/latest_photo')
 def api_latest_photo():
     """API Endpoint für letztes aufgenommenes Foto"""
     try:
-        photos = PhotoManager.get_all_photos()
-        if photos:
-            latest_photo = photos[0]  # Neuestes Foto (Liste ist sortiert)
+        latest_photo = PhotoManager.get_latest_photo()
+        if latest_photo:
             return jsonify({
                 'success': True,
                 'photo_url': latest_photo['url'],
+                'screen_url': latest_photo['screen_url'],
                 'filename': latest_photo['filename'],
                 'created': latest_photo['created'].isoformat() if hasattr(latest_photo['created'], 'isoformat') else str(latest_photo['created'])
             })
@@ -137,27 +242,73 @@ def api_latest_photo():
 
 @app.route('/api/camera_status')
 def api_camera_status():
-    """API Endpoint für Kamera-Status"""
-    status = camera.check_camera()
+    """API Endpoint für Kamera-Status (aus dem Cache des Hintergrund-Probers)"""
+    status = camera.get_status()
     return jsonify({
-        'connected': status,
-        'message': 'Kamera verbunden' if status else 'Kamera nicht gefunden'
+        **status,
+        'message': 'Kamera verbunden' if status['connected'] else 'Kamera nicht gefunden'
     })
 
 @app.route('/photo/<filename>')
 def serve_photo(filename):
-    """Einzelnes Foto ausliefern"""
+    """Einzelnes Foto ausliefern (?size=thumb|screen|full)"""
     filepath = os.path.join(config.photo_dir, filename)
-    if os.path.exists(filepath):
-        return send_file(filepath)
-    else:
+    if not os.path.exists(filepath):
+        return "Foto nicht gefunden", 404
+    
+    size = request.args.get('size', 'full')
+    served_path = thumbnail_cache.get_path(filepath, size)
+    if not served_path:
         return "Foto nicht gefunden", 404
+    
+    return send_file_cached(served_path, mimetype='image/jpeg' if served_path != filepath else None)
 
 @app.route('/gallery')
 def gallery():
-    """Foto-Galerie"""
-    photos = PhotoManager.get_all_photos()
-    return render_template('gallery.html', photos=photos)
+    """Foto-Galerie (erste Seite, weitere Seiten per /api/photos nachladen)"""
+    photos, next_cursor = photo_catalog.get_page_after(None, GALLERY_PAGE_SIZE)
+    return render_template('gallery.html',
+                         photos=photos,
+                         photo_count=PhotoManager.get_photo_count(),
+                         next_cursor=next_cursor,
+                         page_size=GALLERY_PAGE_SIZE)
+
+@app.route('/api/photos')
+def api_photos():
+    """API Endpoint für cursor-basierte Foto-Liste (Infinite Scroll)"""
+    cursor = request.args.get('cursor') or None
+    try:
+        limit = int(request.args.get('limit', GALLERY_PAGE_SIZE))
+    except ValueError:
+        limit = GALLERY_PAGE_SIZE
+    limit = max(1, min(limit, GALLERY_MAX_PAGE_SIZE))
+    
+    if cursor and not photo_catalog.parse_cursor(cursor):
+        return jsonify({
+            'success': False,
+            'message': 'Ungültiger Cursor'
+        }), 400
+    
+    photos, next_cursor = photo_catalog.get_page_after(cursor, limit)
+    return jsonify({
+        'success': True,
+        'photos': [
+            {
+                'filename': photo['filename'],
+                'url': photo['url'],
+                'thumb_url': photo['thumb_url'],
+                'screen_url': photo['screen_url'],
+                'size': photo['size'],
+                'size_display': filesize_filter(photo['size']),
+                'created': photo['created'].isoformat(),
+                'created_display': datetime_filter(photo['created']),
+                'cursor': photo['cursor']
+            }
+            for photo in photos
+        ],
+        'next_cursor': next_cursor,
+        'total': PhotoManager.get_photo_count()
+    })
 
 @app.route('/admin')
 def admin():
@@ -205,6 +356,7 @@ def api_apply_overlay(filename):
     
     try:
         overlay_path = overlay_manager.apply_overlays(filepath)
+        photo_catalog.add_photo(overlay_path)
         return jsonify({
             'success': True,
             'message': 'Overlay erfolgreich angewendet',
@@ -229,10 +381,80 @@ def api_print_photo(filename):
         })
     
     copies = request.json.get('copies', 1) if request.is_json else 1
-    result = print_manager.print_photo(filepath, copies)
+    result = print_manager.enqueue_print(filepath, copies)
+    
+    return jsonify(result)
+
+@app.route('/api/print_layouts')
+def api_print_layouts():
+    """Verfügbare Mehrfach-Layouts (Fotostreifen, Raster)"""
+    return jsonify({
+        'success': True,
+        'layouts': print_manager.get_layouts(),
+        'default_layout': config.printing.default_layout
+    })
+
+@app.route('/api/print_layout', methods=['POST'])
+def api_print_layout():
+    """Druckt mehrere Fotos auf einem Bogen (JSON: filenames, layout, copies)"""
+    data = request.get_json(silent=True) or {}
+    filenames = data.get('filenames')
+    layout = data.get('layout') or config.printing.default_layout
+    copies = data.get('copies', 1)
+    
+    if not isinstance(layout, str):
+        return jsonify({
+            'success': False,
+            'message': 'Ungültiges Layout'
+        }), 400
+    
+    try:
+        template = print_manager.layouts.get_template(layout)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    cells = template['rows'] * template['columns']
+    if (not isinstance(filenames, list) or not filenames
+            or not all(isinstance(name, str) and name for name in filenames)):
+        return jsonify({
+            'success': False,
+            'message': 'Keine Fotos angegeben'
+        }), 400
+    
+    if len(filenames) > cells:
+        return jsonify({
+            'success': False,
+            'message': f'Layout {layout} hat nur {cells} Felder'
+        }), 400
+    
+    if isinstance(copies, bool) or not isinstance(copies, int) or not 1 <= copies <= PRINT_LAYOUT_MAX_COPIES:
+        return jsonify({
+            'success': False,
+            'message': f'Anzahl Kopien muss zwischen 1 und {PRINT_LAYOUT_MAX_COPIES} liegen'
+        }), 400
+    
+    filepaths = [os.path.join(config.photo_dir, os.path.basename(filename)) for filename in filenames]
+    result = print_manager.print_layout(filepaths, layout, copies)
     
     return jsonify(result)
 
+@app.route('/api/print_queue')
+def api_print_queue():
+    """Druck-Warteschlange mit Position, geschätzter Wartezeit und gecachtem CUPS-Status"""
+    return jsonify({
+        'success': True,
+        'queue': print_manager.get_print_queue_status(),
+        'renditions': print_manager.renditions.get_stats()
+    })
+
+@app.route('/api/print_queue/<job_id>/cancel', methods=['POST'])
+def api_print_queue_cancel(job_id):
+    """Bricht einen Druckauftrag ab"""
+    return jsonify(print_manager.cancel_queued_print(job_id))
+
 @app.route('/api/upload_photo/<filename>', methods=['POST'])
 def api_upload_photo(filename):
     """Lädt ein Foto auf Server hoch"""
@@ -245,10 +467,103 @@ def api_upload_photo(filename):
         })
     
     metadata = request.json if request.is_json else None
-    result = upload_manager.upload_photo(filepath, metadata)
+    force = request.args.get('force', '').lower() in ('1', 'true', 'yes')
+    result = upload_manager.upload_photo(filepath, metadata, force=force)
+    
+    return jsonify(result)
+
+@app.route('/api/upload_batch', methods=['POST'])
+def api_upload_batch():
+    """Lädt mehrere Fotos mit begrenzter Parallelität hoch"""
+    data = request.get_json(silent=True) or {}
+    filenames = data.get('filenames')
+    
+    if not isinstance(filenames, list) or not filenames:
+        return jsonify({
+            'success': False,
+            'message': 'Keine Fotos angegeben'
+        }), 400
+    
+    if len(filenames) > UPLOAD_BATCH_MAX_SIZE:
+        return jsonify({
+            'success': False,
+            'message': f'Maximal {UPLOAD_BATCH_MAX_SIZE} Fotos pro Batch'
+        }), 400
     
+    photo_paths = [os.path.join(config.photo_dir, os.path.basename(str(name))) for name in filenames]
+    concurrency = data.get('concurrency') if isinstance(data.get('concurrency'), int) else None
+    
+    result = upload_manager.upload_many(photo_paths, data.get('metadata'), concurrency)
     return jsonify(result)
 
+@app.route('/api/upload_stats')
+def api_upload_stats():
+    """Statistiken des Upload-Subsystems (Bandbreite, HTTP-Connection-Pool, SFTP-Verbindung, Ledger)"""
+    return jsonify({
+        'success': True,
+        'bandwidth': upload_manager.get_bandwidth_stats(),
+        'http_pool': upload_manager.get_http_pool_stats(),
+        'sftp': upload_manager.get_sftp_stats(),
+        'ledger': upload_manager.get_ledger_stats()
+    })
+
+@app.route('/api/upload_ledger/clear', methods=['POST'])
+def api_upload_ledger_clear():
+    """Leert das Upload-Ledger (alle Fotos werden wieder hochgeladen)"""
+    count = upload_manager.ledger.clear()
+    return jsonify({
+        'success': True,
+        'message': f'{count} Ledger-Einträge gelöscht'
+    })
+
+@app.route('/api/image_jobs')
+def api_image_jobs():
+    """Auslastung der Bildverarbeitungs-Worker (wartende/laufende Aufträge)"""
+    return jsonify({
+        'success': True,
+        'image_workers': image_workers.get_stats()
+    })
+
+@app.route('/api/image_jobs/cancel', methods=['POST'])
+def api_image_jobs_cancel():
+    """Bricht Bildverarbeitungs-Aufträge ab (per job_id oder für ein Foto per filename)"""
+    data = request.get_json(silent=True) or {}
+    job_id = data.get('job_id')
+    filename = data.get('filename')
+    
+    if not job_id and not filename:
+        return jsonify({
+            'success': False,
+            'message': 'job_id oder filename angeben'
+        }), 400
+    
+    photo_path = os.path.join(config.photo_dir, os.path.basename(filename)) if filename else None
+    count = image_workers.cancel(job_id=str(job_id) if job_id else None, photo_path=photo_path)
+    return jsonify({
+        'success': True,
+        'cancelled': count,
+        'message': f'{count} Aufträge abgebrochen'
+    })
+
+@app.route('/api/upload_queue')
+def api_upload_queue():
+    """Status der persistenten Upload-Warteschlange"""
+    status = request.args.get('status') or None
+    return jsonify({
+        'success': True,
+        'stats': upload_queue.get_stats(),
+        'items': upload_queue.list_items(status)
+    })
+
+@app.route('/api/upload_queue/retry', methods=['POST'])
+def api_upload_queue_retry():
+    """Reiht fehlgeschlagene Uploads erneut ein"""
+    count = upload_queue.retry_failed()
+    return jsonify({
+        'success': True,
+        'message': f'{count} Uploads erneut eingereiht'
+    })
+
 @app.route('/api/printers')
 def api_get_printers():
     """Gibt verfügbare Drucker zurück"""
@@ -589,12 +904,7 @@ def api_storage_info():
 def api_detect_printers():
     """Verfügbare Drucker finden"""
     try:
-        result = subprocess.run(['lpstat', '-p'], capture_output=True, text=True)
-        printers = []
-        for line in result.stdout.split('\n'):
-            if line.startswith('printer '):
-                printer_name = line.split()[1]
-                printers.append(printer_name)
+        printers = [printer['name'] for printer in print_manager.get_available_printers()]
         
         return jsonify({
             'success': True,
@@ -621,9 +931,12 @@ def api_clear_photos():
         deleted_count = 0
         for photo_file in photo_files:
             if os.path.basename(photo_file) != '.gitkeep':  # .gitkeep erhalten
+                image_workers.cancel(photo_path=photo_file)
                 os.remove(photo_file)
                 deleted_count += 1
         
+        photo_catalog.reconcile()
+        
         return jsonify({
             'success': True,
             'message': f'{deleted_count} Fotos gelöscht'
@@ -700,9 +1013,6 @@ def api_test_server_config():
                 'message': 'Keine Server-URL angegeben'
             })
         
-        # Test-Request an den Server
-        import requests
-        
         # Upload-Endpoint zusammensetzen
         if not base_url.endswith('/'):
             base_url += '/'
@@ -712,8 +1022,8 @@ def api_test_server_config():
         if api_key:
             headers['X-API-Key'] = api_key
         
-        # Test-Request (HEAD Request um nur Verbindung zu prüfen)
-        response = requests.head(upload_url, headers=headers, timeout=10)
+        # Test-Request (HEAD Request um nur Verbindung zu prüfen, über den Keep-Alive-Pool der Uploads)
+        response = http_session_pool.request('HEAD', upload_url, headers=headers, timeout=10)
         
         if response.status_code in [200, 405]:  # 405 ist OK für HEAD auf POST-Endpoint
             return jsonify({
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Fotobox Bild-Benchmark
+Reproduzierbare Messung der Bildverarbeitung (Overlay, Druck-Vorbereitung, Upload-Vorbereitung)
+mit synthetischen Fotos in Kameragröße
+
+Jedes Szenario läuft in einem eigenen Prozess, damit Spitzen-RSS und Overlay-Cache
+nicht von vorherigen Messungen beeinflusst werden. Ergebnisse werden als JSON gespeichert
+und können mit --compare gegen einen früheren Lauf (z.B. letzte Version) verglichen werden.
+
+Verwendung:
+    python benchmark_images.py
+    python benchmark_images.py --size 6000x4000 --repeat 5 --stages overlay,print
+    python benchmark_images.py --compare benchmarks/benchmark_4.1.0_20251005-120000.json
+"""
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+import PIL
+from PIL import Image, ImageFilter
+
+# Canon EOS 2000D: 24 MP (6000x4000)
+DEFAULT_IMAGE_SIZE = (6000, 4000)
+DEFAULT_REPEAT = 3
+BENCHMARK_SEED = 2025
+BENCHMARK_STAGES = ('overlay', 'print', 'upload')
+
+# Maximale Laufzeit eines Szenarios (Sekunden), danach wird der Kindprozess beendet
+SCENARIO_TIMEOUT = 900
+
+# Konfigurations-Varianten pro Verarbeitungsschritt
+SCENARIOS = [
+    {'stage': 'overlay', 'name': 'overlay_text',
+     'overlay': {'text_enabled': True}},
+    {'stage': 'overlay', 'name': 'overlay_logo',
+     'overlay': {'logo_size': 400}},
+    {'stage': 'overlay', 'name': 'overlay_frame_border',
+     'overlay': {'frame_enabled': True, 'frame_type': 'border'}},
+    {'stage': 'overlay', 'name': 'overlay_frame_full',
+     'overlay': {'frame_enabled': True, 'frame_type': 'full-overlay'}},
+    {'stage': 'overlay', 'name': 'overlay_all',
+     'overlay': {'text_enabled': True, 'logo_size': 400, 'frame_enabled': True, 'frame_type': 'full-overlay'}},
+    {'stage': 'print', 'name': 'print_10x15_high',
+     'printing': {'paper_size': '10x15cm', 'print_quality': 'high'}},
+    {'stage': 'print', 'name': 'print_10x15_photo',
+     'printing': {'paper_size': '10x15cm', 'print_quality': 'photo'}},
+    {'stage': 'print', 'name': 'print_a4_photo',
+     'printing': {'paper_size': 'A4', 'print_quality': 'photo'}},
+    {'stage': 'upload', 'name': 'upload_metadata_only',
+     'upload': {'compress_images': False}},
+    {'stage': 'upload', 'name': 'upload_compress',
+     'upload': {'compress_images': True, 'max_file_size': 1}},
+]
+
+def create_synthetic_photo(path: str, size=DEFAULT_IMAGE_SIZE, seed: int = BENCHMARK_SEED) -> str:
+    """
+    Erzeugt ein reproduzierbares Test-Foto mit Verläufen und Bildrauschen
+
+    Weiche Flächen und feines Rauschen ergeben eine JPEG-Größe wie bei einem
+    echten Kamerafoto (ein einfarbiges Bild wäre unrealistisch klein).
+    """
+    rng = random.Random(seed)
+    width, height = size
+
+    # Grobe Bildstruktur: kleines Zufallsbild hochskaliert
+    coarse_size = (max(width // 40, 1), max(height // 40, 1))
+    coarse = Image.frombytes('RGB', coarse_size, rng.randbytes(coarse_size[0] * coarse_size[1] * 3))
+    img = coarse.resize(size, Image.Resampling.BICUBIC).filter(ImageFilter.GaussianBlur(4))
+
+    # Feines Sensorrauschen als gekachelte Ebene
+    grain_size = 512
+    grain = Image.frombytes('RGB', (grain_size, grain_size), rng.randbytes(grain_size * grain_size * 3))
+    grain_layer = Image.new('RGB', size)
+    for y in range(0, height, grain_size):
+        for x in range(0, width, grain_size):
+            grain_layer.paste(grain, (x, y))
+    img = Image.blend(img, grain_layer, 0.08)
+
+    img.save(path, 'JPEG', quality=95)
+    return path
+
+def _read_version() -> str:
+    """Liest die Fotobox-Version aus der VERSION-Datei"""
+    version_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'VERSION')
+    try:
+        with open(version_file, encoding='utf-8') as f:
+            return f.read().strip()
+    except OSError:
+        return 'unknown'
+
+def _reset_peak_rss() -> bool:
+    """Setzt den Spitzen-RSS-Zähler zurück (nur Linux, /proc/self/clear_refs)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def _memory_status_mb() -> Optional[Dict[str, float]]:
+    """Aktueller und Spitzen-RSS des Prozesses in MB (None falls nicht verfügbar)"""
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            values = dict(line.split(':', 1) for line in f if line.startswith(('VmRSS', 'VmHWM')))
+        return {
+            'current': int(values['VmRSS'].split()[0]) / 1024,
+            'peak': int(values['VmHWM'].split()[0]) / 1024
+        }
+    except (OSError, KeyError, ValueError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    # ru_maxrss: Linux meldet KB, macOS Bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak /= 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return {'current': peak, 'peak': peak}
+
+def _build_config(scenario: Dict, workdir: str):
+    """Erstellt eine AppConfig für ein Szenario (unabhängig von config.json)"""
+    from config import AppConfig
+
+    config = AppConfig()
+    config.photo_dir = os.path.join(workdir, 'photos')
+    config.temp_dir = os.path.join(workdir, 'temp')
+    config.overlay_dir = os.path.join(workdir, 'overlays')
+
+    config.overlay.enabled = True
+    config.overlay.logo_path = os.path.join(config.overlay_dir, 'logo.png')
+    config.overlay.frame_path = os.path.join(config.overlay_dir, 'frame.png')
+    config.overlay.text_content = 'Fotobox Benchmark {date}'
+    # Logo nur wenn logo_size gesetzt ist (fehlende Datei = kein Logo)
+    if 'logo_size' not in scenario.get('overlay', {}):
+        config.overlay.logo_path = os.path.join(config.overlay_dir, 'kein_logo.png')
+
+    for section in ('overlay', 'printing', 'upload'):
+        for key, value in scenario.get(section, {}).items():
+            setattr(getattr(config, section), key, value)
+    return config
+
+def _make_stage_runner(scenario: Dict, config, image_path: str, workdir: str):
+    """Gibt eine Funktion zurück, die den Verarbeitungsschritt einmal ausführt und aufräumt"""
+    stage = scenario['stage']
+
+    if stage == 'overlay':
+        from overlay_manager import OverlayManager
+        manager = OverlayManager(config)
+        manager.create_sample_overlays()
+        output_path = os.path.join(workdir, 'output', 'overlay.jpg')
+
+        def run():
+            result = manager.apply_overlays(image_path, output_path)
+            size = os.path.getsize(result)
+            os.remove(result)
+            return size
+        return run
+
+    if stage == 'print':
+        from print_manager import PrintManager
+        manager = PrintManager(config)
+
+        def run():
+            result = manager._prepare_photo_for_print(image_path)
+            if result == image_path:
+                raise RuntimeError('Druck-Vorbereitung fehlgeschlagen')
+            size = os.path.getsize(result)
+            os.remove(result)
+            return size
+        return run
+
+    if stage == 'upload':
+        from upload_manager import UploadManager
+        manager = UploadManager(config)
+
+        def run():
+            result, _ = manager._prepare_upload(image_path)
+            size = os.path.getsize(result)
+            if result != image_path:
+                os.remove(result)
+            return size
+        return run
+
+    raise ValueError(f'Unbekannter Verarbeitungsschritt: {stage}')
+
+def _run_scenario(scenario: Dict, image_path: str, workdir: str, repeat: int, results):
+    """Misst ein Szenario im Kindprozess und liefert das Ergebnis über die Queue"""
+    try:
+        config = _build_config(scenario, workdir)
+        os.makedirs(config.temp_dir, exist_ok=True)
+        run = _make_stage_runner(scenario, config, image_path, workdir)
+        _reset_peak_rss()
+        memory_before = _memory_status_mb()
+
+        # Erster Lauf (kalt: Dateisystem-Cache, Overlay-Ebenen, Schriften)
+        started = time.perf_counter()
+        output_size = run()
+        cold = time.perf_counter() - started
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+        memory_after = _memory_status_mb()
+
+        # Separater Lauf mit tracemalloc (verlangsamt die Ausführung, daher nicht in den Zeiten).
+        # Erfasst nur Python-Objekte - Pillow-Bildpuffer (C-Speicher) stecken nur im Peak-RSS
+        tracemalloc.start()
+        run()
+        current, peak = tracemalloc.get_traced_memory()
+        blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+        tracemalloc.stop()
+
+        results.put({
+            'name': scenario['name'],
+            'stage': scenario['stage'],
+            'settings': {k: v for k, v in scenario.items() if k not in ('name', 'stage')},
+            'success': True,
+            'cold_seconds': round(cold, 4),
+            'wall_seconds': {
+                'min': round(min(timings), 4),
+                'median': round(statistics.median(timings), 4),
+                'max': round(max(timings), 4),
+                'runs': [round(t, 4) for t in timings]
+            },
+            'peak_rss_mb': round(memory_after['peak'], 1) if memory_after else None,
+            'peak_rss_delta_mb': round(memory_after['peak'] - memory_before['current'], 1) if memory_after else None,
+            'python_heap_peak_mb': round(peak / 1024 / 1024, 2),
+            'python_heap_retained_blocks': blocks,
+            'output_bytes': output_size
+        })
+    except Exception as e:
+        results.put({'name': scenario['name'], 'stage': scenario['stage'], 'success': False, 'message': str(e)})
+
+def _wait_for_result(process, results, scenario: Dict) -> Dict:
+    """Wartet auf das Ergebnis des Kindprozesses - Absturz (z.B. OOM-Kill) oder Zeitüberschreitung werden gemeldet"""
+    deadline = time.monotonic() + SCENARIO_TIMEOUT
+    while True:
+        try:
+            result = results.get(timeout=1.0)
+            process.join()
+            return result
+        except queue.Empty:
+            pass
+
+        if not process.is_alive():
+            # Ergebnis kann noch unterwegs sein, obwohl der Prozess bereits beendet ist
+            try:
+                return results.get(timeout=1.0)
+            except queue.Empty:
+                pass
+            exitcode = process.exitcode
+            if exitcode == -9:
+                reason = 'durch SIGKILL beendet (z.B. OOM-Killer - Speicher prüfen)'
+            elif exitcode and exitcode < 0:
+                reason = f'durch Signal {-exitcode} beendet'
+            else:
+                reason = f'ohne Ergebnis beendet (Exit-Code {exitcode})'
+            return {'name': scenario['name'], 'stage': scenario['stage'], 'success': False,
+                    'message': f'Kindprozess {reason}', 'exitcode': exitcode}
+
+        if time.monotonic() > deadline:
+            process.kill()
+            process.join()
+            return {'name': scenario['name'], 'stage': scenario['stage'], 'success': False,
+                    'message': f'Zeitüberschreitung nach {SCENARIO_TIMEOUT}s'}
+
+def run_benchmarks(image_path: str, workdir: str, stages: List[str], repeat: int) -> List[Dict]:
+    """Führt alle Szenarien der gewählten Verarbeitungsschritte nacheinander aus"""
+    context = multiprocessing.get_context('spawn')
+    results = []
+
+    for scenario in SCENARIOS:
+        if scenario['stage'] not in stages:
+            continue
+
+        scenario_dir = os.path.join(workdir, scenario['name'])
+        os.makedirs(scenario_dir, exist_ok=True)
+
+        result_queue = context.Queue()
+        process = context.Process(target=_run_scenario, args=(scenario, image_path, scenario_dir, repeat, result_queue))
+        process.start()
+        result = _wait_for_result(process, result_queue, scenario)
+        results.append(result)
+
+        if result['success']:
+            peak_rss = f"{result['peak_rss_mb']:.0f} MB" if result['peak_rss_mb'] is not None else '?'
+            print(f"  ✅ {result['name']:<22} median {result['wall_seconds']['median']:.3f}s "
+                  f"(kalt {result['cold_seconds']:.3f}s)  Peak-RSS {peak_rss} "
+                  f"(+{result['peak_rss_delta_mb'] or 0:.0f} MB)")
+        else:
+            print(f"  ❌ {result['name']:<22} {result['message']}")
+
+    return results
+
+def compare_results(current: Dict, previous: Dict):
+    """Gibt die Veränderung gegenüber einem früheren Lauf aus"""
+    previous_by_name = {r['name']: r for r in previous.get('results', []) if r.get('success')}
+    print(f"\n📊 Vergleich mit {previous.get('version', '?')} ({previous.get('timestamp', '?')})")
+
+    for result in current['results']:
+        before = previous_by_name.get(result['name'])
+        if not result.get('success') or before is None:
+            continue
+        old_time = before['wall_seconds']['median']
+        new_time = result['wall_seconds']['median']
+        change = (new_time - old_time) / old_time * 100 if old_time else 0.0
+        rss_change = (result['peak_rss_mb'] or 0) - (before['peak_rss_mb'] or 0)
+        marker = '🟢' if change <= -5 else '🔴' if change >= 5 else '⚪'
+        print(f"  {marker} {result['name']:<22} {old_time:.3f}s -> {new_time:.3f}s ({change:+.1f}%)  "
+              f"Peak-RSS {rss_change:+.0f} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description='Fotobox Bild-Benchmark (Overlay, Druck, Upload)')
+    parser.add_argument('--size', default=f'{DEFAULT_IMAGE_SIZE[0]}x{DEFAULT_IMAGE_SIZE[1]}',
+                        help='Bildgröße BREITExHÖHE (Standard: 24 MP Canon EOS 2000D)')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Gemessene Läufe pro Szenario')
+    parser.add_argument('--stages', default=','.join(BENCHMARK_STAGES),
+                        help='Verarbeitungsschritte, kommagetrennt (overlay,print,upload)')
+    parser.add_argument('--seed', type=int, default=BENCHMARK_SEED, help='Startwert für das Test-Foto')
+    parser.add_argument('--output', help='JSON-Ergebnisdatei (Standard: benchmarks/benchmark_<version>_<zeit>.json)')
+    parser.add_argument('--compare', help='Früheres Ergebnis zum Vergleich')
+    args = parser.parse_args()
+
+    width, height = (int(value) for value in args.size.lower().split('x'))
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = set(stages) - set(BENCHMARK_STAGES)
+    if unknown:
+        parser.error(f"Unbekannte Verarbeitungsschritte: {', '.join(sorted(unknown))}")
+
+    version = _read_version()
+    now = datetime.datetime.now()
+    output_path = args.output or os.path.join(
+        'benchmarks', f"benchmark_{version}_{now.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+
+    workdir = tempfile.mkdtemp(prefix='fotobox_benchmark_')
+    try:
+        image_path = os.path.join(workdir, 'synthetic.jpg')
+        print(f"📸 Erzeuge Test-Foto {width}x{height} ({width * height / 1e6:.0f} MP)...")
+        create_synthetic_photo(image_path, (width, height), args.seed)
+        image_bytes = os.path.getsize(image_path)
+        print(f"   {image_bytes / 1024 / 1024:.1f} MB JPEG")
+
+        print(f"⏱️ Messe {', '.join(stages)} ({args.repeat} Läufe pro Szenario)")
+        results = run_benchmarks(image_path, workdir, stages, max(1, args.repeat))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'version': version,
+        'timestamp': now.isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'pillow': PIL.__version__,
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count()
+        },
+        'image': {'width': width, 'height': height, 'bytes': image_bytes, 'seed': args.seed},
+        'repeat': args.repeat,
+        'results': results
+    }
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"💾 Ergebnisse gespeichert: {output_path}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare_results(report, json.load(f))
+
+    return 0 if all(r['success'] for r in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Fotobox Kamera-Worker
+Ein einziger Besitzer-Thread für alle gphoto2-Zugriffe mit priorisierter Befehls-Warteschlange
+"""
+
+import itertools
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+# Prioritäten (kleiner = wichtiger)
+PRIORITY_CAPTURE = 0   # Foto-Aufnahme
+PRIORITY_CONTROL = 1   # Live-View starten/stoppen
+PRIORITY_PREVIEW = 2   # Preview-Frames (verwerfbar)
+PRIORITY_STATUS = 3    # Status-Abfragen
+
+class CameraWorker:
+    """Serialisiert alle Kamera-Befehle über einen Thread"""
+
+    def __init__(self, name: str = 'camera-worker'):
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()  # FIFO innerhalb gleicher Priorität
+        self._lock = threading.Lock()
+        self._pending_captures = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    @property
+    def capture_pending(self) -> bool:
+        """True solange eine Aufnahme wartet oder läuft"""
+        with self._lock:
+            return self._pending_captures > 0
+
+    def in_worker_thread(self) -> bool:
+        """Prüft ob der Aufruf bereits im Worker-Thread läuft"""
+        return threading.current_thread() is self._thread
+
+    def submit(self, priority: int, func: Callable, args: tuple = (), kwargs: Optional[dict] = None,
+               droppable: bool = False) -> Future:
+        """
+        Reiht einen Kamera-Befehl ein
+
+        Args:
+            priority: PRIORITY_* Konstante
+            func: Auszuführende Funktion
+            args/kwargs: Argumente für func
+            droppable: Befehl verwerfen (Ergebnis None) solange eine Aufnahme ansteht
+
+        Returns:
+            Future mit dem Ergebnis von func
+        """
+        kwargs = kwargs or {}
+        future = Future()
+
+        # Verschachtelte Aufrufe im Worker-Thread bzw. ohne laufenden Worker direkt ausführen
+        if self.in_worker_thread() or not self._thread.is_alive():
+            self._execute(func, args, kwargs, future)
+            return future
+
+        if droppable and self.capture_pending:
+            future.set_result(None)
+            return future
+
+        if priority == PRIORITY_CAPTURE:
+            with self._lock:
+                self._pending_captures += 1
+
+        self._queue.put((priority, next(self._sequence), func, args, kwargs, droppable, future))
+        return future
+
+    def call(self, priority: int, func: Callable, args: tuple = (), kwargs: Optional[dict] = None,
+             droppable: bool = False):
+        """Führt einen Kamera-Befehl aus und wartet auf das Ergebnis"""
+        return self.submit(priority, func, args, kwargs, droppable).result()
+
+    def pending_commands(self) -> int:
+        """Anzahl wartender Befehle"""
+        return self._queue.qsize()
+
+    def _execute(self, func: Callable, args: tuple, kwargs: dict, future: Future):
+        """Führt einen Befehl aus und überträgt Ergebnis/Fehler in das Future"""
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+
+    def _run(self):
+        """Worker-Schleife"""
+        while True:
+            priority, _, func, args, kwargs, droppable, future = self._queue.get()
+
+            # Vor einer Aufnahme eingereihte Preview-Frames verwerfen statt abarbeiten
+            if droppable and self.capture_pending:
+                future.set_result(None)
+                continue
+
+            try:
+                self._execute(func, args, kwargs, future)
+            finally:
+                if priority == PRIORITY_CAPTURE:
+                    with self._lock:
+                        self._pending_captures -= 1
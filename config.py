@@ -4,9 +4,10 @@ Fotobox Konfiguration - Phase 2
 Erweiterte Einstellungen für Overlays, Drucken und Server-Upload
 """
 
+import copy
 import os
 import json
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from typing import Dict, Optional, List
 
 @dataclass
@@ -29,6 +30,28 @@ class OverlayConfig:
     frame_path: str = "overlays/frame.png"
     frame_type: str = "border"  # border, full-overlay
 
+# Mehrfach-Layouts: mehrere Fotos auf einem Druckbogen (Pixel bei 300 DPI, Bogen = paper_size)
+DEFAULT_PRINT_LAYOUTS = {
+    'strip': {
+        'name': 'Fotostreifen (2x 5x15cm)',
+        'rows': 4, 'columns': 1,
+        'repeat': 2,  # Streifen nebeneinander wiederholen (zum Auseinanderschneiden)
+        'orientation': 'portrait',
+        'margin': 30, 'spacing': 20,
+        'footer': 180, 'caption': '{date}',
+        'background': '#FFFFFF', 'fit': 'cover'
+    },
+    'grid_2x2': {
+        'name': '2x2 Raster',
+        'rows': 2, 'columns': 2,
+        'repeat': 1,
+        'orientation': 'landscape',
+        'margin': 40, 'spacing': 20,
+        'footer': 0, 'caption': '',
+        'background': '#FFFFFF', 'fit': 'cover'
+    }
+}
+
 @dataclass 
 class PrintConfig:
     """Konfiguration für automatisches Drucken"""
@@ -38,12 +61,21 @@ class PrintConfig:
     paper_size: str = "10x15cm"  # 10x15cm, 13x18cm, A4
     print_quality: str = "high"  # draft, normal, high, photo
     copies: int = 1
+    max_printer_jobs: int = 2  # Aufträge gleichzeitig beim Drucker (Puffer), 0 = unbegrenzt
+    
+    # CUPS-Zugriff per IPP (lp/lpstat nur als Fallback)
+    use_ipp: bool = True
+    ipp_server: str = ""  # Socket-Pfad oder host:port, leer = lokaler CUPS-Socket bzw. localhost:631
     
     # Druckbereich-Anpassungen
     margin_top: int = 0
     margin_bottom: int = 0
     margin_left: int = 0
     margin_right: int = 0
+    
+    # Mehrfach-Layouts (Fotostreifen, Raster) - Vorlagen siehe DEFAULT_PRINT_LAYOUTS
+    default_layout: str = "strip"
+    layouts: Dict[str, Dict] = field(default_factory=lambda: copy.deepcopy(DEFAULT_PRINT_LAYOUTS))
 
 @dataclass
 class UploadConfig:
@@ -70,6 +102,27 @@ class UploadConfig:
     max_file_size: int = 5  # MB
     generate_thumbnails: bool = True
     thumbnail_size: int = 300
+    
+    # Upload-Warteschlange (persistent, mit Wiederholung)
+    queue_concurrency: int = 1  # Parallele Uploads
+    retry_backoff_base: int = 10  # Sekunden bis zum ersten Wiederholungsversuch
+    retry_backoff_max: int = 900  # Maximale Wartezeit zwischen Versuchen
+    queue_max_attempts: int = 0  # 0 = unbegrenzt wiederholen
+    
+    # Batch-Upload (Nachladen vieler Fotos)
+    batch_concurrency: int = 4  # Parallele Requests pro Batch
+    
+    # Duplikat-Erkennung
+    server_hash_probe: bool = False  # Server vor dem Upload nach der Prüfsumme fragen (HTTP)
+    
+    # Fortsetzbarer Upload in Teilstücken (HTTP)
+    chunked_upload: bool = False
+    chunk_size_kb: int = 1024  # Größe eines Teilstücks
+    
+    # Bandbreiten-Steuerung (schützt Live-View und Bedienung)
+    bandwidth_limit_kbps: int = 0  # Normalbetrieb, 0 = unbegrenzt
+    bandwidth_busy_kbps: int = 256  # Während Aufnahme, Countdown und Live-View, 0 = Uploads pausieren
+    bandwidth_idle_after: int = 60  # Sekunden ohne Aktivität bis zum Nachholen ohne Limit
 
 @dataclass
 class ThemeConfig:
@@ -114,6 +167,26 @@ class AppConfig:
     countdown_enabled: bool = True
     countdown_duration: int = 3
     
+    # Live-Ansicht (MJPEG-Stream)
+    live_stream_fps: int = 15
+    
+    # Serienaufnahme (/api/take_burst)
+    burst_count: int = 4
+    burst_interval: float = 1.0  # Sekunden zwischen den Aufnahmen
+    
+    # Nachbearbeitung nach der Aufnahme (Worker-Pool)
+    pipeline_workers: int = 2
+    pipeline_queue_size: int = 50
+    
+    # Bildverarbeitung (Overlay, Druck, Upload-Komprimierung) in eigenen Prozessen, 0 = im Thread
+    image_workers: int = 3
+    image_queue_size: int = 20
+    
+    # Galerie-Vorschaubilder (Thumbnail-Cache in temp_dir)
+    gallery_thumbnail_size: int = 400  # Pixel (längste Kante)
+    gallery_screen_size: int = 1600  # Pixel (längste Kante)
+    thumbnail_cache_mb: int = 512  # Speicherbudget
+    
     # Feature-Konfigurationen
     overlay: OverlayConfig = None
     printing: PrintConfig = None
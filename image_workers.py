@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Fotobox Bildverarbeitungs-Worker
+Führt Pillow-Arbeit (Overlay, Druck-Vorbereitung, Upload-Komprimierung) in eigenen
+Prozessen aus, damit parallele Aufträge alle CPU-Kerne nutzen statt den Flask-Thread zu blockieren
+
+Die Worker-Prozesse teilen keinen Zustand mit der App: Aufträge enthalten nur Dateipfade,
+Optionen und die aktuelle Konfiguration (JSON-Zeilen über stdin/stdout). Laufende Aufträge
+werden beim Abbrechen durch Beenden des Worker-Prozesses gestoppt.
+"""
+
+import concurrent.futures
+import itertools
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict
+from typing import Dict, List, Optional, Tuple
+
+# Unterstützte Auftragsarten
+IMAGE_JOB_KINDS = ('overlay', 'print', 'upload', 'layout')
+
+# Maximale Wartezeit auf ein Ergebnis (danach wird der Auftrag abgebrochen)
+IMAGE_JOB_TIMEOUT = 120.0
+
+class ImageJobCancelled(concurrent.futures.CancelledError):
+    """Auftrag wurde abgebrochen (wartend oder laufend)"""
+
+class ImageWorkerPool:
+    """Begrenzter Pool von Bildverarbeitungs-Prozessen mit Warteschlange und Abbruch"""
+
+    def __init__(self, config):
+        self.config = config
+        self.workers = max(0, config.image_workers)
+        self._queue = queue.Queue(maxsize=max(1, config.image_queue_size))
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._jobs: Dict[str, Dict] = {}  # Wartende und laufende Aufträge
+        self._stats = {'completed': 0, 'failed': 0, 'cancelled': 0, 'rejected': 0,
+                       'inline': 0, 'worker_starts': 0, 'busy_seconds': 0.0}
+
+        for index in range(self.workers):
+            worker = threading.Thread(target=self._dispatch, args=(index,),
+                                      name=f'image-worker-{index}', daemon=True)
+            worker.start()
+
+    def submit(self, kind: str, photo_path: str, **options) -> concurrent.futures.Future:
+        """
+        Reiht einen Bildverarbeitungs-Auftrag ein
+
+        Args:
+            kind: 'overlay', 'print', 'upload' oder 'layout'
+            photo_path: Pfad zum (ersten) Foto
+            options: Auftragsabhängige Optionen (output_path, metadata, photo_paths, layout)
+
+        Returns:
+            Future mit dem Ergebnis-Dictionary; future.job_id enthält die Auftrags-ID
+        """
+        if kind not in IMAGE_JOB_KINDS:
+            raise ValueError(f'Unbekannte Auftragsart: {kind}')
+
+        future = concurrent.futures.Future()
+        job = {
+            'id': str(next(self._ids)),
+            'kind': kind,
+            'photo_path': photo_path,
+            'options': options,
+            'status': 'queued',
+            'future': future,
+            'process': None
+        }
+        future.job_id = job['id']
+
+        # Ohne Worker-Prozesse direkt im aufrufenden Thread ausführen
+        if self.workers == 0:
+            with self._lock:
+                self._stats['inline'] += 1
+            self._execute_inline(job)
+            return future
+
+        with self._lock:
+            self._jobs[job['id']] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job['id'], None)
+                self._stats['rejected'] += 1
+            future.set_exception(RuntimeError('Bildverarbeitungs-Warteschlange voll'))
+        return future
+
+    def run(self, kind: str, photo_path: str, timeout: float = IMAGE_JOB_TIMEOUT, **options) -> Dict:
+        """Führt einen Auftrag aus und wartet auf das Ergebnis (bricht bei Zeitüberschreitung ab)"""
+        future = self.submit(kind, photo_path, **options)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            self.cancel(future.job_id)
+            raise TimeoutError(f'Bildverarbeitung ({kind}) nach {timeout:.0f}s abgebrochen')
+
+    def apply_overlays(self, image_path: str, output_path: Optional[str] = None) -> str:
+        """Overlay im Worker-Prozess anwenden (siehe OverlayManager.apply_overlays)"""
+        return self.run('overlay', image_path, output_path=output_path)['path']
+
+    def prepare_print(self, photo_path: str) -> str:
+        """Druck-Vorbereitung im Worker-Prozess (siehe PrintManager._prepare_photo_for_print)"""
+        return self.run('print', photo_path)['path']
+
+    def prepare_upload(self, photo_path: str, metadata: Optional[Dict] = None,
+                       checksum: Optional[str] = None) -> Tuple[str, Dict]:
+        """Upload-Vorbereitung im Worker-Prozess (siehe UploadManager._prepare_upload)"""
+        result = self.run('upload', photo_path, metadata=metadata, checksum=checksum)
+        return result['path'], result['metadata']
+
+    def compose_layout(self, photo_paths: List[str], layout: str) -> str:
+        """Druckbogen im Worker-Prozess erzeugen (siehe PrintLayoutEngine.render)"""
+        return self.run('layout', photo_paths[0], photo_paths=photo_paths, layout=layout)['path']
+    
+    def cancel(self, job_id: Optional[str] = None, photo_path: Optional[str] = None) -> int:
+        """
+        Bricht Aufträge ab - einen per ID oder alle für ein Foto
+
+        Wartende Aufträge werden verworfen, laufende durch Beenden des Worker-Prozesses gestoppt.
+
+        Returns:
+            Anzahl abgebrochener Aufträge
+        """
+        with self._lock:
+            targets = [job for job in self._jobs.values()
+                       if (job_id is not None and job['id'] == job_id)
+                       or (photo_path is not None and job['photo_path'] == photo_path)]
+
+        cancelled = 0
+        for job in targets:
+            with self._lock:
+                if job['status'] == 'queued' and job['future'].cancel():
+                    job['status'] = 'cancelled'
+                    cancelled += 1
+                elif job['status'] == 'running' and job['process'] is not None:
+                    job['status'] = 'cancelled'
+                    job['process'].kill()
+                    cancelled += 1
+
+        if cancelled:
+            with self._lock:
+                self._stats['cancelled'] += cancelled
+            print(f"🛑 {cancelled} Bildverarbeitungs-Auftrag/Aufträge abgebrochen")
+        return cancelled
+
+    def get_stats(self) -> Dict:
+        """Gibt Warteschlangen- und Auslastungs-Statistiken zurück"""
+        with self._lock:
+            running = [job for job in self._jobs.values() if job['status'] == 'running']
+            stats = dict(self._stats)
+            jobs = [
+                {'id': job['id'], 'kind': job['kind'], 'filename': os.path.basename(job['photo_path']),
+                 'status': job['status']}
+                for job in self._jobs.values()
+            ]
+        stats['busy_seconds'] = round(stats['busy_seconds'], 2)
+        return {
+            'workers': self.workers,
+            'running': len(running),
+            'queued': self._queue.qsize(),
+            'max_queue': self._queue.maxsize,
+            'jobs': jobs,
+            **stats
+        }
+
+    def _execute_inline(self, job: Dict):
+        """Führt einen Auftrag im aktuellen Prozess aus (image_workers = 0)"""
+        future = job['future']
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(execute_job(job['kind'], job['photo_path'], job['options'], self.config))
+        except Exception as e:
+            future.set_exception(e)
+
+    def _start_process(self) -> subprocess.Popen:
+        """Startet einen Worker-Prozess (dieses Modul als Skript, gleiches Arbeitsverzeichnis)"""
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            text=True, encoding='utf-8', bufsize=1
+        )
+        with self._lock:
+            self._stats['worker_starts'] += 1
+        return process
+
+    def _dispatch(self, index: int):
+        """Dispatcher-Thread: besitzt genau einen Worker-Prozess und reicht Aufträge durch"""
+        process = None
+        while True:
+            job = self._queue.get()
+            future = job['future']
+            if not future.set_running_or_notify_cancel():
+                with self._lock:
+                    self._jobs.pop(job['id'], None)
+                continue
+
+            if process is None or process.poll() is not None:
+                try:
+                    process = self._start_process()
+                except OSError as e:
+                    print(f"⚠️ Bild-Worker {index} konnte nicht gestartet werden: {e} - verarbeite im Thread")
+                    process = None
+
+            with self._lock:
+                job['status'] = 'running'
+                job['process'] = process
+            started = time.monotonic()
+
+            try:
+                if process is None:
+                    result = execute_job(job['kind'], job['photo_path'], job['options'], self.config)
+                else:
+                    result = self._send(process, job)
+                future.set_result(result)
+                outcome = 'completed'
+            except Exception as e:
+                if job['status'] == 'cancelled':
+                    e = ImageJobCancelled(f"Auftrag {job['id']} abgebrochen")
+                    self._remove_partial_output(job)
+                future.set_exception(e)
+                outcome = 'failed'
+            finally:
+                with self._lock:
+                    self._jobs.pop(job['id'], None)
+                    self._stats['busy_seconds'] += time.monotonic() - started
+                    if job['status'] != 'cancelled':
+                        self._stats[outcome] += 1
+
+    def _send(self, process: subprocess.Popen, job: Dict) -> Dict:
+        """Überträgt einen Auftrag an den Worker-Prozess und liest die Antwort"""
+        request = {
+            'kind': job['kind'],
+            'photo_path': job['photo_path'],
+            'options': job['options'],
+            'config': asdict(self.config)
+        }
+        try:
+            process.stdin.write(json.dumps(request) + '\n')
+            process.stdin.flush()
+            line = process.stdout.readline()
+        except (BrokenPipeError, OSError):
+            line = ''
+
+        if not line:
+            process.wait()
+            raise RuntimeError(f'Bild-Worker beendet (Exit-Code {process.returncode})')
+
+        response = json.loads(line)
+        if not response['success']:
+            raise RuntimeError(response['error'])
+        return response['result']
+
+    def _remove_partial_output(self, job: Dict):
+        """Entfernt eine halb geschriebene Overlay-Datei eines abgebrochenen Auftrags"""
+        output_path = job['options'].get('output_path')
+        if job['kind'] == 'overlay' and output_path is None:
+            base, ext = os.path.splitext(job['photo_path'])
+            output_path = f"{base}_overlay{ext}"
+        if output_path and os.path.exists(output_path):
+            os.remove(output_path)
+
+# Manager im Worker-Prozess, wiederverwendet solange sich die Konfiguration nicht ändert
+_worker_managers: Dict[str, Tuple[str, object]] = {}
+
+def _get_manager(kind: str, config):
+    """Gibt den (gecachten) Manager für eine Auftragsart zurück"""
+    config_key = json.dumps(asdict(config), sort_keys=True, default=str)
+    cached = _worker_managers.get(kind)
+    if cached and cached[0] == config_key:
+        return cached[1]
+
+    if kind == 'overlay':
+        from overlay_manager import OverlayManager
+        manager = OverlayManager(config)
+    elif kind == 'print':
+        from print_manager import PrintManager
+        manager = PrintManager(config)
+    else:
+        from upload_manager import UploadManager
+        manager = UploadManager(config)
+
+    _worker_managers[kind] = (config_key, manager)
+    return manager
+
+def execute_job(kind: str, photo_path: str, options: Dict, config) -> Dict:
+    """Führt einen Bildverarbeitungs-Auftrag aus (im Worker-Prozess oder als Fallback im Thread)"""
+    manager = _get_manager('print' if kind == 'layout' else kind, config)
+
+    if kind == 'overlay':
+        return {'path': manager.apply_overlays(photo_path, options.get('output_path'))}
+    if kind == 'print':
+        return {'path': manager._prepare_photo_for_print(photo_path)}
+    if kind == 'layout':
+        return {'path': manager.layouts.render(options['photo_paths'], options['layout'])}
+    if kind == 'upload':
+        path, metadata = manager._prepare_upload(photo_path, options.get('metadata'), options.get('checksum'))
+        return {'path': path, 'metadata': metadata}
+    raise ValueError(f'Unbekannte Auftragsart: {kind}')
+
+def serve():
+    """Worker-Prozess: liest Aufträge zeilenweise von stdin und antwortet auf stdout"""
+    from config import config_manager
+
+    # Protokoll auf eigenem Kanal - Log-Ausgaben der Manager gehen nach stderr
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), 'w', encoding='utf-8', buffering=1)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    for line in iter(sys.stdin.readline, ''):
+        try:
+            request = json.loads(line)
+            config = config_manager._dict_to_config(request['config'])
+            result = execute_job(request['kind'], request['photo_path'], request['options'], config)
+            response = {'success': True, 'result': result}
+        except Exception as e:
+            response = {'success': False, 'error': str(e)}
+        protocol.write(json.dumps(response) + '\n')
+
+if __name__ == "__main__":
+    serve()
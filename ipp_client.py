@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Fotobox IPP-Client
+Spricht direkt mit CUPS (lokaler Socket oder localhost:631) statt lp/lpstat/lpoptions/cancel
+als Unterprozesse zu starten - Druckaufträge, Druckerliste und Job-Status ohne fork/exec
+"""
+
+import getpass
+import http.client
+import itertools
+import os
+import socket
+import struct
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Lokale CUPS-Sockets (Raspberry Pi OS / Debian, ältere Distributionen, macOS)
+CUPS_SOCKET_PATHS = ('/run/cups/cups.sock', '/var/run/cups/cups.sock', '/private/var/run/cupsd')
+CUPS_DEFAULT_PORT = 631
+IPP_TIMEOUT = 10.0
+IPP_DEFAULT_USER = 'fotobox'  # Falls der Benutzername nicht ermittelt werden kann
+IPP_SEND_BLOCK_SIZE = 64 * 1024
+
+# IPP-Operationen (RFC 8011 / CUPS)
+OP_PRINT_JOB = 0x0002
+OP_CANCEL_JOB = 0x0008
+OP_GET_JOBS = 0x000A
+OP_CUPS_GET_PRINTERS = 0x4002
+
+# Attribut-Gruppen
+TAG_OPERATION = 0x01
+TAG_JOB = 0x02
+TAG_END = 0x03
+TAG_PRINTER = 0x04
+GROUP_TAGS = (TAG_OPERATION, TAG_JOB, TAG_PRINTER, 0x05, 0x06, 0x07)
+
+# Werte-Typen
+TAG_INTEGER = 0x21
+TAG_BOOLEAN = 0x22
+TAG_ENUM = 0x23
+TAG_BEGIN_COLLECTION = 0x34
+TAG_END_COLLECTION = 0x37
+TAG_TEXT = 0x41
+TAG_NAME = 0x42
+TAG_KEYWORD = 0x44
+TAG_URI = 0x45
+TAG_CHARSET = 0x47
+TAG_LANGUAGE = 0x48
+TAG_MIME_TYPE = 0x49
+TAG_MEMBER_NAME = 0x4A
+STRING_TAGS = (TAG_TEXT, TAG_NAME, TAG_KEYWORD, TAG_URI, 0x46, TAG_CHARSET, TAG_LANGUAGE, TAG_MIME_TYPE,
+               TAG_MEMBER_NAME, 0x40, 0x43)
+
+# printer-state / job-state
+PRINTER_STATES = {3: 'idle', 4: 'processing', 5: 'stopped'}
+JOB_STATES = {3: 'pending', 4: 'pending-held', 5: 'processing', 6: 'processing-stopped',
+              7: 'canceled', 8: 'aborted', 9: 'completed'}
+
+class IPPError(Exception):
+    """IPP-Fehler; status ist None bei Verbindungsproblemen (CUPS nicht erreichbar)"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+    @property
+    def unreachable(self) -> bool:
+        """True wenn CUPS nicht erreicht wurde (Fallback auf lp/lpstat sinnvoll)"""
+        return self.status is None
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP über den lokalen CUPS-Domain-Socket"""
+
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+def encode_attribute(tag: int, name: str, values) -> bytes:
+    """Kodiert ein Attribut (mehrere Werte als Zusatzwerte ohne Namen)"""
+    if not isinstance(values, (list, tuple)):
+        values = [values]
+
+    encoded = b''
+    for index, value in enumerate(values):
+        if tag in (TAG_INTEGER, TAG_ENUM):
+            data = struct.pack('>i', value)
+        elif tag == TAG_BOOLEAN:
+            data = b'\x01' if value else b'\x00'
+        else:
+            data = str(value).encode('utf-8')
+        key = name.encode('utf-8') if index == 0 else b''
+        encoded += struct.pack('>BH', tag, len(key)) + key + struct.pack('>H', len(data)) + data
+    return encoded
+
+def encode_message(code: int, request_id: int, groups: List[Tuple[int, List[Tuple[int, str, object]]]]) -> bytes:
+    """Kodiert eine IPP-Nachricht (Anfrage: code = Operation, Antwort: code = Status)"""
+    message = struct.pack('>BBHI', 1, 1, code, request_id)
+    for group_tag, attributes in groups:
+        message += struct.pack('>B', group_tag)
+        for tag, name, values in attributes:
+            message += encode_attribute(tag, name, values)
+    return message + struct.pack('>B', TAG_END)
+
+def decode_message(data: bytes) -> Tuple[int, int, List[Tuple[int, Dict[str, list]]], bytes]:
+    """
+    Dekodiert eine IPP-Nachricht
+
+    Returns:
+        (Operation bzw. Status, Request-ID, [(Gruppen-Tag, {Name: [Werte]})], Dokument-Daten)
+    """
+    if len(data) < 8:
+        raise IPPError('IPP-Antwort zu kurz')
+    _, _, code, request_id = struct.unpack('>BBHI', data[:8])
+    offset = 8
+    groups = []
+    current = None
+    last_name = None
+    collection_depth = 0
+
+    while offset < len(data):
+        tag = data[offset]
+        offset += 1
+        if tag == TAG_END:
+            break
+        if tag in GROUP_TAGS:
+            current = {}
+            groups.append((tag, current))
+            continue
+
+        name_length, = struct.unpack('>H', data[offset:offset + 2])
+        name = data[offset + 2:offset + 2 + name_length].decode('utf-8')
+        offset += 2 + name_length
+        value_length, = struct.unpack('>H', data[offset:offset + 2])
+        raw = data[offset + 2:offset + 2 + value_length]
+        offset += 2 + value_length
+
+        # Collections (z.B. media-col) werden übersprungen
+        if tag == TAG_BEGIN_COLLECTION:
+            collection_depth += 1
+            continue
+        if tag == TAG_END_COLLECTION:
+            collection_depth -= 1
+            continue
+        if collection_depth or current is None:
+            continue
+
+        if tag in (TAG_INTEGER, TAG_ENUM) and len(raw) == 4:
+            value = struct.unpack('>i', raw)[0]
+        elif tag == TAG_BOOLEAN:
+            value = raw != b'\x00'
+        elif tag in STRING_TAGS:
+            value = raw.decode('utf-8', errors='replace')
+        elif tag < 0x20:
+            value = None  # out-of-band (unknown, no-value)
+        else:
+            value = raw
+
+        if name:
+            last_name = name
+            current[name] = [value]
+        elif last_name is not None:
+            current[last_name].append(value)
+
+    return code, request_id, groups, data[offset:]
+
+class IPPClient:
+    """Minimaler IPP/1.1-Client für CUPS"""
+
+    def __init__(self, server: str = '', timeout: float = IPP_TIMEOUT):
+        """
+        Args:
+            server: Socket-Pfad oder host[:port]; leer = CUPS_SERVER bzw. lokaler Socket/localhost:631
+            timeout: Verbindungs-Timeout in Sekunden
+        """
+        self.server = server
+        self.timeout = timeout
+        self._request_ids = itertools.count(1)
+        self.user_name = self._resolve_user_name()
+
+    @staticmethod
+    def _resolve_user_name() -> str:
+        """requesting-user-name (einmalig; ohne USER/LOGNAME und passwd-Eintrag, z.B. unter systemd)"""
+        try:
+            return getpass.getuser()
+        except (KeyError, OSError, ImportError):
+            return IPP_DEFAULT_USER
+
+    def _target(self) -> Tuple[str, str, int]:
+        """Ermittelt Transport ('unix' oder 'tcp'), Adresse und Port"""
+        server = self.server or os.environ.get('CUPS_SERVER', '')
+        if server.startswith('/'):
+            return 'unix', server, 0
+        if server:
+            host, _, port = server.partition(':')
+            return 'tcp', host, int(port or CUPS_DEFAULT_PORT)
+        for path in CUPS_SOCKET_PATHS:
+            if os.path.exists(path):
+                return 'unix', path, 0
+        return 'tcp', 'localhost', CUPS_DEFAULT_PORT
+
+    def _connection(self) -> http.client.HTTPConnection:
+        transport, address, port = self._target()
+        if transport == 'unix':
+            return _UnixHTTPConnection(address, self.timeout)
+        return http.client.HTTPConnection(address, port, timeout=self.timeout)
+
+    def printer_uri(self, printer: str) -> str:
+        """IPP-URI eines Druckers"""
+        return f'ipp://localhost/printers/{printer}'
+
+    def _operation_attributes(self, extra: Optional[List[Tuple[int, str, object]]] = None) -> List:
+        attributes = [
+            (TAG_CHARSET, 'attributes-charset', 'utf-8'),
+            (TAG_LANGUAGE, 'attributes-natural-language', 'de'),
+        ]
+        return attributes + (extra or [])
+
+    def request(self, operation: int, path: str, groups: List, document: Optional[str] = None) -> List[Tuple[int, Dict[str, list]]]:
+        """
+        Sendet eine IPP-Anfrage und gibt die Attribut-Gruppen der Antwort zurück
+
+        Args:
+            operation: OP_* Konstante
+            path: HTTP-Pfad ('/', '/printers/<name>', '/jobs')
+            groups: [(Gruppen-Tag, [(Werte-Tag, Name, Wert(e))])]
+            document: Datei, die an die Anfrage angehängt wird (Print-Job)
+        """
+        request_id = next(self._request_ids)
+        message = encode_message(operation, request_id, groups)
+        headers = {'Content-Type': 'application/ipp'}
+
+        body = message
+        if document is not None:
+            headers['Content-Length'] = str(len(message) + os.path.getsize(document))
+            body = self._stream_document(message, document)
+
+        connection = self._connection()
+        try:
+            connection.request('POST', path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            raise IPPError(f'CUPS nicht erreichbar: {e}')
+        finally:
+            connection.close()
+
+        if response.status != 200:
+            raise IPPError(f'CUPS antwortet mit HTTP {response.status}', response.status)
+
+        status, _, response_groups, _ = decode_message(data)
+        if status >= 0x0400:
+            message = ''
+            for _, attributes in response_groups:
+                message = (attributes.get('status-message') or [''])[0] or message
+            raise IPPError(f'IPP-Fehler 0x{status:04x}: {message}'.rstrip(': '), status)
+        return response_groups
+
+    def _stream_document(self, message: bytes, document: str) -> Iterator[bytes]:
+        """Sendet IPP-Kopf und Datei blockweise (Datei wird nicht komplett geladen)"""
+        yield message
+        with open(document, 'rb') as f:
+            for block in iter(lambda: f.read(IPP_SEND_BLOCK_SIZE), b''):
+                yield block
+
+    def get_printers(self) -> List[Dict[str, str]]:
+        """Alle Drucker mit Status in einer Anfrage (statt lpstat -p + lpoptions pro Drucker)"""
+        groups = self.request(OP_CUPS_GET_PRINTERS, '/', [
+            (TAG_OPERATION, self._operation_attributes([
+                (TAG_KEYWORD, 'requested-attributes', [
+                    'printer-name', 'printer-state', 'printer-state-message',
+                    'printer-info', 'printer-make-and-model', 'printer-is-accepting-jobs'
+                ])
+            ]))
+        ])
+
+        printers = []
+        for group_tag, attributes in groups:
+            if group_tag != TAG_PRINTER or 'printer-name' not in attributes:
+                continue
+            state = (attributes.get('printer-state') or [None])[0]
+            printers.append({
+                'name': attributes['printer-name'][0],
+                'state': PRINTER_STATES.get(state, 'unknown'),
+                'state_message': (attributes.get('printer-state-message') or [''])[0] or '',
+                'info': (attributes.get('printer-info') or [''])[0] or '',
+                'make_and_model': (attributes.get('printer-make-and-model') or [''])[0] or '',
+                'accepting_jobs': bool((attributes.get('printer-is-accepting-jobs') or [True])[0])
+            })
+        return printers
+
+    def print_job(self, printer: str, document: str, job_name: str = 'Fotobox',
+                  options: Optional[Dict[str, object]] = None) -> int:
+        """
+        Sendet eine Datei als Druckauftrag (wie lp -d <printer> -o ...)
+
+        Args:
+            printer: CUPS-Druckername
+            document: Pfad zur Datei (JPEG)
+            job_name: Name des Auftrags
+            options: Job-Attribute (int = integer, sonst keyword/Text wie bei lp -o)
+
+        Returns:
+            CUPS Job-ID
+        """
+        job_attributes = []
+        for name, value in (options or {}).items():
+            if isinstance(value, bool):
+                job_attributes.append((TAG_BOOLEAN, name, value))
+            elif isinstance(value, int):
+                job_attributes.append((TAG_INTEGER, name, value))
+            else:
+                # Listen wie page-margins=0,0,0,0 als Text, einfache Werte als keyword
+                job_attributes.append((TAG_TEXT if ',' in str(value) else TAG_KEYWORD, name, value))
+
+        groups = [(TAG_OPERATION, self._operation_attributes([
+            (TAG_URI, 'printer-uri', self.printer_uri(printer)),
+            (TAG_NAME, 'requesting-user-name', self.user_name),
+            (TAG_NAME, 'job-name', job_name),
+            (TAG_MIME_TYPE, 'document-format', 'image/jpeg'),
+        ]))]
+        if job_attributes:
+            groups.append((TAG_JOB, job_attributes))
+
+        response = self.request(OP_PRINT_JOB, f'/printers/{printer}', groups, document=document)
+        for group_tag, attributes in response:
+            if group_tag == TAG_JOB and attributes.get('job-id'):
+                return attributes['job-id'][0]
+        raise IPPError('Keine Job-ID in der IPP-Antwort')
+
+    def get_jobs(self, printer: str, which: str = 'not-completed') -> List[Dict[str, object]]:
+        """Aufträge eines Druckers (wie lpstat -o <printer>)"""
+        groups = self.request(OP_GET_JOBS, '/', [
+            (TAG_OPERATION, self._operation_attributes([
+                (TAG_URI, 'printer-uri', self.printer_uri(printer)),
+                (TAG_NAME, 'requesting-user-name', self.user_name),
+                (TAG_KEYWORD, 'which-jobs', which),
+                (TAG_KEYWORD, 'requested-attributes', [
+                    'job-id', 'job-state', 'job-name', 'job-originating-user-name', 'job-k-octets'
+                ])
+            ]))
+        ])
+
+        jobs = []
+        for group_tag, attributes in groups:
+            if group_tag != TAG_JOB or 'job-id' not in attributes:
+                continue
+            state = (attributes.get('job-state') or [None])[0]
+            jobs.append({
+                'job_id': attributes['job-id'][0],
+                'state': JOB_STATES.get(state, 'unknown'),
+                'name': (attributes.get('job-name') or [''])[0] or '',
+                'owner': (attributes.get('job-originating-user-name') or [''])[0] or '',
+                'k_octets': (attributes.get('job-k-octets') or [0])[0] or 0
+            })
+        return jobs
+
+    def cancel_job(self, printer: str, job_id: int):
+        """Bricht einen Auftrag ab (wie cancel <printer>-<id>)"""
+        self.request(OP_CANCEL_JOB, f'/printers/{printer}', [
+            (TAG_OPERATION, self._operation_attributes([
+                (TAG_URI, 'printer-uri', self.printer_uri(printer)),
+                (TAG_INTEGER, 'job-id', job_id),
+                (TAG_NAME, 'requesting-user-name', self.user_name),
+            ]))
+        ])
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Fotobox IPP-Testserver (lokaler Ersatz für CUPS)
+Beantwortet CUPS-Get-Printers, Print-Job, Get-Jobs und Cancel-Job wie CUPS, damit
+Druck-Warteschlange und IPP-Client ohne Drucker getestet werden können
+
+Verwendung:
+    python ipp_dev_server.py --port 8631 --printers Fotodrucker --print-seconds 20
+    -> config.json: printing.ipp_server = "127.0.0.1:8631", printing.printer_name = "Fotodrucker"
+"""
+
+import argparse
+import itertools
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+from ipp_client import (
+    OP_CANCEL_JOB, OP_CUPS_GET_PRINTERS, OP_GET_JOBS, OP_PRINT_JOB,
+    TAG_CHARSET, TAG_ENUM, TAG_INTEGER, TAG_JOB, TAG_KEYWORD, TAG_LANGUAGE, TAG_NAME,
+    TAG_OPERATION, TAG_PRINTER, TAG_TEXT, TAG_URI, decode_message, encode_message
+)
+
+# IPP-Statuscodes
+STATUS_OK = 0x0000
+STATUS_BAD_REQUEST = 0x0400
+STATUS_NOT_FOUND = 0x0406
+STATUS_NOT_POSSIBLE = 0x0404
+STATUS_OPERATION_NOT_SUPPORTED = 0x0501
+
+class StandInPrinterSpooler:
+    """Simulierte CUPS-Warteschlange: Aufträge werden nacheinander in print_seconds 'gedruckt'"""
+
+    def __init__(self, printers: List[str], spool_dir: str, print_seconds: float):
+        self.printers = printers
+        self.spool_dir = spool_dir
+        self.print_seconds = print_seconds
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._jobs: Dict[int, Dict] = {}
+        self.stats = {'requests': 0, 'jobs': 0, 'bytes': 0}
+
+    def _refresh(self, now: float):
+        """Berechnet den Auftragsstatus (sequentieller Druck pro Drucker)"""
+        busy_until: Dict[str, float] = {}
+        for job in sorted(self._jobs.values(), key=lambda j: j['id']):
+            if job['state'] in (7, 9):
+                continue
+            start = max(job['created'], busy_until.get(job['printer'], 0.0))
+            finish = start + self.print_seconds * job['copies']
+            busy_until[job['printer']] = finish
+            job['state'] = 9 if now >= finish else 5 if now >= start else 3
+
+    def add_job(self, printer: str, name: str, user: str, copies: int, document: bytes) -> Dict:
+        with self._lock:
+            job_id = next(self._ids)
+            path = os.path.join(self.spool_dir, f'{printer}-{job_id}.jpg')
+            with open(path, 'wb') as f:
+                f.write(document)
+            job = {'id': job_id, 'printer': printer, 'name': name, 'user': user, 'copies': copies,
+                   'size': len(document), 'created': time.time(), 'state': 3}
+            self._jobs[job_id] = job
+            self.stats['jobs'] += 1
+            self.stats['bytes'] += len(document)
+            self._refresh(time.time())
+            return dict(job)
+
+    def list_jobs(self, printer: str, which: str) -> List[Dict]:
+        with self._lock:
+            self._refresh(time.time())
+            return [dict(job) for job in self._jobs.values()
+                    if job['printer'] == printer and ((job['state'] in (7, 9)) == (which == 'completed'))]
+
+    def cancel(self, job_id: int) -> bool:
+        with self._lock:
+            self._refresh(time.time())
+            job = self._jobs.get(job_id)
+            if job is None or job['state'] in (7, 9):
+                return False
+            job['state'] = 7
+            return True
+
+    def printer_state(self, printer: str) -> int:
+        with self._lock:
+            self._refresh(time.time())
+            busy = any(job['printer'] == printer and job['state'] == 5 for job in self._jobs.values())
+        return 4 if busy else 3
+
+def make_handler(spooler: StandInPrinterSpooler):
+    """Erzeugt den HTTP-Handler für den Spooler"""
+
+    class IPPHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            data = self.rfile.read(length)
+            spooler.stats['requests'] += 1
+
+            try:
+                operation, request_id, groups, document = decode_message(data)
+                attributes = {}
+                for _, group in groups:
+                    attributes.update(group)
+                status, response_groups = self.handle_operation(operation, attributes, document)
+            except Exception as e:
+                request_id = 0
+                status, response_groups = STATUS_BAD_REQUEST, [(TAG_OPERATION, [(TAG_TEXT, 'status-message', str(e))])]
+
+            operation_group = [
+                (TAG_CHARSET, 'attributes-charset', 'utf-8'),
+                (TAG_LANGUAGE, 'attributes-natural-language', 'de'),
+            ]
+            if response_groups and response_groups[0][0] == TAG_OPERATION:
+                operation_group += response_groups.pop(0)[1]
+            body = encode_message(status, request_id, [(TAG_OPERATION, operation_group)] + response_groups)
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/ipp')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def handle_operation(self, operation: int, attributes: Dict[str, list], document: bytes):
+            if operation == OP_CUPS_GET_PRINTERS:
+                return STATUS_OK, [
+                    (TAG_PRINTER, [
+                        (TAG_NAME, 'printer-name', name),
+                        (TAG_ENUM, 'printer-state', spooler.printer_state(name)),
+                        (TAG_TEXT, 'printer-state-message', ''),
+                        (TAG_TEXT, 'printer-info', f'{name} (Testserver)'),
+                        (TAG_TEXT, 'printer-make-and-model', 'Fotobox IPP-Testdrucker'),
+                    ])
+                    for name in spooler.printers
+                ]
+
+            printer = attributes.get('printer-uri', [''])[0].rstrip('/').rsplit('/', 1)[-1]
+            if printer not in spooler.printers:
+                return STATUS_NOT_FOUND, [(TAG_OPERATION, [(TAG_TEXT, 'status-message', 'The printer does not exist.')])]
+
+            if operation == OP_PRINT_JOB:
+                job = spooler.add_job(
+                    printer,
+                    attributes.get('job-name', ['Untitled'])[0],
+                    attributes.get('requesting-user-name', ['anonymous'])[0],
+                    attributes.get('copies', [1])[0],
+                    document
+                )
+                return STATUS_OK, [(TAG_JOB, [
+                    (TAG_INTEGER, 'job-id', job['id']),
+                    (TAG_URI, 'job-uri', f'ipp://localhost/jobs/{job["id"]}'),
+                    (TAG_ENUM, 'job-state', job['state']),
+                ])]
+
+            if operation == OP_GET_JOBS:
+                which = attributes.get('which-jobs', ['not-completed'])[0]
+                return STATUS_OK, [
+                    (TAG_JOB, [
+                        (TAG_INTEGER, 'job-id', job['id']),
+                        (TAG_ENUM, 'job-state', job['state']),
+                        (TAG_NAME, 'job-name', job['name']),
+                        (TAG_NAME, 'job-originating-user-name', job['user']),
+                        (TAG_INTEGER, 'job-k-octets', (job['size'] + 1023) // 1024),
+                    ])
+                    for job in spooler.list_jobs(printer, which)
+                ]
+
+            if operation == OP_CANCEL_JOB:
+                if spooler.cancel(attributes.get('job-id', [0])[0]):
+                    return STATUS_OK, []
+                return STATUS_NOT_POSSIBLE, [(TAG_OPERATION, [(TAG_TEXT, 'status-message', 'Job is already completed.')])]
+
+            return STATUS_OPERATION_NOT_SUPPORTED, [(TAG_OPERATION, [(TAG_KEYWORD, 'status-message', 'unsupported')])]
+
+    return IPPHandler
+
+def create_server(host: str, port: int, printers: List[str], spool_dir: str,
+                  print_seconds: float = 20.0) -> ThreadingHTTPServer:
+    """Erstellt den IPP-Testserver (server.spooler enthält Aufträge und Statistiken)"""
+    spooler = StandInPrinterSpooler(printers, spool_dir, print_seconds)
+    server = ThreadingHTTPServer((host, port), make_handler(spooler))
+    server.spooler = spooler
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description='Lokaler IPP-Testserver (CUPS-Ersatz)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8631)
+    parser.add_argument('--printers', default='Fotodrucker', help='Druckernamen, kommagetrennt')
+    parser.add_argument('--print-seconds', type=float, default=20.0, help='Simulierte Druckdauer pro Kopie')
+    parser.add_argument('--spool-dir', default=os.path.join(tempfile.gettempdir(), 'fotobox_ipp_spool'))
+    args = parser.parse_args()
+
+    os.makedirs(args.spool_dir, exist_ok=True)
+    printers = [name.strip() for name in args.printers.split(',') if name.strip()]
+    server = create_server(args.host, args.port, printers, args.spool_dir, args.print_seconds)
+
+    print(f"🖨️ IPP-Testserver: {args.host}:{args.port} ({', '.join(printers)})")
+    print(f"📁 Spool-Verzeichnis: {args.spool_dir}")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Fotobox Live-Stream
+MJPEG-Live-Ansicht (multipart/x-mixed-replace) mit einem einzigen Producer-Thread,
+der die Preview-Frames der Kamera an alle verbundenen Clients verteilt
+"""
+
+import io
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+STREAM_BOUNDARY = 'frame'
+
+# Ohne neues Frame (Kamera getrennt, Aufnahme läuft) wird spätestens nach dieser Zeit
+# das letzte Frame bzw. ein Platzhalter erneut gesendet - nur beim Schreiben bemerkt der
+# Server, dass ein Viewer die Verbindung getrennt hat
+STREAM_KEEPALIVE_INTERVAL = 5.0
+
+_placeholder_frame: Optional[bytes] = None
+
+def placeholder_frame() -> bytes:
+    """Graues JPEG als Platzhalter solange noch kein Kamera-Frame vorliegt"""
+    global _placeholder_frame
+    if _placeholder_frame is None:
+        from PIL import Image
+        buffer = io.BytesIO()
+        Image.new('RGB', (640, 426), (40, 40, 40)).save(buffer, 'JPEG', quality=70)
+        _placeholder_frame = buffer.getvalue()
+    return _placeholder_frame
+
+class LiveStreamBroadcaster:
+    """Verteilt Preview-Frames aus dem Speicher an beliebig viele Viewer"""
+
+    def __init__(self, frame_source: Callable[[], Optional[bytes]], config):
+        """
+        Args:
+            frame_source: Liefert ein JPEG-Frame als bytes (oder None)
+            config: App-Konfiguration (live_stream_fps)
+        """
+        self.frame_source = frame_source
+        self.config = config
+        self._condition = threading.Condition()
+        self._frame: Optional[bytes] = None
+        self._frame_id = 0
+        self._viewers = 0
+        self._producer: Optional[threading.Thread] = None
+
+    @property
+    def viewer_count(self) -> int:
+        """Anzahl verbundener Viewer"""
+        with self._condition:
+            return self._viewers
+
+    def _frame_interval(self) -> float:
+        """Mindestabstand zwischen zwei Frames (FPS-Begrenzung)"""
+        fps = max(1, self.config.live_stream_fps)
+        return 1.0 / fps
+
+    def _ensure_producer(self):
+        """Startet den Producer-Thread falls er nicht läuft (Aufruf mit gehaltenem Lock)"""
+        if self._producer is None or not self._producer.is_alive():
+            self._producer = threading.Thread(target=self._produce, name='live-stream', daemon=True)
+            self._producer.start()
+
+    def _produce(self):
+        """Holt Frames von der Kamera solange mindestens ein Viewer verbunden ist"""
+        print("📹 Live-Stream gestartet")
+        while True:
+            with self._condition:
+                if self._viewers == 0:
+                    self._producer = None
+                    self._frame = None
+                    break
+
+            started = time.monotonic()
+            try:
+                frame = self.frame_source()
+            except Exception as e:
+                print(f"⚠️ Live-Stream Frame-Fehler: {e}")
+                frame = None
+
+            if frame:
+                with self._condition:
+                    self._frame = frame
+                    self._frame_id += 1
+                    self._condition.notify_all()
+
+            elapsed = time.monotonic() - started
+            time.sleep(max(0.0, self._frame_interval() - elapsed))
+        print("📹 Live-Stream beendet (keine Viewer)")
+
+    def frames(self) -> Iterator[bytes]:
+        """
+        Generator für eine HTTP-Antwort mit multipart/x-mixed-replace
+
+        Jeder Viewer erhält immer das neueste Frame; langsame Clients
+        überspringen Frames statt eine Warteschlange aufzubauen.
+        """
+        with self._condition:
+            self._viewers += 1
+            self._ensure_producer()
+            last_id = 0
+            last_frame = None
+
+        try:
+            while True:
+                with self._condition:
+                    self._condition.wait_for(lambda: self._frame_id != last_id and self._frame,
+                                             timeout=STREAM_KEEPALIVE_INTERVAL)
+                    if self._frame_id != last_id and self._frame:
+                        frame = last_frame = self._frame
+                        last_id = self._frame_id
+                    else:
+                        # Keepalive: erkennt getrennte Viewer auch ohne neue Kamera-Frames
+                        frame = last_frame or placeholder_frame()
+
+                yield (
+                    f'--{STREAM_BOUNDARY}\r\n'
+                    f'Content-Type: image/jpeg\r\n'
+                    f'Content-Length: {len(frame)}\r\n\r\n'
+                ).encode('ascii') + frame + b'\r\n'
+        finally:
+            with self._condition:
+                self._viewers -= 1
@@ -7,7 +7,14 @@ Nur gphoto2 Python - beste Balance aus Einfachheit und Zuverlässigkeit
 import os
 import datetime
 import time
+import functools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from config import config_manager
+from photo_catalog import photo_catalog
+from camera_worker import (CameraWorker, PRIORITY_CAPTURE, PRIORITY_CONTROL,
+                           PRIORITY_PREVIEW, PRIORITY_STATUS)
 
 try:
     import gphoto2 as gp
@@ -17,6 +24,25 @@ except ImportError:
     GPHOTO2_AVAILABLE = False
     print("[FAIL] gphoto2 Python nicht verfügbar - Installation erforderlich")
 
+# Hintergrund-Prüfung des Kamera-Status
+STATUS_PROBE_INTERVAL = 10  # Sekunden zwischen Prüfungen bei verbundener Kamera
+RECONNECT_BACKOFF_MIN = 1   # Sekunden bis zum ersten Reconnect-Versuch
+RECONNECT_BACKOFF_MAX = 60  # Maximale Wartezeit zwischen Reconnect-Versuchen
+
+# Serienaufnahme (Burst)
+BURST_MAX_COUNT = 10        # Maximale Anzahl Fotos pro Serie
+BURST_MAX_INTERVAL = 10.0   # Maximaler Abstand zwischen zwei Aufnahmen (Sekunden)
+BURST_DOWNLOAD_ESTIMATE = 0.5  # Angenommene Download-Dauer pro Foto bis zur ersten Messung (Sekunden)
+
+def camera_command(priority, droppable=False):
+    """Führt die Methode im Kamera-Worker-Thread aus (serialisierter gphoto2-Zugriff)"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            return self.worker.call(priority, method, (self,) + args, kwargs, droppable=droppable)
+        return wrapper
+    return decorator
+
 class OptimalCameraManager:
     """Optimaler Kamera-Manager mit nur gphoto2 Python"""
     
@@ -24,6 +50,14 @@ class OptimalCameraManager:
         self.config = config_manager.config
         self.camera = None
         self.camera_detected = False
+        self.last_status_check = None
+        self.capture_hooks = []
+        self._reconnect_backoff = RECONNECT_BACKOFF_MIN
+        self._probe_wakeup = threading.Event()
+        self._download_seconds = BURST_DOWNLOAD_ESTIMATE  # Gleitender Mittelwert für Serienaufnahmen
+        
+        # Alle gphoto2-Zugriffe laufen über einen Thread (Aufnahme > Preview > Status)
+        self.worker = CameraWorker()
         
         if not GPHOTO2_AVAILABLE:
             print("[WARN] gphoto2 Python fehlt. Installation: pip install gphoto2")
@@ -31,7 +65,79 @@ class OptimalCameraManager:
             
         print("[CAM] Optimaler Camera Manager (gphoto2 Python)")
         self.check_camera()
+        
+        # Status wird im Hintergrund gepflegt - Status-Endpunkte lesen nur den Cache
+        self._prober = threading.Thread(target=self._status_probe_loop, name='camera-prober', daemon=True)
+        self._prober.start()
+    
+    def add_capture_hook(self, callback):
+        """
+        Registriert einen Callback, der nach jeder erfolgreichen Aufnahme
+        mit dem Foto-Pfad aufgerufen wird (muss sofort zurückkehren)
+        """
+        self.capture_hooks.append(callback)
+    
+    def _run_capture_hooks(self, filepath):
+        """Ruft die Capture-Hooks auf und gibt das letzte Ergebnis zurück"""
+        result = None
+        for callback in self.capture_hooks:
+            try:
+                result = callback(filepath)
+            except Exception as e:
+                print(f"⚠️ Capture-Hook Fehler: {e}")
+        return result
     
+    def get_status(self) -> dict:
+        """Gibt den zwischengespeicherten Kamera-Status zurück (ohne USB-Zugriff)"""
+        return {
+            'connected': self.camera_detected,
+            'available': GPHOTO2_AVAILABLE,
+            'last_check': self.last_status_check.isoformat() if self.last_status_check else None,
+            'reconnect_backoff': None if self.camera_detected else self._reconnect_backoff
+        }
+    
+    def is_connected(self) -> bool:
+        """Zwischengespeicherter Verbindungsstatus (ohne USB-Zugriff)"""
+        return self.camera_detected
+    
+    def request_status_probe(self):
+        """Weckt den Hintergrund-Prober für eine sofortige Prüfung"""
+        self._probe_wakeup.set()
+    
+    def _status_probe_loop(self):
+        """Hintergrund-Prüfung: leichter Hotplug-Check bei Verbindung, Reconnect mit exponentiellem Backoff"""
+        while True:
+            if self.camera_detected:
+                if self._probe_connected():
+                    wait = STATUS_PROBE_INTERVAL
+                else:
+                    print("⚠️ Kamera getrennt - starte Reconnect...")
+                    self.worker.call(PRIORITY_STATUS, self._reset_camera_connection, kwargs={'delay': 0})
+                    self._reconnect_backoff = RECONNECT_BACKOFF_MIN
+                    wait = 0
+            else:
+                if self.check_camera():
+                    self._reconnect_backoff = RECONNECT_BACKOFF_MIN
+                    wait = STATUS_PROBE_INTERVAL
+                else:
+                    wait = self._reconnect_backoff
+                    self._reconnect_backoff = min(self._reconnect_backoff * 2, RECONNECT_BACKOFF_MAX)
+            
+            self._probe_wakeup.wait(wait)
+            self._probe_wakeup.clear()
+    
+    @camera_command(PRIORITY_STATUS)
+    def _probe_connected(self) -> bool:
+        """Prüft per USB-Erkennung ob die Kamera noch angeschlossen ist (kein Re-Init)"""
+        try:
+            cameras = gp.Camera.autodetect()
+            connected = len(cameras) > 0
+        except Exception:
+            connected = False
+        self.last_status_check = datetime.datetime.now()
+        return connected
+    
+    @camera_command(PRIORITY_STATUS)
     def check_camera(self) -> bool:
         """Prüft und initialisiert Kamera-Verbindung"""
         if not GPHOTO2_AVAILABLE:
@@ -54,11 +160,13 @@ class OptimalCameraManager:
             # Test ob Kamera antwortet
             config = self.camera.get_config()
             self.camera_detected = True
+            self.last_status_check = datetime.datetime.now()
             print("[OK] Canon EOS Kamera verbunden (gphoto2 Python)")
             return True
             
         except gp.GPhoto2Error as e:
             self.camera_detected = False
+            self.last_status_check = datetime.datetime.now()
             if "not found" in str(e).lower():
                 print("⚠️ Keine Kamera gefunden")
             elif "busy" in str(e).lower():
@@ -70,10 +178,11 @@ class OptimalCameraManager:
             return False
         except Exception as e:
             self.camera_detected = False
+            self.last_status_check = datetime.datetime.now()
             print(f"❌ Unerwarteter Kamera-Fehler: {e}")
             return False
     
-    def _reset_camera_connection(self):
+    def _reset_camera_connection(self, delay=2):
         """Reset bei Kamera-Problemen"""
         try:
             if self.camera:
@@ -81,11 +190,13 @@ class OptimalCameraManager:
         except:
             pass
         self.camera = None
-        time.sleep(2)
+        self.camera_detected = False
+        time.sleep(delay)
     
+    @camera_command(PRIORITY_STATUS)
     def get_camera_info(self):
         """Gibt Kamera-Informationen zurück"""
-        if not self.check_camera():
+        if not self.camera_detected and not self.check_camera():
             return {
                 'connected': False, 
                 'model': None, 
@@ -113,6 +224,7 @@ class OptimalCameraManager:
                 'error': str(e)
             }
     
+    @camera_command(PRIORITY_CONTROL)
     def start_live_preview(self):
         """Startet Live-Vorschau der Kamera (Canon EOS optimiert)"""
         if not GPHOTO2_AVAILABLE:
@@ -175,6 +287,16 @@ class OptimalCameraManager:
                     print(f"   ❌ Auch direkte Preview fehlgeschlagen: {e}")
             
             if success:
+                # Mirror Lock-Up einmalig für bessere Preview-Qualität (nicht pro Frame)
+                try:
+                    config = self.camera.get_config()
+                    mirror_lockup = config.get_child_by_name('mirrorlockup')
+                    if mirror_lockup:
+                        mirror_lockup.set_value(1)
+                        self.camera.set_config(config)
+                except Exception:
+                    pass  # Mirror Lock-Up nicht verfügbar
+                
                 return {
                     'success': True,
                     'message': 'Live-Vorschau aktiviert'
@@ -192,6 +314,7 @@ class OptimalCameraManager:
                 'message': f'Live-Vorschau nicht möglich: {e}'
             }
     
+    @camera_command(PRIORITY_CONTROL)
     def stop_live_preview(self):
         """Stoppt Live-Vorschau der Kamera (Canon EOS optimiert)"""
         if not GPHOTO2_AVAILABLE or not self.camera_detected:
@@ -245,87 +368,72 @@ class OptimalCameraManager:
             print(f"⚠️ Fehler beim Stoppen der Live-Vorschau: {e}")
     
     def capture_preview_image(self):
-        """Erfasst ein Preview-Bild für Live-Ansicht (Canon EOS optimiert)"""
+        """Erfasst ein Preview-Bild für Live-Ansicht und speichert es als Datei (Kompatibilität)"""
+        frame = self.get_preview_frame()
+        if not frame:
+            return None
+        
+        try:
+            os.makedirs(self.config.photo_dir, exist_ok=True)
+            preview_path = os.path.join(self.config.photo_dir, 'live_preview.jpg')
+            with open(preview_path, 'wb') as f:
+                f.write(frame)
+            return preview_path
+        except Exception as e:
+            print(f"❌ Preview-Datei Fehler: {e}")
+            return None
+    
+    @camera_command(PRIORITY_PREVIEW, droppable=True)
+    def get_preview_frame(self):
+        """
+        Erfasst ein Preview-Bild direkt in den Speicher (Canon EOS optimiert)
+        
+        Wird vom Live-Stream mit hoher Frequenz aufgerufen - keine Datei,
+        keine Konfigurationsänderung pro Frame.
+        
+        Returns:
+            JPEG-Daten als bytes oder None
+        """
         if not GPHOTO2_AVAILABLE:
-            # Demo-Modus: Erstelle ein Platzhalter-Preview-Bild
-            return self._create_demo_preview_image()
+            # Demo-Modus: Platzhalter-Preview-Bild
+            return self._render_demo_preview()
         
         if not self.camera_detected:
             return None
         
-        try:
-            print("📸 Erfasse Preview-Bild...")
-            
-            # Schritt 1: Kamera bereit machen für Preview
-            # Bei Canon EOS muss manchmal erst der Mirror aufgeklappt werden
+        max_retries = 3
+        for attempt in range(max_retries):
             try:
-                # Versuche Mirror Lock-Up für bessere Preview-Qualität
-                config = self.camera.get_config()
-                mirror_lockup = config.get_child_by_name('mirrorlockup')
-                if mirror_lockup:
-                    mirror_lockup.set_value(1)
-                    self.camera.set_config(config)
-                    time.sleep(0.5)  # Kurz warten
-            except:
-                pass  # Mirror Lock-Up nicht verfügbar
-            
-            # Schritt 2: Preview-Bild aufnehmen mit Retry-Logik
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    print(f"   🔄 Versuch {attempt + 1}/{max_retries}...")
-                    
-                    # Preview aufnehmen
-                    camera_file = self.camera.capture_preview()
-                    if not camera_file:
-                        raise Exception("Kein Preview-Bild erhalten")
-                    
-                    # Daten extrahieren
-                    file_data = camera_file.get_data_and_size()
-                    if not file_data or len(file_data) < 1000:  # Mindestgröße prüfen
-                        raise Exception(f"Preview-Daten zu klein: {len(file_data) if file_data else 0} bytes")
-                    
-                    # Als temporäre Datei speichern
-                    os.makedirs(self.config.photo_dir, exist_ok=True)
-                    preview_path = os.path.join(self.config.photo_dir, 'live_preview.jpg')
-                    
-                    with open(preview_path, 'wb') as f:
-                        f.write(file_data)
-                    
-                    # Datei-Validierung
-                    if os.path.exists(preview_path) and os.path.getsize(preview_path) > 1000:
-                        print(f"   ✅ Preview-Bild gespeichert: {preview_path} ({len(file_data)} bytes)")
-                        return preview_path
-                    else:
-                        raise Exception("Gespeicherte Preview-Datei ungültig")
-                        
-                except gp.GPhoto2Error as e:
-                    error_msg = str(e).lower()
-                    if 'busy' in error_msg or 'device' in error_msg:
-                        print(f"   ⚠️ Kamera beschäftigt (Versuch {attempt + 1}) - warte...")
-                        time.sleep(1)
-                        continue
-                    else:
-                        print(f"   ❌ gPhoto2 Fehler: {e}")
-                        break
-                except Exception as e:
-                    print(f"   ⚠️ Versuch {attempt + 1} fehlgeschlagen: {e}")
-                    if attempt < max_retries - 1:
-                        time.sleep(0.5)
-                        continue
-                    else:
-                        break
-            
-            # Fallback zu Demo-Bild
-            print("   🎬 Fallback zu Demo-Preview...")
-            return self._create_demo_preview_image()
-            
-        except Exception as e:
-            print(f"❌ Preview-Aufnahme Fehler: {e}")
-            return self._create_demo_preview_image()
+                camera_file = self.camera.capture_preview()
+                if not camera_file:
+                    raise Exception("Kein Preview-Bild erhalten")
+                
+                file_data = camera_file.get_data_and_size()
+                if not file_data or len(file_data) < 1000:  # Mindestgröße prüfen
+                    raise Exception(f"Preview-Daten zu klein: {len(file_data) if file_data else 0} bytes")
+                
+                return bytes(file_data)
+                
+            except gp.GPhoto2Error as e:
+                error_msg = str(e).lower()
+                if 'busy' in error_msg or 'device' in error_msg:
+                    print(f"   ⚠️ Kamera beschäftigt (Preview-Versuch {attempt + 1}) - warte...")
+                    time.sleep(0.2)
+                    continue
+                print(f"   ❌ gPhoto2 Preview-Fehler: {e}")
+                break
+            except Exception as e:
+                print(f"   ⚠️ Preview-Versuch {attempt + 1} fehlgeschlagen: {e}")
+                if attempt < max_retries - 1:
+                    time.sleep(0.1)
+                    continue
+                break
+        
+        # Fallback zu Demo-Bild
+        return self._render_demo_preview()
     
-    def _create_demo_preview_image(self):
-        """Erstellt ein Demo-Preview-Bild für Test/Demo-Zwecke"""
+    def _render_demo_preview(self):
+        """Rendert ein Demo-Preview-Bild für Test/Demo-Zwecke als JPEG-Daten"""
         try:
             from PIL import Image, ImageDraw, ImageFont
             import io
@@ -369,16 +477,26 @@ class OptimalCameraManager:
             draw.text((320, 350), "Demo-Modus aktiv", font=font_medium, anchor="mm", fill='#E74C3C')
             draw.text((320, 380), "Installieren Sie gphoto2 für echte Kamera", font=font_small, anchor="mm", fill='#95A5A6')
             
-            # Speichere als Preview-Datei
-            preview_path = os.path.join(self.config.photo_dir, 'live_preview.jpg')
-            img.save(preview_path, 'JPEG', quality=85)
-            
-            return preview_path
+            buffer = io.BytesIO()
+            img.save(buffer, 'JPEG', quality=85)
+            return buffer.getvalue()
             
         except Exception as e:
             print(f"❌ Demo-Preview Fehler: {e}")
             return None
+    
+    def _create_demo_preview_image(self):
+        """Erstellt ein Demo-Preview-Bild als Datei"""
+        frame = self._render_demo_preview()
+        if not frame:
+            return None
+        
+        preview_path = os.path.join(self.config.photo_dir, 'live_preview.jpg')
+        with open(preview_path, 'wb') as f:
+            f.write(frame)
+        return preview_path
 
+    @camera_command(PRIORITY_CAPTURE)
     def take_photo(self, filename=None, **kwargs):
         """Nimmt ein Foto auf mit gphoto2 Python"""
         if not GPHOTO2_AVAILABLE:
@@ -438,23 +556,11 @@ class OptimalCameraManager:
                     file_size = os.path.getsize(filepath)
                     print(f"✅ Foto erfolgreich: {filename} ({file_size} Bytes)")
                     
-                    # Auto-Upload wenn aktiviert
-                    upload_result = None
-                    if self.config.upload.enabled and self.config.upload.auto_upload:
-                        print("☁️ Auto-Upload aktiviert - lade Foto hoch...")
-                        try:
-                            # Import hier um zirkuläre Abhängigkeiten zu vermeiden
-                            from upload_manager import UploadManager
-                            upload_manager = UploadManager(self.config)
-                            upload_result = upload_manager.upload_photo(filepath)
-                            
-                            if upload_result['success']:
-                                print(f"✅ Auto-Upload erfolgreich: {upload_result['message']}")
-                            else:
-                                print(f"❌ Auto-Upload fehlgeschlagen: {upload_result['message']}")
-                        except Exception as e:
-                            print(f"❌ Auto-Upload Fehler: {str(e)}")
-                            upload_result = {'success': False, 'message': str(e)}
+                    # Im Foto-Katalog eintragen (Galerie/Startseite ohne Verzeichnis-Scan)
+                    photo_catalog.add_photo(filepath)
+                    
+                    # Nachbearbeitung (Vorschau, Overlay, Druck, Upload) asynchron anstoßen
+                    pipeline_job = self._run_capture_hooks(filepath)
                     
                     return {
                         'success': True,
@@ -464,7 +570,7 @@ class OptimalCameraManager:
                         'attempts': attempt,
                         'api': 'gphoto2_python',
                         'filesize': file_size,
-                        'upload_result': upload_result
+                        'pipeline': pipeline_job
                     }
                 else:
                     raise Exception("Foto-Datei nicht korrekt gespeichert")
@@ -478,8 +584,7 @@ class OptimalCameraManager:
                 # Spezielle Fehlerbehandlung
                 if "busy" in error_msg or error_code == -110:
                     print("⚠️ Kamera busy - Reset Verbindung...")
-                    self._reset_camera_connection()
-                    time.sleep(2)
+                    self._reset_camera_connection()  # wartet bereits 2s
                 elif "not found" in error_msg:
                     print("⚠️ Kamera getrennt - versuche Reconnect...")
                     self._reset_camera_connection()
@@ -514,6 +619,163 @@ class OptimalCameraManager:
             'message': f'Foto-Aufnahme nach {max_attempts} Versuchen fehlgeschlagen'
         }
     
+    @camera_command(PRIORITY_CAPTURE)
+    def take_burst(self, count=None, interval=None):
+        """
+        Serienaufnahme: mehrere Fotos im festen Abstand (z.B. für Fotostreifen und GIFs)
+        
+        Die Kamera wird nur aus dem Worker-Thread angesprochen: Während der Pause zwischen zwei
+        Aufnahmen werden bereits aufgenommene Fotos heruntergeladen (solange die Pause reicht),
+        den Rest der Pause wartet wait_for_event auf Kamera-Ereignisse. Speichern, Katalog und
+        Nachbearbeitung laufen parallel in einem Schreib-Thread.
+        
+        Args:
+            count: Anzahl Fotos (optional, verwendet Konfiguration)
+            interval: Abstand zwischen den Aufnahmen in Sekunden (optional, verwendet Konfiguration)
+            
+        Returns:
+            Dictionary mit Ergebnis und allen Dateinamen
+        """
+        count = int(self.config.burst_count if count is None else count)
+        if count < 1:
+            return {
+                'success': False,
+                'message': 'Anzahl Fotos muss mindestens 1 sein'
+            }
+        
+        if not GPHOTO2_AVAILABLE:
+            return {
+                'success': False,
+                'message': 'gphoto2 Python nicht installiert. Führe aus: pip install gphoto2'
+            }
+        
+        count = min(count, BURST_MAX_COUNT)
+        interval = max(0.0, min(float(self.config.burst_interval if interval is None else interval),
+                                BURST_MAX_INTERVAL))
+        
+        if not self.camera_detected and not self.check_camera():
+            return {
+                'success': False,
+                'message': 'Keine Kamera gefunden'
+            }
+        
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        filenames = [f"photo_{timestamp}_{index + 1:02d}.jpg" for index in range(count)]
+        started = time.monotonic()
+        print(f"📸 Serienaufnahme: {count} Fotos, Abstand {interval:.1f}s")
+        
+        pending = deque()  # Aufgenommen, noch auf der Kamera: (Index, Kamera-Pfad)
+        stored = []        # Futures des Schreib-Threads (in Aufnahme-Reihenfolge)
+        error = None
+        writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='burst-writer')
+        
+        try:
+            next_shot = started
+            for index in range(count):
+                try:
+                    # Pause bis zur nächsten Aufnahme für Downloads nutzen
+                    while pending and next_shot - time.monotonic() >= self._download_seconds:
+                        stored.append(self._download_burst_frame(writer, *pending.popleft(), filenames))
+                    self._wait_for_camera_events(next_shot - time.monotonic())
+                    
+                    print(f"📷 Löse Kamera aus ({index + 1}/{count})...")
+                    file_path = self.camera.capture(gp.GP_CAPTURE_IMAGE)
+                except gp.GPhoto2Error as e:
+                    error = e
+                    print(f"❌ gphoto2 Fehler bei Serienfoto {index + 1}: {e}")
+                    break
+                pending.append((index, file_path))
+                next_shot = time.monotonic() + interval
+            
+            capture_seconds = time.monotonic() - started
+            
+            # Restliche Fotos nach der Serie herunterladen
+            while pending:
+                try:
+                    stored.append(self._download_burst_frame(writer, *pending.popleft(), filenames))
+                except gp.GPhoto2Error as e:
+                    error = error or e
+                    print(f"❌ Download fehlgeschlagen: {e}")
+        finally:
+            writer.shutdown(wait=True)
+        
+        results = []
+        for future in stored:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"❌ Serienfoto konnte nicht gespeichert werden: {e}")
+        
+        if error is not None and ("busy" in str(error).lower() or "not found" in str(error).lower()):
+            self._reset_camera_connection()
+        
+        if not results:
+            return {
+                'success': False,
+                'message': f'Serienaufnahme fehlgeschlagen: {error}' if error else 'Serienaufnahme fehlgeschlagen'
+            }
+        
+        duration = time.monotonic() - started
+        print(f"✅ Serienaufnahme: {len(results)}/{count} Fotos in {duration:.1f}s")
+        return {
+            'success': True,
+            'filenames': [result['filename'] for result in results],
+            'message': f'{len(results)} von {count} Fotos aufgenommen' if len(results) < count
+                       else f'{count} Fotos aufgenommen!',
+            'count': len(results),
+            'requested': count,
+            'interval': interval,
+            'capture_seconds': round(capture_seconds, 2),
+            'duration': round(duration, 2),
+            'api': 'gphoto2_python',
+            'pipeline': [result['pipeline'] for result in results]
+        }
+    
+    def _download_burst_frame(self, writer, index, file_path, filenames):
+        """Lädt ein Serienfoto von der Kamera und übergibt es dem Schreib-Thread"""
+        started = time.monotonic()
+        camera_file = self.camera.file_get(file_path.folder, file_path.name, gp.GP_FILE_TYPE_NORMAL)
+        data = bytes(camera_file.get_data_and_size())
+        
+        try:
+            self.camera.file_delete(file_path.folder, file_path.name)
+        except gp.GPhoto2Error:
+            pass  # Nicht kritisch wenn Löschen fehlschlägt
+        
+        self._download_seconds = 0.7 * self._download_seconds + 0.3 * (time.monotonic() - started)
+        filepath = os.path.join(self.config.photo_dir, filenames[index])
+        return writer.submit(self._store_burst_frame, data, filepath)
+    
+    def _store_burst_frame(self, data, filepath):
+        """Speichert ein Serienfoto (Schreib-Thread) und stößt die Nachbearbeitung an"""
+        if len(data) <= 1000:
+            raise Exception(f"Foto-Datei unvollständig ({len(data)} Bytes)")
+        
+        temp_path = f"{filepath}.part"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, filepath)
+        print(f"💾 Serienfoto gespeichert: {filepath}")
+        
+        photo_catalog.add_photo(filepath)
+        return {
+            'filename': os.path.basename(filepath),
+            'pipeline': self._run_capture_hooks(filepath)
+        }
+    
+    def _wait_for_camera_events(self, timeout):
+        """Wartet per wait_for_event und leert dabei die Ereignis-Warteschlange der Kamera"""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                self.camera.wait_for_event(max(1, int(remaining * 1000)))
+            except gp.GPhoto2Error:
+                time.sleep(max(0.0, deadline - time.monotonic()))
+                return
+    
     def cleanup(self):
         """Ressourcen aufräumen"""
         try:
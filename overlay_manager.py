@@ -5,16 +5,32 @@ Verwaltet Logos, Text-Overlays und Rahmen für Fotos
 """
 
 import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
 from PIL import Image, ImageDraw, ImageFont, ImageEnhance
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import datetime
 
+# Anzahl gecachter Zielgrößen (Hoch-/Querformat); ein 24-MP-Rahmen belegt ~96 MB
+OVERLAY_CACHE_SIZE = 2
+
+# Breite des Border-Rahmens in Pixel
+FRAME_BORDER_WIDTH = 20
+
+# Kachelgröße der vorgerenderten Overlay-Ebene (nur nicht-transparente Kacheln werden gehalten)
+OVERLAY_TILE_SIZE = 256
+
 class OverlayManager:
     """Manager für Foto-Overlays"""
     
     def __init__(self, config):
         self.config = config
         self.overlay_config = config.overlay
+        self._lock = threading.Lock()
+        self._layer_cache: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self._fonts: Dict[int, ImageFont.FreeTypeFont] = {}
+        self.image_workers = None  # ImageWorkerPool: Rendering in Worker-Prozessen (optional)
         
     def apply_overlays(self, image_path: str, output_path: Optional[str] = None) -> str:
         """
@@ -30,31 +46,28 @@ class OverlayManager:
         if not os.path.exists(image_path):
             raise FileNotFoundError(f"Foto nicht gefunden: {image_path}")
         
-        # Lade Originalbild
+        if self.image_workers is not None:
+            return self.image_workers.apply_overlays(image_path, output_path)
+        
+        # Lade Originalbild (bleibt RGB - keine RGBA-Kopien in voller Größe)
         with Image.open(image_path) as img:
-            # Konvertiere zu RGBA für Transparenz-Support
-            if img.mode != 'RGBA':
-                img = img.convert('RGBA')
+            result = img if img.mode == 'RGB' else img.convert('RGB')
             
-            # Erstelle Arbeits-Kopie
-            result = img.copy()
+            # Vorgerenderte Overlay-Ebene für diese Bildgröße (Rahmen + Logo, in Kacheln)
+            layers = self._get_layers(result.size)
             
-            # Wende Overlays an (Reihenfolge wichtig!)
-            if self.overlay_config.frame_enabled:
-                result = self._apply_frame(result)
+            # Border-Rahmen: Foto auf größere weiße Fläche setzen
+            if layers['canvas_size'] != result.size:
+                canvas = Image.new('RGB', layers['canvas_size'], (255, 255, 255))
+                canvas.paste(result, (FRAME_BORDER_WIDTH, FRAME_BORDER_WIDTH))
+                result = canvas
             
-            if self.overlay_config.logo_path and self.overlay_config.enabled:
-                result = self._apply_logo(result)
-                
-            if self.overlay_config.text_enabled and self.overlay_config.text_content:
-                result = self._apply_text(result)
+            # Einmal compositen - nur in den Bereichen, die das Overlay tatsächlich abdeckt
+            for position, tile, mask in layers['regions']:
+                result.paste(tile, position, mask)
             
-            # Konvertiere zurück zu RGB für JPEG-Export
-            if result.mode == 'RGBA':
-                # Erstelle weißen Hintergrund
-                background = Image.new('RGB', result.size, (255, 255, 255))
-                background.paste(result, mask=result.split()[-1])  # Alpha-Kanal als Maske
-                result = background
+            if self.overlay_config.text_enabled and self.overlay_config.text_content:
+                result = self._apply_text(result, layers['font'])
             
             # Speichere Ergebnis
             if output_path is None:
@@ -67,19 +80,110 @@ class OverlayManager:
             result.save(output_path, 'JPEG', quality=95)
             return output_path
     
-    def _apply_logo(self, image: Image.Image) -> Image.Image:
-        """Fügt Logo-Overlay hinzu"""
+    def _get_layers(self, image_size: Tuple[int, int]) -> Dict:
+        """
+        Gibt die vorbereiteten Overlay-Ebenen für eine Bildgröße zurück
+        
+        Schlüssel aus Overlay-Konfiguration, Änderungsstand von Logo/Rahmen und
+        Bildgröße - ändert sich eines davon, werden die Ebenen neu erzeugt.
+        """
+        key = (
+            tuple(sorted(asdict(self.overlay_config).items())),
+            self._file_signature(self.overlay_config.logo_path),
+            self._file_signature(self.overlay_config.frame_path),
+            tuple(image_size)
+        )
+        
+        with self._lock:
+            layers = self._layer_cache.get(key)
+            if layers is not None:
+                self._layer_cache.move_to_end(key)
+                return layers
+            
+            layers = self._compile_layers(image_size)
+            self._layer_cache[key] = layers
+            while len(self._layer_cache) > OVERLAY_CACHE_SIZE:
+                self._layer_cache.popitem(last=False)
+            return layers
+    
+    def _file_signature(self, path: str) -> Tuple:
+        """Pfad, mtime und Größe einer Overlay-Datei (None falls nicht vorhanden)"""
+        try:
+            stat = os.stat(path)
+            return (path, stat.st_mtime_ns, stat.st_size)
+        except (OSError, TypeError):
+            return (path, None, None)
+    
+    def clear_cache(self):
+        """Verwirft alle vorbereiteten Ebenen"""
+        with self._lock:
+            self._layer_cache.clear()
+    
+    def _compile_layers(self, image_size: Tuple[int, int]) -> Dict:
+        """
+        Rendert Rahmen und Logo einmalig zu einer RGBA-Ebene für eine Bildgröße
+        
+        Die Ebene wird in Kacheln zerlegt; vollständig transparente Kacheln werden
+        verworfen, vollständig deckende ohne Maske gespeichert.
+        """
+        canvas_size = tuple(image_size)
+        frame = self._compile_frame(canvas_size) if self.overlay_config.frame_enabled else None
+        if frame is not None and self.overlay_config.frame_type != "full-overlay":
+            canvas_size = frame.size
+        
+        logo = None
+        if self.overlay_config.logo_path and self.overlay_config.enabled:
+            logo = self._compile_logo()
+        
+        regions = []
+        if frame is not None or logo is not None:
+            overlay = frame.convert('RGBA') if frame is not None else Image.new('RGBA', canvas_size, (0, 0, 0, 0))
+            
+            if logo is not None:
+                x, y = self._calculate_position(canvas_size, logo.size, self.overlay_config.logo_position)
+                overlay.alpha_composite(logo, dest=(max(x, 0), max(y, 0)), source=(max(-x, 0), max(-y, 0)))
+            
+            regions = self._split_into_tiles(overlay)
+        
+        return {
+            'canvas_size': canvas_size,
+            'regions': regions,
+            'font': self._load_font(self.overlay_config.text_font_size) if self.overlay_config.text_enabled else None
+        }
+    
+    def _split_into_tiles(self, overlay: Image.Image) -> List[Tuple[Tuple[int, int], Image.Image, Optional[Image.Image]]]:
+        """Zerlegt die Overlay-Ebene in (Position, Kachel, Maske) ohne transparente Bereiche"""
+        alpha = overlay.getchannel('A')
+        width, height = overlay.size
+        tiles = []
+        
+        for top in range(0, height, OVERLAY_TILE_SIZE):
+            for left in range(0, width, OVERLAY_TILE_SIZE):
+                box = (left, top, min(left + OVERLAY_TILE_SIZE, width), min(top + OVERLAY_TILE_SIZE, height))
+                low, high = alpha.crop(box).getextrema()
+                if high == 0:
+                    continue
+                
+                tile = overlay.crop(box)
+                if low == 255:
+                    tiles.append(((left, top), tile.convert('RGB'), None))
+                else:
+                    tiles.append(((left, top), tile, tile))
+        
+        return tiles
+    
+    def _compile_logo(self) -> Optional[Image.Image]:
+        """Lädt Logo, skaliert es und wendet die Deckkraft an"""
         logo_path = self.overlay_config.logo_path
         
         if not os.path.exists(logo_path):
             print(f"⚠️ Logo nicht gefunden: {logo_path}")
-            return image
+            return None
         
         try:
             with Image.open(logo_path) as logo:
                 # Konvertiere Logo zu RGBA
-                if logo.mode != 'RGBA':
-                    logo = logo.convert('RGBA')
+                logo = logo.convert('RGBA')
                 
                 # Skaliere Logo auf gewünschte Größe
                 logo_size = self.overlay_config.logo_size
@@ -92,32 +196,42 @@ class OverlayManager:
                     alpha = enhancer.enhance(self.overlay_config.logo_opacity)
                     logo.putalpha(alpha)
                 
-                # Berechne Position
-                position = self._calculate_position(
-                    image.size, 
-                    logo.size, 
-                    self.overlay_config.logo_position
-                )
+                return logo
                 
-                # Füge Logo hinzu
-                if logo.mode == 'RGBA':
-                    image.paste(logo, position, logo)
+        except Exception as e:
+            print(f"❌ Fehler beim Laden des Logos: {e}")
+            return None
+    
+    def _compile_frame(self, image_size: Tuple[int, int]) -> Optional[Image.Image]:
+        """Lädt Rahmen und skaliert ihn auf die Zielgröße"""
+        frame_path = self.overlay_config.frame_path
+        
+        if not os.path.exists(frame_path):
+            print(f"⚠️ Rahmen nicht gefunden: {frame_path}")
+            return None
+        
+        try:
+            with Image.open(frame_path) as frame:
+                if self.overlay_config.frame_type == "full-overlay":
+                    # Rahmen über das ganze Bild
+                    target_size = image_size
                 else:
-                    image.paste(logo, position)
+                    # Border-Rahmen (um das Bild herum)
+                    target_size = (
+                        image_size[0] + 2 * FRAME_BORDER_WIDTH,
+                        image_size[1] + 2 * FRAME_BORDER_WIDTH
+                    )
+                return frame.resize(target_size, Image.Resampling.LANCZOS)
                 
         except Exception as e:
-            print(f"❌ Fehler beim Anwenden des Logos: {e}")
-        
-        return image
+            print(f"❌ Fehler beim Laden des Rahmens: {e}")
+            return None
     
-    def _apply_text(self, image: Image.Image) -> Image.Image:
-        """Fügt Text-Overlay hinzu"""
+    def _apply_text(self, image: Image.Image, font: Optional[ImageFont.FreeTypeFont] = None) -> Image.Image:
+        """Fügt Text-Overlay hinzu (als kleine RGBA-Ebene nur im Textbereich)"""
         try:
-            # Erstelle Drawing-Context
-            draw = ImageDraw.Draw(image)
-            
-            # Lade Schriftart
-            font = self._load_font(self.overlay_config.text_font_size)
+            # Schriftart (aus dem Ebenen-Cache)
+            font = font or self._load_font(self.overlay_config.text_font_size)
             
             text = self.overlay_config.text_content
             
@@ -125,7 +239,7 @@ class OverlayManager:
             text = self._replace_text_placeholders(text)
             
             # Berechne Text-Größe
-            bbox = draw.textbbox((0, 0), text, font=font)
+            bbox = ImageDraw.Draw(Image.new('L', (1, 1))).textbbox((0, 0), text, font=font)
             text_width = bbox[2] - bbox[0]
             text_height = bbox[3] - bbox[1]
             
@@ -136,63 +250,24 @@ class OverlayManager:
                 self.overlay_config.text_position
             )
             
+            shadow_offset = max(2, self.overlay_config.text_font_size // 20) if self.overlay_config.text_shadow else 0
+            layer = Image.new('RGBA', (max(bbox[2], 1) + shadow_offset, max(bbox[3], 1) + shadow_offset), (0, 0, 0, 0))
+            draw = ImageDraw.Draw(layer)
+            
             # Zeichne Schatten (falls aktiviert)
-            if self.overlay_config.text_shadow:
-                shadow_offset = max(2, self.overlay_config.text_font_size // 20)
-                shadow_pos = (position[0] + shadow_offset, position[1] + shadow_offset)
-                draw.text(shadow_pos, text, font=font, fill=(0, 0, 0, 128))
+            if shadow_offset:
+                draw.text((shadow_offset, shadow_offset), text, font=font, fill=(0, 0, 0, 128))
             
             # Zeichne Text
-            draw.text(position, text, font=font, fill=self.overlay_config.text_color)
+            draw.text((0, 0), text, font=font, fill=self.overlay_config.text_color)
+            
+            image.paste(layer, position, layer)
             
         except Exception as e:
             print(f"❌ Fehler beim Anwenden des Textes: {e}")
         
         return image
     
-    def _apply_frame(self, image: Image.Image) -> Image.Image:
-        """Fügt Rahmen-Overlay hinzu"""
-        frame_path = self.overlay_config.frame_path
-        
-        if not os.path.exists(frame_path):
-            print(f"⚠️ Rahmen nicht gefunden: {frame_path}")
-            return image
-        
-        try:
-            with Image.open(frame_path) as frame:
-                if self.overlay_config.frame_type == "full-overlay":
-                    # Rahmen über das ganze Bild
-                    frame = frame.resize(image.size, Image.Resampling.LANCZOS)
-                    if frame.mode == 'RGBA':
-                        image.paste(frame, (0, 0), frame)
-                    else:
-                        image.paste(frame, (0, 0))
-                else:
-                    # Border-Rahmen (um das Bild herum)
-                    border_width = 20
-                    new_size = (
-                        image.size[0] + 2 * border_width,
-                        image.size[1] + 2 * border_width
-                    )
-                    
-                    # Erstelle neues Bild mit Rahmen
-                    framed = Image.new('RGB', new_size, (255, 255, 255))
-                    framed.paste(image, (border_width, border_width))
-                    
-                    # Skaliere Rahmen-Textur
-                    frame = frame.resize(new_size, Image.Resampling.LANCZOS)
-                    if frame.mode == 'RGBA':
-                        framed.paste(frame, (0, 0), frame)
-                    else:
-                        framed.paste(frame, (0, 0))
-                    
-                    image = framed
-                    
-        except Exception as e:
-            print(f"❌ Fehler beim Anwenden des Rahmens: {e}")
-        
-        return image
-    
     def _calculate_position(self, image_size: Tuple[int, int], 
                           overlay_size: Tuple[int, int], 
                           position: str) -> Tuple[int, int]:
@@ -217,7 +292,15 @@ class OverlayManager:
         return positions.get(position, positions['bottom-right'])
     
     def _load_font(self, size: int) -> ImageFont.FreeTypeFont:
-        """Lädt Schriftart"""
+        """Lädt Schriftart (einmal pro Größe, danach aus dem Cache)"""
+        font = self._fonts.get(size)
+        if font is None:
+            font = self._find_font(size)
+            self._fonts[size] = font
+        return font
+    
+    def _find_font(self, size: int) -> ImageFont.FreeTypeFont:
+        """Sucht die erste verfügbare Schriftart"""
         font_paths = [
             # Windows
             "C:/Windows/Fonts/arial.ttf",
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Fotobox Foto-Katalog
+Persistenter SQLite-Index aller Fotos im photo_dir statt Verzeichnis-Scan pro Request
+"""
+
+import os
+import sqlite3
+import threading
+import datetime
+from typing import Dict, List, Optional, Tuple
+from config import config_manager
+
+PHOTO_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+CATALOG_FILENAME = '.photo_catalog.sqlite'
+
+# Dateien im photo_dir, die keine Fotos sind
+EXCLUDED_FILES = {'live_preview.jpg'}
+
+class PhotoCatalog:
+    """Indexierter Foto-Katalog (neueste zuerst, Anzahl, Seiten)"""
+
+    def __init__(self, photo_dir: str):
+        self.photo_dir = photo_dir
+        self.db_path = os.path.join(photo_dir, CATALOG_FILENAME)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Öffnet die Katalog-Datenbank (einmalig, threadsicher über Lock)"""
+        if self._conn is None:
+            os.makedirs(self.photo_dir, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS photos (
+                    filename TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL
+                )
+            ''')
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_photos_created ON photos (created DESC, filename DESC)'
+            )
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def is_photo_file(filename: str) -> bool:
+        """Prüft ob ein Dateiname in den Katalog gehört"""
+        return filename.lower().endswith(PHOTO_EXTENSIONS) and filename not in EXCLUDED_FILES
+
+    def _row_to_photo(self, row: sqlite3.Row) -> Dict:
+        """Konvertiert Datenbank-Zeile in das Foto-Format der Templates"""
+        return {
+            'filename': row['filename'],
+            'size': row['size'],
+            'created': datetime.datetime.fromtimestamp(row['created']),
+            'url': f"/photo/{row['filename']}",
+            'thumb_url': f"/photo/{row['filename']}?size=thumb",
+            'screen_url': f"/photo/{row['filename']}?size=screen",
+            'cursor': self.make_cursor(row['created'], row['filename'])
+        }
+
+    @staticmethod
+    def make_cursor(created: float, filename: str) -> str:
+        """Erzeugt stabilen Cursor (Erstellungszeit + Dateiname) für die Paginierung"""
+        return f"{created!r}:{filename}"
+
+    @staticmethod
+    def parse_cursor(cursor: str):
+        """Zerlegt einen Cursor in (created, filename), None bei ungültigem Cursor"""
+        try:
+            created, filename = cursor.split(':', 1)
+            return float(created), filename
+        except (AttributeError, ValueError):
+            return None
+
+    def add_photo(self, filepath: str) -> bool:
+        """Trägt ein neu gespeichertes Foto in den Katalog ein"""
+        filename = os.path.basename(filepath)
+        if not self.is_photo_file(filename):
+            return False
+
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return False
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                'INSERT OR REPLACE INTO photos (filename, size, created) VALUES (?, ?, ?)',
+                (filename, stat.st_size, stat.st_ctime)
+            )
+            conn.commit()
+        return True
+
+    def remove_photo(self, filename: str):
+        """Entfernt ein Foto aus dem Katalog"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute('DELETE FROM photos WHERE filename = ?', (filename,))
+            conn.commit()
+
+    def latest(self) -> Optional[Dict]:
+        """Gibt das neueste Foto zurück"""
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT * FROM photos ORDER BY created DESC, filename DESC LIMIT 1'
+            ).fetchone()
+        return self._row_to_photo(row) if row else None
+
+    def count(self) -> int:
+        """Gibt Anzahl der Fotos zurück"""
+        with self._lock:
+            return self._connect().execute('SELECT COUNT(*) FROM photos').fetchone()[0]
+
+    def get_page(self, page: int = 1, per_page: int = 20) -> List[Dict]:
+        """Gibt Seite N (1-basiert) der Fotos zurück, neueste zuerst"""
+        offset = max(page - 1, 0) * per_page
+        with self._lock:
+            rows = self._connect().execute(
+                'SELECT * FROM photos ORDER BY created DESC, filename DESC LIMIT ? OFFSET ?',
+                (per_page, offset)
+            ).fetchall()
+        return [self._row_to_photo(row) for row in rows]
+
+    def get_page_after(self, cursor: Optional[str] = None, limit: int = 20) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Cursor-basierte Paginierung (stabil, auch wenn neue Fotos hinzukommen)
+
+        Args:
+            cursor: Cursor des letzten Fotos der vorherigen Seite (None = Anfang)
+            limit: Maximale Anzahl Fotos
+
+        Returns:
+            Tuple aus Fotos und Cursor für die nächste Seite (None = Ende)
+        """
+        position = self.parse_cursor(cursor) if cursor else None
+
+        with self._lock:
+            conn = self._connect()
+            if position:
+                created, filename = position
+                rows = conn.execute(
+                    'SELECT * FROM photos WHERE created < ? OR (created = ? AND filename < ?) '
+                    'ORDER BY created DESC, filename DESC LIMIT ?',
+                    (created, created, filename, limit + 1)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    'SELECT * FROM photos ORDER BY created DESC, filename DESC LIMIT ?',
+                    (limit + 1,)
+                ).fetchall()
+
+        photos = [self._row_to_photo(row) for row in rows[:limit]]
+        next_cursor = photos[-1]['cursor'] if len(rows) > limit else None
+        return photos, next_cursor
+
+    def get_recent(self, limit: int) -> List[Dict]:
+        """Gibt die letzten N Fotos zurück"""
+        return self.get_page(1, limit)
+
+    def get_all(self) -> List[Dict]:
+        """Gibt alle Fotos zurück, neueste zuerst"""
+        with self._lock:
+            rows = self._connect().execute(
+                'SELECT * FROM photos ORDER BY created DESC, filename DESC'
+            ).fetchall()
+        return [self._row_to_photo(row) for row in rows]
+
+    def reconcile(self) -> Dict[str, int]:
+        """
+        Gleicht den Katalog mit dem Verzeichnis ab
+
+        Erfasst Fotos, die außerhalb der Fotobox hinzugefügt wurden, und
+        entfernt Einträge, deren Datei nicht mehr existiert.
+
+        Returns:
+            Dictionary mit Anzahl aktualisierter/entfernter Einträge
+        """
+        on_disk = {}
+        if os.path.exists(self.photo_dir):
+            with os.scandir(self.photo_dir) as entries:
+                for entry in entries:
+                    if entry.is_file() and self.is_photo_file(entry.name):
+                        stat = entry.stat()
+                        on_disk[entry.name] = (stat.st_size, stat.st_ctime)
+
+        with self._lock:
+            conn = self._connect()
+            known = {
+                row['filename']: (row['size'], row['created'])
+                for row in conn.execute('SELECT * FROM photos')
+            }
+
+            changed = [
+                (name, size, created)
+                for name, (size, created) in on_disk.items()
+                if known.get(name) != (size, created)
+            ]
+            removed = [(name,) for name in known if name not in on_disk]
+
+            conn.executemany(
+                'INSERT OR REPLACE INTO photos (filename, size, created) VALUES (?, ?, ?)',
+                changed
+            )
+            conn.executemany('DELETE FROM photos WHERE filename = ?', removed)
+            conn.commit()
+
+        return {'updated': len(changed), 'removed': len(removed), 'total': len(on_disk)}
+
+# Globaler Katalog für das konfigurierte Foto-Verzeichnis
+photo_catalog = PhotoCatalog(config_manager.config.photo_dir)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Fotobox Post-Capture-Pipeline
+Verarbeitet Fotos nach der Aufnahme asynchron (Vorschaubilder, Overlay, Druck, Upload),
+damit die Aufnahme sofort zurückkehrt
+"""
+
+import copy
+import datetime
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from photo_catalog import photo_catalog
+
+# Reihenfolge der Verarbeitungsschritte
+PIPELINE_STAGES = ('thumbnails', 'overlay', 'print', 'upload')
+
+# Anzahl gemerkter Jobs für Status-Abfragen
+JOB_HISTORY_SIZE = 200
+
+class PostCapturePipeline:
+    """Worker-Pool mit begrenzter Warteschlange für die Nachbearbeitung"""
+
+    def __init__(self, config, thumbnail_cache, overlay_manager, print_manager, upload_queue):
+        self.config = config
+        self.thumbnail_cache = thumbnail_cache
+        self.overlay_manager = overlay_manager
+        self.print_manager = print_manager
+        self.upload_queue = upload_queue
+
+        self._queue = queue.Queue(maxsize=config.pipeline_queue_size)
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        for index in range(max(1, config.pipeline_workers)):
+            worker = threading.Thread(target=self._worker, name=f'post-capture-{index}', daemon=True)
+            worker.start()
+
+    def submit(self, photo_path: str) -> Dict:
+        """
+        Reiht ein frisch aufgenommenes Foto zur Nachbearbeitung ein
+
+        Args:
+            photo_path: Pfad zum Foto
+
+        Returns:
+            Status-Snapshot des Jobs
+        """
+        filename = os.path.basename(photo_path)
+        job = {
+            'filename': filename,
+            'photo_path': photo_path,
+            'status': 'queued',
+            'created': datetime.datetime.now().isoformat(),
+            'stages': {stage: {'status': 'pending'} for stage in PIPELINE_STAGES}
+        }
+
+        with self._lock:
+            self._jobs[filename] = job
+            self._jobs.move_to_end(filename)
+            while len(self._jobs) > JOB_HISTORY_SIZE:
+                self._jobs.popitem(last=False)
+
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            print(f"⚠️ Post-Capture-Warteschlange voll - {filename} wird nur zum Upload eingereiht")
+            with self._lock:
+                job['status'] = 'rejected'
+                job['message'] = 'Nachbearbeitungs-Warteschlange voll'
+                for stage in PIPELINE_STAGES:
+                    job['stages'][stage]['status'] = 'skipped'
+            # Upload nie verwerfen: Eintrag in die persistente Upload-Warteschlange ist billig
+            if self._stage_enabled('upload'):
+                self._run_stage(job, 'upload', photo_path)
+
+        return self.get_status(filename)
+
+    def get_status(self, filename: str) -> Optional[Dict]:
+        """Gibt den Verarbeitungsstatus eines Fotos zurück"""
+        with self._lock:
+            job = self._jobs.get(filename)
+            if job is None:
+                return None
+            snapshot = copy.deepcopy(job)
+        snapshot.pop('photo_path', None)
+        return snapshot
+
+    def get_stats(self) -> Dict:
+        """Gibt Warteschlangen-Statistiken zurück"""
+        with self._lock:
+            active = sum(1 for job in self._jobs.values() if job['status'] == 'running')
+        return {
+            'queued': self._queue.qsize(),
+            'running': active,
+            'max_queue': self._queue.maxsize
+        }
+
+    def _worker(self):
+        """Worker-Schleife"""
+        while True:
+            job = self._queue.get()
+            try:
+                self._process(job)
+            except Exception as e:
+                print(f"❌ Post-Capture-Fehler ({job['filename']}): {e}")
+                self._update(job, status='failed', message=str(e))
+
+    def _update(self, job: Dict, stage: Optional[str] = None, **values):
+        """Aktualisiert Job- oder Stage-Status threadsicher"""
+        with self._lock:
+            target = job['stages'][stage] if stage else job
+            target.update(values)
+
+    def _process(self, job: Dict):
+        """Führt alle Verarbeitungsschritte für ein Foto aus"""
+        self._update(job, status='running')
+        current_path = job['photo_path']
+        failed = False
+
+        for stage in PIPELINE_STAGES:
+            if not self._stage_enabled(stage):
+                self._update(job, stage, status='skipped')
+                continue
+
+            result = self._run_stage(job, stage, current_path)
+            success = result.get('success', True)
+            if stage == 'overlay' and success and result.get('path'):
+                current_path = result['path']
+            failed = failed or not success
+
+        self._update(job, status='failed' if failed else 'done',
+                     finished=datetime.datetime.now().isoformat())
+
+    def _run_stage(self, job: Dict, stage: str, photo_path: str) -> Dict:
+        """Führt einen Verarbeitungsschritt aus und hält dessen Status fest"""
+        handler = getattr(self, f'_stage_{stage}')
+        self._update(job, stage, status='running')
+        started = time.monotonic()
+        try:
+            result = handler(photo_path)
+            success = result.get('success', True)
+            self._update(
+                job, stage,
+                status='done' if success else 'failed',
+                message=result.get('message', ''),
+                duration=round(time.monotonic() - started, 3)
+            )
+            return result
+        except Exception as e:
+            print(f"❌ Post-Capture {stage} fehlgeschlagen ({job['filename']}): {e}")
+            self._update(job, stage, status='failed', message=str(e),
+                         duration=round(time.monotonic() - started, 3))
+            return {'success': False, 'message': str(e)}
+
+    def _stage_enabled(self, stage: str) -> bool:
+        """Prüft ob ein Verarbeitungsschritt laut Konfiguration aktiv ist"""
+        if stage == 'thumbnails':
+            return True
+        if stage == 'overlay':
+            return self.config.overlay.enabled
+        if stage == 'print':
+            return self.config.printing.enabled
+        if stage == 'upload':
+            return self.config.upload.enabled and self.config.upload.auto_upload
+        return False
+
+    def _stage_thumbnails(self, photo_path: str) -> Dict:
+        """Erzeugt Vorschaugrößen für Galerie und Startseite"""
+        self.thumbnail_cache.warm(photo_path)
+        return {'success': True, 'message': 'Vorschaubilder erstellt'}
+
+    def _stage_overlay(self, photo_path: str) -> Dict:
+        """Wendet Logo/Text/Rahmen an"""
+        overlay_path = self.overlay_manager.apply_overlays(photo_path)
+        photo_catalog.add_photo(overlay_path)
+        self.thumbnail_cache.warm(overlay_path)
+        return {'success': True, 'message': 'Overlay angewendet', 'path': overlay_path}
+
+    def _stage_print(self, photo_path: str) -> Dict:
+        """Automatischer Druck (Druck-Warteschlange) bzw. Druckversion für spätere Drucke vorbereiten"""
+        if self.config.printing.auto_print:
+            return self.print_manager.enqueue_print(photo_path)
+        return self.print_manager.prerender(photo_path)
+
+    def _stage_upload(self, photo_path: str) -> Dict:
+        """Automatischer Upload (persistente Warteschlange, kein Warten auf das Netzwerk)"""
+        return self.upload_queue.enqueue(photo_path)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Fotobox Druck-Cache
+Hält druckfertige Versionen der Fotos (skaliert, ggf. verbessert) für die aktuellen
+Druckeinstellungen vor, damit Nachdrucke und Kopien ohne erneute Bildverarbeitung starten
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+# Maximale Anzahl gecachter Druckversionen (10x15cm ~1 MB pro Datei)
+PRINT_CACHE_MAX_ENTRIES = 100
+
+class PrintRenditionCache:
+    """Festplatten-Cache für druckfertige Fotos, gültig für eine Kombination von Druckeinstellungen"""
+
+    def __init__(self, config, render: Callable[[str], str]):
+        """
+        Args:
+            config: App-Konfiguration
+            render: Erzeugt eine Druckversion und gibt deren (temporären) Pfad zurück,
+                    bzw. den Original-Pfad falls die Vorbereitung fehlschlägt
+        """
+        self.config = config
+        self.print_config = config.printing
+        self.cache_dir = os.path.abspath(os.path.join(config.temp_dir, 'print_renditions'))
+        self._render = render
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # Dateiname -> Bytes, älteste zuerst
+        self._signature = None
+        self._stats = {'hits': 0, 'renders': 0, 'evicted': 0}
+        self._load_index()
+
+    def _load_index(self):
+        """Übernimmt vorhandene Druckversionen (Reihenfolge nach letztem Zugriff)"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith('.jpg'):
+                    stat = entry.stat()
+                    entries.append((stat.st_atime, entry.name, stat.st_size))
+
+        for _, name, size in sorted(entries):
+            self._entries[name] = size
+
+    def settings_signature(self) -> str:
+        """Kurzer Hash der Einstellungen, die das Druckbild bestimmen"""
+        settings = [
+            self.print_config.paper_size,
+            self.print_config.print_quality,
+            self.print_config.margin_top,
+            self.print_config.margin_bottom,
+            self.print_config.margin_left,
+            self.print_config.margin_right
+        ]
+        return hashlib.sha1(json.dumps(settings).encode('utf-8')).hexdigest()[:10]
+
+    def _cache_name(self, source_path: str, signature: str) -> Optional[str]:
+        """Cache-Dateiname aus Quelldatei (mtime, Größe) und Einstellungs-Hash"""
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            return None
+        filename = os.path.basename(source_path)
+        return f"{filename}.{stat.st_mtime_ns:x}.{stat.st_size:x}.{signature}.jpg"
+
+    def get_path(self, source_path: str) -> Optional[str]:
+        """
+        Gibt die Druckversion eines Fotos zurück und erzeugt sie bei Bedarf
+
+        Returns:
+            Pfad zur Druckversion, Original-Pfad falls die Vorbereitung fehlschlägt,
+            None falls das Original fehlt
+        """
+        signature = self.settings_signature()
+        name = self._cache_name(source_path, signature)
+        if name is None:
+            return None
+        cache_path = os.path.join(self.cache_dir, name)
+
+        with self._lock:
+            self._drop_other_settings(signature)
+            if name in self._entries and os.path.exists(cache_path):
+                self._entries.move_to_end(name)
+                self._stats['hits'] += 1
+                return cache_path
+            self._forget(name)
+            key_lock = self._key_locks.setdefault(name, threading.Lock())
+
+        with key_lock:
+            # Paralleles Vorrendern hat die Datei evtl. bereits erzeugt
+            with self._lock:
+                if name in self._entries:
+                    self._stats['hits'] += 1
+                    return cache_path
+
+            try:
+                rendered_path = self._render(source_path)
+                if rendered_path == source_path:
+                    return source_path  # Vorbereitung fehlgeschlagen - Original drucken, nicht cachen
+
+                temp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+                shutil.move(rendered_path, temp_path)
+                os.replace(temp_path, cache_path)
+            finally:
+                with self._lock:
+                    self._key_locks.pop(name, None)
+
+            with self._lock:
+                self._drop_stale_variants(os.path.basename(source_path), name)
+                self._entries[name] = os.path.getsize(cache_path)
+                self._stats['renders'] += 1
+                self._evict()
+
+        return cache_path
+
+    def prerender(self, source_path: str) -> Dict:
+        """Erzeugt die Druckversion im Voraus (z.B. direkt nach der Aufnahme)"""
+        started = time.monotonic()
+        path = self.get_path(source_path)
+        if path is None or path == source_path:
+            return {
+                'success': False,
+                'message': 'Druckversion konnte nicht erstellt werden'
+            }
+        return {
+            'success': True,
+            'message': 'Druckversion vorbereitet',
+            'path': path,
+            'duration': round(time.monotonic() - started, 3)
+        }
+
+    def invalidate(self) -> int:
+        """Verwirft alle Druckversionen"""
+        with self._lock:
+            names = list(self._entries)
+            for name in names:
+                self._remove(name)
+            self._stats['evicted'] += len(names)
+        return len(names)
+
+    def _drop_other_settings(self, signature: str):
+        """Verwirft Druckversionen früherer Druckeinstellungen (einmal pro Änderung)"""
+        if signature == self._signature:
+            return
+        stale = [name for name in self._entries if not name.endswith(f'.{signature}.jpg')]
+        for name in stale:
+            self._remove(name)
+        if stale and self._signature is not None:
+            print(f"🖨️ Druckeinstellungen geändert - {len(stale)} Druckversionen verworfen")
+        self._stats['evicted'] += len(stale)
+        self._signature = signature
+
+    def _drop_stale_variants(self, filename: str, current: str):
+        """Entfernt veraltete Versionen desselben Fotos (Original wurde geändert)"""
+        prefix = f"{filename}."
+        for name in [n for n in self._entries if n.startswith(prefix) and n != current]:
+            self._remove(name)
+
+    def _evict(self):
+        """Verdrängt am längsten nicht genutzte Druckversionen"""
+        while len(self._entries) > PRINT_CACHE_MAX_ENTRIES:
+            self._remove(next(iter(self._entries)))
+            self._stats['evicted'] += 1
+
+    def _remove(self, name: str):
+        """Löscht Cache-Datei und Index-Eintrag"""
+        self._forget(name)
+        try:
+            os.remove(os.path.join(self.cache_dir, name))
+        except OSError:
+            pass
+
+    def _forget(self, name: str):
+        """Entfernt Index-Eintrag"""
+        self._entries.pop(name, None)
+
+    def get_stats(self) -> Dict:
+        """Gibt Cache-Statistiken zurück"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': sum(self._entries.values()),
+                'max_entries': PRINT_CACHE_MAX_ENTRIES,
+                'settings': self.settings_signature(),
+                **self._stats
+            }
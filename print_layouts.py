@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Fotobox Mehrfach-Layouts
+Setzt mehrere Fotos auf einen Druckbogen (Fotostreifen, 2x2 Raster) nach Vorlagen aus der
+Konfiguration (printing.layouts)
+
+Der Bogen wird einmal angelegt; jedes Foto wird verkleinert dekodiert (JPEG-Draft),
+in einem Schritt auf Feldgröße skaliert und direkt in alle Felder kopiert, die es belegt.
+"""
+
+import datetime
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+# Standardwerte für fehlende Vorlagen-Felder
+LAYOUT_TEMPLATE_DEFAULTS = {
+    'name': '',
+    'rows': 1,
+    'columns': 1,
+    'repeat': 1,
+    'orientation': 'portrait',  # portrait, landscape
+    'margin': 0,
+    'spacing': 0,
+    'footer': 0,
+    'caption': '',
+    'caption_color': '#000000',
+    'background': '#FFFFFF',
+    'fit': 'cover'  # cover (füllt das Feld, beschneidet), contain (ganzes Foto, Rand)
+}
+
+# Anzahl aufbewahrter Layout-Bögen in temp_dir/print_layouts
+PRINT_LAYOUT_KEEP = 50
+
+# EXIF-Orientierung -> Transformation (5-8 sind um 90° gedreht)
+EXIF_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90
+}
+
+class PrintLayoutEngine:
+    """Erzeugt Druckbögen mit mehreren Fotos nach Layout-Vorlagen"""
+
+    def __init__(self, print_manager):
+        """
+        Args:
+            print_manager: PrintManager (Druckformat, Druckqualität, Foto-Verbesserung)
+        """
+        self.print_manager = print_manager
+        self.config = print_manager.config
+        self.print_config = print_manager.config.printing
+        self.output_dir = os.path.abspath(os.path.join(self.config.temp_dir, 'print_layouts'))
+        self._text = None  # OverlayManager für Schrift und Platzhalter der Bildunterschrift
+
+    def get_template(self, layout: str) -> Dict:
+        """Gibt eine vollständige Vorlage zurück (ValueError bei unbekanntem oder ungültigem Layout)"""
+        template = (self.print_config.layouts or {}).get(layout)
+        if template is None:
+            raise ValueError(f'Unbekanntes Layout: {layout}')
+
+        template = {**LAYOUT_TEMPLATE_DEFAULTS, **template}
+        for key in ('rows', 'columns', 'repeat'):
+            if int(template[key]) < 1:
+                raise ValueError(f'Layout {layout}: {key} muss mindestens 1 sein')
+        if template['fit'] not in ('cover', 'contain'):
+            raise ValueError(f"Layout {layout}: unbekannter fit-Modus {template['fit']}")
+        return template
+
+    def list_layouts(self) -> List[Dict]:
+        """Verfügbare Layouts mit Anzahl Fotos pro Bogen"""
+        layouts = []
+        for layout_id in (self.print_config.layouts or {}):
+            try:
+                template = self.get_template(layout_id)
+            except ValueError as e:
+                print(f"⚠️ {e}")
+                continue
+            layouts.append({
+                'id': layout_id,
+                'name': template['name'] or layout_id,
+                'shots': template['rows'] * template['columns'],
+                'prints_per_sheet': template['repeat'],
+                'orientation': template['orientation']
+            })
+        return layouts
+
+    def sheet_size(self, template: Dict) -> Tuple[int, int]:
+        """Bogengröße in Pixeln (Papierformat, ggf. quer)"""
+        size = self.print_manager._get_print_dimensions() or (1200, 1800)
+        width, height = min(size), max(size)
+        return (height, width) if template['orientation'] == 'landscape' else (width, height)
+
+    def slot_boxes(self, template: Dict, sheet_size: Tuple[int, int]) -> List[List[Tuple[int, int]]]:
+        """
+        Berechnet die Felder des Bogens
+
+        Returns:
+            Pro Foto-Position die linken oberen Ecken aller Wiederholungen;
+            alle Felder haben dieselbe Größe (siehe cell_size)
+        """
+        cell_width, cell_height = self.cell_size(template, sheet_size)
+        block_width = sheet_size[0] // template['repeat']
+        margin, spacing = template['margin'], template['spacing']
+
+        slots = []
+        for row in range(template['rows']):
+            for column in range(template['columns']):
+                slots.append([
+                    (block * block_width + margin + column * (cell_width + spacing),
+                     margin + row * (cell_height + spacing))
+                    for block in range(template['repeat'])
+                ])
+        return slots
+
+    def cell_size(self, template: Dict, sheet_size: Tuple[int, int]) -> Tuple[int, int]:
+        """Größe eines Foto-Felds"""
+        block_width = sheet_size[0] // template['repeat']
+        margin, spacing = template['margin'], template['spacing']
+        inner_width = block_width - 2 * margin - (template['columns'] - 1) * spacing
+        inner_height = sheet_size[1] - 2 * margin - template['footer'] - (template['rows'] - 1) * spacing
+        cell = (inner_width // template['columns'], inner_height // template['rows'])
+        if min(cell) < 1:
+            raise ValueError('Layout passt nicht auf das Papierformat (Ränder/Abstände zu groß)')
+        return cell
+
+    def render(self, photo_paths: List[str], layout: str, output_path: Optional[str] = None) -> str:
+        """
+        Erzeugt einen Druckbogen
+
+        Sind weniger Fotos als Felder angegeben, werden die Fotos wiederholt
+        (z.B. ein Foto viermal im Streifen).
+
+        Args:
+            photo_paths: Fotos in Feld-Reihenfolge (zeilenweise)
+            layout: Layout-ID aus printing.layouts
+            output_path: Zieldatei (optional, sonst temp_dir/print_layouts)
+
+        Returns:
+            Pfad zum Druckbogen (JPEG)
+        """
+        if not photo_paths:
+            raise ValueError('Keine Fotos für das Layout angegeben')
+
+        template = self.get_template(layout)
+        size = self.sheet_size(template)
+        cell = self.cell_size(template, size)
+        slots = self.slot_boxes(template, size)
+
+        # Einzige Bogen-Allokation - Felder werden direkt hineinkopiert
+        sheet = Image.new('RGB', size, template['background'])
+
+        positions: Dict[str, List[Tuple[int, int]]] = {}
+        for index, corners in enumerate(slots):
+            positions.setdefault(photo_paths[index % len(photo_paths)], []).extend(corners)
+
+        for photo_path, corners in positions.items():
+            tile, offset = self._render_cell(photo_path, cell, template)
+            for x, y in corners:
+                sheet.paste(tile, (x + offset[0], y + offset[1]))
+
+        if template['footer'] and template['caption']:
+            self._draw_captions(sheet, template, size)
+
+        if output_path is None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            stamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+            output_path = os.path.join(self.output_dir, f'{layout}_{stamp}.jpg')
+            self._cleanup()
+
+        sheet.save(output_path, 'JPEG', quality=95, optimize=True, dpi=(300, 300))
+        return output_path
+
+    def _render_cell(self, photo_path: str, cell: Tuple[int, int], template: Dict) -> Tuple[Image.Image, Tuple[int, int]]:
+        """
+        Skaliert ein Foto in einem Schritt auf Feldgröße
+
+        Returns:
+            (Feldbild, Versatz im Feld) - bei 'contain' ist das Bild kleiner als das Feld
+        """
+        with Image.open(photo_path) as img:
+            transpose = EXIF_TRANSPOSE.get(img.getexif().get(0x0112, 1))
+            rotated = transpose in (Image.Transpose.TRANSPOSE, Image.Transpose.ROTATE_270,
+                                    Image.Transpose.TRANSVERSE, Image.Transpose.ROTATE_90)
+            # Feldgröße in Sensor-Ausrichtung (vor der EXIF-Drehung)
+            target = (cell[1], cell[0]) if rotated else cell
+
+            scale_of = max if template['fit'] == 'cover' else min
+            scale = scale_of(target[0] / img.width, target[1] / img.height)
+
+            # JPEG verkleinert dekodieren (1/2, 1/4, 1/8), solange die Feldgröße erreicht wird
+            img.draft('RGB', (math.ceil(img.width * scale), math.ceil(img.height * scale)))
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+
+            if template['fit'] == 'cover':
+                # Mittigen Ausschnitt im Seitenverhältnis des Felds direkt beim Skalieren wählen
+                crop_width = min(img.width, img.height * target[0] / target[1])
+                crop_height = min(img.height, img.width * target[1] / target[0])
+                box = ((img.width - crop_width) / 2, (img.height - crop_height) / 2,
+                       (img.width + crop_width) / 2, (img.height + crop_height) / 2)
+                tile = img.resize(target, Image.Resampling.LANCZOS, box=box, reducing_gap=3.0)
+            else:
+                scale = min(target[0] / img.width, target[1] / img.height)
+                fitted = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+                tile = img.resize(fitted, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+        if transpose is not None:
+            tile = tile.transpose(transpose)
+
+        if self.print_config.print_quality == 'photo':
+            tile = self.print_manager._enhance_for_photo_print(tile)
+
+        offset = ((cell[0] - tile.width) // 2, (cell[1] - tile.height) // 2)
+        return tile, offset
+
+    def _draw_captions(self, sheet: Image.Image, template: Dict, size: Tuple[int, int]):
+        """Schreibt die Bildunterschrift in den Fußbereich jeder Wiederholung"""
+        if self._text is None:
+            from overlay_manager import OverlayManager
+            self._text = OverlayManager(self.config)
+
+        caption = self._text._replace_text_placeholders(template['caption'])
+        font = self._text._load_font(max(12, int(template['footer'] * 0.4)))
+        draw = ImageDraw.Draw(sheet)
+        block_width = size[0] // template['repeat']
+        center_y = size[1] - template['margin'] - template['footer'] / 2
+
+        for block in range(template['repeat']):
+            center_x = block * block_width + block_width / 2
+            draw.text((center_x, center_y), caption, font=font, fill=template['caption_color'], anchor='mm')
+
+    def _cleanup(self):
+        """Entfernt alte Druckbögen (behält die letzten PRINT_LAYOUT_KEEP)"""
+        try:
+            with os.scandir(self.output_dir) as it:
+                sheets = sorted((entry.stat().st_mtime, entry.path) for entry in it
+                                if entry.is_file() and entry.name.endswith('.jpg'))
+        except OSError:
+            return
+
+        for _, path in sheets[:max(0, len(sheets) - PRINT_LAYOUT_KEEP + 1)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
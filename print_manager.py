@@ -7,9 +7,35 @@ Verwaltet automatisches Drucken von Fotos via CUPS/lp
 import os
 import subprocess
 import json
+import datetime
+import itertools
+import threading
+import time
+from collections import OrderedDict
 from typing import Dict, List, Optional, Tuple
 from PIL import Image
 import tempfile
+from print_cache import PrintRenditionCache
+from ipp_client import IPPClient, IPPError
+from print_layouts import PrintLayoutEngine
+
+# Druck-Warteschlange: höchstens ein lpstat-Aufruf pro Intervall (Sekunden)
+PRINT_STATUS_INTERVAL = 5.0
+
+# Wiederholtes Tippen auf "Drucken" innerhalb dieses Zeitfensters erzeugt keinen neuen Auftrag
+PRINT_DUPLICATE_WINDOW = 15.0
+
+# Startwert für die ETA bis echte Druckzeiten gemessen sind (Thermosublimation 10x15cm)
+DEFAULT_SECONDS_PER_PRINT = 45.0
+
+# Anzahl gemerkter abgeschlossener Druckaufträge
+PRINT_HISTORY_SIZE = 50
+
+# Status eines Auftrags in der Druck-Warteschlange
+PRINT_ACTIVE_STATES = ('queued', 'sending', 'printing')
+
+# Nach einem IPP-Verbindungsfehler so lange lp/lpstat verwenden (Sekunden)
+IPP_RETRY_INTERVAL = 60.0
 
 class PrintManager:
     """Manager für Foto-Druck"""
@@ -17,11 +43,58 @@ class PrintManager:
     def __init__(self, config):
         self.config = config
         self.print_config = config.printing
-        
+        self.image_workers = None  # ImageWorkerPool: Druck-Vorbereitung in Worker-Prozessen (optional)
+        self.renditions = PrintRenditionCache(config, self._render_for_print)
+        self.layouts = PrintLayoutEngine(self)
+        
+        # Druck-Warteschlange (Worker-Thread startet mit dem ersten Auftrag)
+        self._queue_cond = threading.Condition()
+        self._print_jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._print_job_ids = itertools.count(1)
+        self._queue_thread = None
+        self._printer_jobs: Optional[List[Dict[str, str]]] = []  # Gecachte lpstat-Ausgabe (None = unbekannt)
+        self._printer_jobs_polled = 0.0
+        self._seconds_per_print = DEFAULT_SECONDS_PER_PRINT
+        self._queue_stats = {'printed': 0, 'failed': 0, 'cancelled': 0, 'duplicates': 0, 'status_polls': 0}
+        
+        # Direkter IPP-Zugriff auf CUPS (lp/lpstat/cancel nur als Fallback)
+        self._ipp_client = None
+        self._ipp_retry_at = 0.0
+        
+    def _ipp(self) -> Optional[IPPClient]:
+        """IPP-Client, falls aktiviert und CUPS zuletzt erreichbar war"""
+        if os.name == 'nt' or not self.print_config.use_ipp or time.time() < self._ipp_retry_at:
+            return None
+        if self._ipp_client is None or self._ipp_client.server != self.print_config.ipp_server:
+            self._ipp_client = IPPClient(self.print_config.ipp_server)
+        return self._ipp_client
+    
+    def _ipp_failed(self, error: IPPError):
+        """CUPS per IPP nicht erreichbar - vorübergehend lp/lpstat verwenden"""
+        self._ipp_retry_at = time.time() + IPP_RETRY_INTERVAL
+        print(f"⚠️ IPP nicht verfügbar ({error}) - verwende lp/lpstat")
+    
     def get_available_printers(self) -> List[Dict[str, str]]:
         """Gibt Liste aller verfügbaren Drucker zurück"""
         printers = []
         
+        ipp = self._ipp()
+        if ipp is not None:
+            try:
+                # Eine Anfrage für alle Drucker inkl. Beschreibung (statt lpoptions pro Drucker)
+                return [
+                    {
+                        'name': printer['name'],
+                        'status': f"{printer['state']} - {printer['state_message']}" if printer['state_message']
+                                  else printer['state'],
+                        'description': printer['make_and_model'] or printer['info'] or 'Drucker verfügbar'
+                    }
+                    for printer in ipp.get_printers()
+                ]
+            except IPPError as e:
+                if e.unreachable:
+                    self._ipp_failed(e)
+        
         try:
             # Verwende lpstat um Drucker zu finden
             result = subprocess.run(['lpstat', '-p'], 
@@ -77,13 +150,14 @@ class PrintManager:
         except Exception:
             return []
     
-    def print_photo(self, photo_path: str, copies: int = None) -> Dict[str, any]:
+    def print_photo(self, photo_path: str, copies: int = None, prepared: bool = False) -> Dict[str, any]:
         """
         Druckt ein Foto
         
         Args:
             photo_path: Pfad zum Foto
             copies: Anzahl Kopien (optional, verwendet Konfiguration)
+            prepared: Datei ist bereits druckfertig (z.B. Layout-Bogen) - keine Druckversion erzeugen
             
         Returns:
             Dictionary mit Ergebnis
@@ -103,18 +177,14 @@ class PrintManager:
         copies = copies or self.print_config.copies
         
         try:
-            # Bereite Foto für Druck vor
-            print_ready_path = self._prepare_photo_for_print(photo_path)
+            # Druckversion aus dem Cache (bei Nachdrucken bereits vorhanden)
+            print_ready_path = photo_path if prepared else self.renditions.get_path(photo_path)
             
             # Drucke Foto
             if os.name == 'nt':  # Windows
                 result = self._print_windows(print_ready_path, copies)
             else:  # Linux/macOS
-                result = self._print_unix(print_ready_path, copies)
-            
-            # Aufräumen
-            if print_ready_path != photo_path:
-                os.remove(print_ready_path)
+                result = self._print_unix(print_ready_path, copies, os.path.basename(photo_path))
             
             return result
             
@@ -124,6 +194,366 @@ class PrintManager:
                 'message': f'Druck-Fehler: {str(e)}'
             }
     
+    def enqueue_print(self, photo_path: str, copies: int = None, prepared: bool = False) -> Dict[str, any]:
+        """
+        Reiht ein Foto in die Druck-Warteschlange ein (kehrt sofort zurück)
+        
+        Wiederholte Aufträge für dasselbe Foto innerhalb von PRINT_DUPLICATE_WINDOW
+        werden nicht erneut eingereiht.
+        
+        Args:
+            photo_path: Pfad zum Foto
+            copies: Anzahl Kopien (optional, verwendet Konfiguration)
+            prepared: Datei ist bereits druckfertig (siehe print_photo)
+            
+        Returns:
+            Dictionary mit Auftrag, Position und geschätzter Wartezeit
+        """
+        if not os.path.exists(photo_path):
+            return {
+                'success': False,
+                'message': f'Foto nicht gefunden: {photo_path}'
+            }
+        
+        if not self.print_config.printer_name:
+            return {
+                'success': False,
+                'message': 'Kein Drucker konfiguriert'
+            }
+        
+        now = time.time()
+        with self._queue_cond:
+            for job in reversed(self._print_jobs.values()):
+                if (job['photo_path'] == photo_path and job['status'] in PRINT_ACTIVE_STATES
+                        and now - job['created'] < PRINT_DUPLICATE_WINDOW):
+                    self._queue_stats['duplicates'] += 1
+                    snapshot = self._queue_snapshot()[job['id']]
+                    return {
+                        'success': True,
+                        'duplicate': True,
+                        'message': f"Foto wird bereits gedruckt ({self._describe_wait(snapshot)})",
+                        'job': snapshot
+                    }
+            
+            job_id = str(next(self._print_job_ids))
+            self._print_jobs[job_id] = {
+                'id': job_id,
+                'photo_path': photo_path,
+                'copies': copies or self.print_config.copies,
+                'prepared': prepared,
+                'status': 'queued',
+                'created': now,
+                'sent': None,
+                'finished': None,
+                'cups_job_id': None,
+                'message': ''
+            }
+            self._trim_print_history()
+            snapshot = self._queue_snapshot()[job_id]
+            self._ensure_queue_worker()
+            self._queue_cond.notify_all()
+        
+        return {
+            'success': True,
+            'message': f"Druckauftrag eingereiht ({self._describe_wait(snapshot)})",
+            'job': snapshot
+        }
+    
+    def get_print_queue_status(self) -> Dict[str, any]:
+        """Gibt Aufträge, Drucker-Status (gecacht) und Durchsatz zurück - ohne lpstat-Aufruf"""
+        with self._queue_cond:
+            snapshots = list(self._queue_snapshot().values())
+            active = [job for job in snapshots if job['status'] in PRINT_ACTIVE_STATES]
+            printer_jobs = list(self._printer_jobs) if self._printer_jobs is not None else None
+            polled = self._printer_jobs_polled
+            return {
+                'jobs': snapshots,
+                'active': len(active),
+                'eta_seconds': active[-1]['eta_seconds'] if active else 0,
+                'printer_jobs': printer_jobs,
+                'printer_status_age': round(time.time() - polled, 1) if polled else None,
+                'seconds_per_print': round(self._seconds_per_print, 1),
+                'max_printer_jobs': self.print_config.max_printer_jobs,
+                **self._queue_stats
+            }
+    
+    def cancel_queued_print(self, job_id: str) -> Dict[str, any]:
+        """Bricht einen Auftrag der Druck-Warteschlange ab (auch wenn er bereits beim Drucker ist)"""
+        with self._queue_cond:
+            job = self._print_jobs.get(job_id)
+            if job is None or job['status'] not in PRINT_ACTIVE_STATES:
+                return {
+                    'success': False,
+                    'message': 'Kein aktiver Druckauftrag mit dieser ID'
+                }
+            if job['status'] == 'sending':
+                return {
+                    'success': False,
+                    'message': 'Auftrag wird gerade an den Drucker gesendet'
+                }
+            cups_job_id = job['cups_job_id'] if job['status'] == 'printing' else None
+        
+        if cups_job_id and not self.cancel_print_job(cups_job_id):
+            return {
+                'success': False,
+                'message': f'Druckauftrag {cups_job_id} konnte nicht abgebrochen werden'
+            }
+        
+        with self._queue_cond:
+            job['status'] = 'cancelled'
+            job['finished'] = time.time()
+            self._queue_stats['cancelled'] += 1
+            self._queue_cond.notify_all()
+        
+        return {
+            'success': True,
+            'message': 'Druckauftrag abgebrochen'
+        }
+    
+    def _ensure_queue_worker(self):
+        """Startet den Warteschlangen-Worker (Aufruf mit gehaltenem _queue_cond)"""
+        if self._queue_thread is None or not self._queue_thread.is_alive():
+            self._queue_thread = threading.Thread(target=self._queue_worker, name='print-queue', daemon=True)
+            self._queue_thread.start()
+    
+    def _queue_worker(self):
+        """Sendet Aufträge der Reihe nach an den Drucker, sobald dessen Puffer Platz hat"""
+        while True:
+            # Ohne aktive Aufträge kein lpstat - warten bis etwas eingereiht wird
+            with self._queue_cond:
+                while not any(job['status'] in PRINT_ACTIVE_STATES for job in self._print_jobs.values()):
+                    self._queue_cond.wait()
+            
+            self._poll_printer_jobs()
+            
+            with self._queue_cond:
+                job = self._next_print_job()
+                if job is None:
+                    self._queue_cond.wait(PRINT_STATUS_INTERVAL)
+                    continue
+                job['status'] = 'sending'
+            
+            try:
+                result = self.print_photo(job['photo_path'], job['copies'], job['prepared'])
+            except Exception as e:
+                result = {'success': False, 'message': f'Druck-Fehler: {str(e)}'}
+            
+            with self._queue_cond:
+                job['message'] = result.get('message', '')
+                if not result.get('success'):
+                    job['status'] = 'failed'
+                    job['finished'] = time.time()
+                    self._queue_stats['failed'] += 1
+                    print(f"❌ Druck fehlgeschlagen: {os.path.basename(job['photo_path'])} - {job['message']}")
+                else:
+                    job['status'] = 'printing'
+                    job['sent'] = time.time()
+                    job['cups_job_id'] = result.get('job_id')
+    
+    def _next_print_job(self) -> Optional[Dict]:
+        """Nächster wartender Auftrag, falls der Drucker-Puffer Platz hat (Aufruf mit gehaltenem _queue_cond)"""
+        limit = self.print_config.max_printer_jobs
+        at_printer = sum(1 for job in self._print_jobs.values() if job['status'] in ('sending', 'printing'))
+        if limit and at_printer >= limit:
+            return None
+        for job in self._print_jobs.values():
+            if job['status'] == 'queued':
+                return job
+        return None
+    
+    def _poll_printer_jobs(self):
+        """Fragt die CUPS-Warteschlange ab (höchstens einmal pro PRINT_STATUS_INTERVAL)"""
+        now = time.time()
+        if now - self._printer_jobs_polled < PRINT_STATUS_INTERVAL:
+            return
+        
+        printer_jobs = None
+        printer = self.print_config.printer_name
+        ipp = self._ipp() if printer else None
+        if ipp is not None:
+            try:
+                printer_jobs = [
+                    {
+                        'job_id': f"{printer}-{job['job_id']}",
+                        'owner': job['owner'],
+                        'size': f"{job['k_octets']}k",
+                        'state': job['state']
+                    }
+                    for job in ipp.get_jobs(printer)
+                ]
+            except IPPError as e:
+                if e.unreachable:
+                    self._ipp_failed(e)
+        
+        if printer_jobs is None and os.name != 'nt' and printer:
+            try:
+                result = subprocess.run(['lpstat', '-o', printer],
+                                        capture_output=True, text=True, timeout=10)
+                if result.returncode == 0:
+                    printer_jobs = []
+                    for line in result.stdout.split('\n'):
+                        # Format: "Drucker-123 pi 1024 Mo 06 Okt 2025 14:00:00"
+                        parts = line.split()
+                        if len(parts) >= 3:
+                            printer_jobs.append({
+                                'job_id': parts[0],
+                                'owner': parts[1],
+                                'size': parts[2],
+                                'submitted': ' '.join(parts[3:])
+                            })
+            except (OSError, subprocess.SubprocessError):
+                printer_jobs = None
+        
+        with self._queue_cond:
+            self._printer_jobs = printer_jobs
+            self._printer_jobs_polled = now
+            self._queue_stats['status_polls'] += 1
+            self._update_printing_jobs(printer_jobs, now)
+    
+    def _update_printing_jobs(self, printer_jobs: Optional[List[Dict[str, str]]], now: float):
+        """Schließt Aufträge ab, die CUPS nicht mehr meldet, und misst die Druckdauer"""
+        active_ids = {entry['job_id'] for entry in printer_jobs} if printer_jobs is not None else None
+        
+        for job in self._print_jobs.values():
+            if job['status'] != 'printing':
+                continue
+            
+            elapsed = now - job['sent']
+            if active_ids is not None and job['cups_job_id']:
+                if job['cups_job_id'] in active_ids:
+                    continue
+                # Gemessene Dauer pro Kopie in den gleitenden Mittelwert übernehmen
+                measured = elapsed / max(job['copies'], 1)
+                self._seconds_per_print = 0.7 * self._seconds_per_print + 0.3 * measured
+            elif elapsed < job['copies'] * self._seconds_per_print:
+                continue  # Status unbekannt: nach geschätzter Druckdauer als fertig werten
+            
+            job['status'] = 'done'
+            job['finished'] = now
+            self._queue_stats['printed'] += 1
+            self._queue_cond.notify_all()
+    
+    def _trim_print_history(self):
+        """Vergisst die ältesten abgeschlossenen Aufträge (Aufruf mit gehaltenem _queue_cond)"""
+        finished = [job_id for job_id, job in self._print_jobs.items() if job['status'] not in PRINT_ACTIVE_STATES]
+        for job_id in finished[:max(0, len(self._print_jobs) - PRINT_HISTORY_SIZE)]:
+            del self._print_jobs[job_id]
+    
+    def _queue_snapshot(self) -> Dict[str, Dict]:
+        """Aufträge mit Position und geschätzter Restzeit (Aufruf mit gehaltenem _queue_cond)"""
+        now = time.time()
+        eta = 0.0
+        position = 0
+        snapshots = OrderedDict()
+        
+        for job in self._print_jobs.values():
+            snapshot = {
+                'id': job['id'],
+                'filename': os.path.basename(job['photo_path']),
+                'copies': job['copies'],
+                'status': job['status'],
+                'cups_job_id': job['cups_job_id'],
+                'message': job['message'],
+                'created': datetime.datetime.fromtimestamp(job['created']).isoformat(),
+                'position': None,
+                'eta_seconds': None
+            }
+            if job['status'] in PRINT_ACTIVE_STATES:
+                duration = job['copies'] * self._seconds_per_print
+                if job['sent']:
+                    duration = max(duration - (now - job['sent']), 0.0)
+                eta += duration
+                position += 1
+                snapshot['position'] = position
+                snapshot['eta_seconds'] = round(eta)
+            snapshots[job['id']] = snapshot
+        
+        return snapshots
+    
+    def _describe_wait(self, snapshot: Dict) -> str:
+        """Kurztext für Gäste: Position und geschätzte Wartezeit"""
+        eta = snapshot['eta_seconds'] or 0
+        wait = f"ca. {round(eta / 60)} Min." if eta >= 90 else f"ca. {eta} Sek."
+        return f"Position {snapshot['position']}, {wait}"
+    
+    def prerender(self, photo_path: str) -> Dict[str, any]:
+        """Bereitet die Druckversion eines Fotos im Voraus vor (ohne zu drucken)"""
+        try:
+            return self.renditions.prerender(photo_path)
+        except Exception as e:
+            return {
+                'success': False,
+                'message': f'Druck-Vorbereitung fehlgeschlagen: {str(e)}'
+            }
+    
+    def get_layouts(self) -> List[Dict]:
+        """Verfügbare Mehrfach-Layouts (Fotostreifen, Raster)"""
+        return self.layouts.list_layouts()
+    
+    def compose_layout(self, photo_paths: List[str], layout: str = None) -> Dict[str, any]:
+        """
+        Setzt mehrere Fotos auf einen Druckbogen
+        
+        Args:
+            photo_paths: Fotos in Feld-Reihenfolge (weniger Fotos als Felder werden wiederholt)
+            layout: Layout-ID (optional, verwendet printing.default_layout)
+            
+        Returns:
+            Dictionary mit Ergebnis und Pfad zum Druckbogen
+        """
+        layout = layout or self.print_config.default_layout
+        missing = [os.path.basename(path) for path in photo_paths if not os.path.exists(path)]
+        if not photo_paths or missing:
+            return {
+                'success': False,
+                'message': f"Foto nicht gefunden: {', '.join(missing)}" if missing else 'Keine Fotos ausgewählt'
+            }
+        
+        started = time.monotonic()
+        try:
+            path = self._render_layout(photo_paths, layout)
+        except Exception as e:
+            return {
+                'success': False,
+                'message': f'Layout-Fehler: {str(e)}'
+            }
+        
+        return {
+            'success': True,
+            'message': 'Druckbogen erstellt',
+            'layout': layout,
+            'path': path,
+            'duration': round(time.monotonic() - started, 3)
+        }
+    
+    def print_layout(self, photo_paths: List[str], layout: str = None, copies: int = None) -> Dict[str, any]:
+        """Erstellt einen Druckbogen und reiht ihn in die Druck-Warteschlange ein"""
+        if not self.print_config.printer_name:
+            return {
+                'success': False,
+                'message': 'Kein Drucker konfiguriert'
+            }
+        
+        composed = self.compose_layout(photo_paths, layout)
+        if not composed['success']:
+            return composed
+        
+        result = self.enqueue_print(composed['path'], copies, prepared=True)
+        result['layout'] = composed['layout']
+        return result
+    
+    def _render_layout(self, photo_paths: List[str], layout: str) -> str:
+        """Erzeugt einen Druckbogen (im Bild-Worker falls verfügbar)"""
+        if self.image_workers is not None:
+            return self.image_workers.compose_layout(photo_paths, layout)
+        return self.layouts.render(photo_paths, layout)
+    
+    def _render_for_print(self, photo_path: str) -> str:
+        """Erzeugt eine Druckversion (im Bild-Worker falls verfügbar)"""
+        if self.image_workers is not None:
+            return self.image_workers.prepare_print(photo_path)
+        return self._prepare_photo_for_print(photo_path)
+    
     def _prepare_photo_for_print(self, photo_path: str) -> str:
         """Bereitet Foto für optimalen Druck vor"""
         try:
@@ -206,20 +636,13 @@ class PrintManager:
         
         return img
     
-    def _print_unix(self, file_path: str, copies: int) -> Dict[str, any]:
-        """Druckt auf Unix-Systemen (Linux/macOS)"""
-        cmd = ['lp']
-        
-        # Drucker-Name
-        cmd.extend(['-d', self.print_config.printer_name])
-        
-        # Anzahl Kopien
-        if copies > 1:
-            cmd.extend(['-n', str(copies)])
+    def _print_options(self) -> Dict[str, str]:
+        """Druckoptionen wie bei lp -o (Papierformat, Qualität, Ränder)"""
+        options = {}
         
         # Papierformat
         if self.print_config.paper_size:
-            cmd.extend(['-o', f'media={self.print_config.paper_size}'])
+            options['media'] = self.print_config.paper_size
         
         # Druckqualität
         quality_map = {
@@ -228,15 +651,49 @@ class PrintManager:
             'high': 'high',
             'photo': 'photo'
         }
-        quality = quality_map.get(self.print_config.print_quality, 'normal')
-        cmd.extend(['-o', f'quality={quality}'])
+        options['quality'] = quality_map.get(self.print_config.print_quality, 'normal')
         
         # Ränder
         if any([self.print_config.margin_top, self.print_config.margin_bottom,
                 self.print_config.margin_left, self.print_config.margin_right]):
-            margins = f"{self.print_config.margin_left},{self.print_config.margin_bottom}," \
-                     f"{self.print_config.margin_right},{self.print_config.margin_top}"
-            cmd.extend(['-o', f'page-margins={margins}'])
+            options['page-margins'] = f"{self.print_config.margin_left},{self.print_config.margin_bottom}," \
+                                      f"{self.print_config.margin_right},{self.print_config.margin_top}"
+        
+        return options
+    
+    def _print_unix(self, file_path: str, copies: int, job_name: Optional[str] = None) -> Dict[str, any]:
+        """Druckt auf Unix-Systemen (Linux/macOS) - per IPP, sonst mit lp"""
+        job_name = job_name or os.path.basename(file_path)
+        printer = self.print_config.printer_name
+        options = self._print_options()
+        
+        ipp = self._ipp()
+        if ipp is not None:
+            try:
+                ipp_options = {'copies': copies, **options} if copies > 1 else options
+                job_id = f"{printer}-{ipp.print_job(printer, file_path, job_name, ipp_options)}"
+                return {
+                    'success': True,
+                    'message': f'Druckauftrag gesendet (ID: {job_id})',
+                    'job_id': job_id,
+                    'copies': copies
+                }
+            except IPPError as e:
+                if not e.unreachable:
+                    return {
+                        'success': False,
+                        'message': f'Druck fehlgeschlagen: {e}'
+                    }
+                self._ipp_failed(e)
+        
+        cmd = ['lp', '-d', printer, '-t', job_name]
+        
+        # Anzahl Kopien
+        if copies > 1:
+            cmd.extend(['-n', str(copies)])
+        
+        for name, value in options.items():
+            cmd.extend(['-o', f'{name}={value}'])
         
         # Datei
         cmd.append(file_path)
@@ -315,30 +772,25 @@ class PrintManager:
         return None
     
     def get_print_queue(self) -> List[Dict[str, str]]:
-        """Holt aktuelle Druckwarteschlange"""
-        try:
-            result = subprocess.run(['lpq', '-P', self.print_config.printer_name],
-                                  capture_output=True, text=True, check=True)
-            
-            jobs = []
-            for line in result.stdout.split('\n')[1:]:  # Überspringe Header
-                if line.strip():
-                    parts = line.split()
-                    if len(parts) >= 4:
-                        jobs.append({
-                            'rank': parts[0],
-                            'owner': parts[1],
-                            'job_id': parts[2],
-                            'files': ' '.join(parts[3:])
-                        })
-            
-            return jobs
-            
-        except Exception:
-            return []
+        """Holt aktuelle Druckwarteschlange (CUPS-Status aus dem Cache, max. ein lpstat pro Intervall)"""
+        self._poll_printer_jobs()
+        with self._queue_cond:
+            printer_jobs = self._printer_jobs or []
+            return [{'rank': str(rank), **entry} for rank, entry in enumerate(printer_jobs, start=1)]
     
     def cancel_print_job(self, job_id: str) -> bool:
-        """Bricht Druckauftrag ab"""
+        """Bricht Druckauftrag ab (Job-ID im lp-Format 'Drucker-123')"""
+        printer, _, number = job_id.rpartition('-')
+        ipp = self._ipp()
+        if ipp is not None and printer and number.isdigit():
+            try:
+                ipp.cancel_job(printer, int(number))
+                return True
+            except IPPError as e:
+                if not e.unreachable:
+                    return False
+                self._ipp_failed(e)
+        
         try:
             subprocess.run(['cancel', job_id], check=True)
             return True
@@ -357,11 +809,15 @@ class PrintManager:
             # Erstelle Test-Seite
             test_image_path = self._create_test_page()
             
+            # Druckversion ohne Druck-Cache (Test-Seite wird gleich wieder gelöscht)
+            print_ready_path = self._render_for_print(test_image_path)
+            
             # Drucke Test-Seite
-            result = self.print_photo(test_image_path, copies=1)
+            result = self.print_photo(print_ready_path, copies=1, prepared=True)
             
             # Aufräumen
-            os.remove(test_image_path)
+            for path in {test_image_path, print_ready_path}:
+                os.remove(path)
             
             return result
             
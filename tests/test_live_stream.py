@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests für den MJPEG-Live-Stream: getrennte Viewer werden auch ohne Kamera-Frames abgemeldet
+"""
+
+import os
+import socket
+import sys
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import live_stream
+from live_stream import LiveStreamBroadcaster, STREAM_BOUNDARY
+
+def wait_until(predicate, timeout=5.0):
+    """Wartet bis predicate() wahr ist (oder die Zeit abläuft)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+class LiveStreamViewerTest(unittest.TestCase):
+
+    def setUp(self):
+        self._keepalive = live_stream.STREAM_KEEPALIVE_INTERVAL
+        live_stream.STREAM_KEEPALIVE_INTERVAL = 0.2
+        # Kamera nicht erkannt: es kommen nie Frames
+        self.broadcaster = LiveStreamBroadcaster(lambda: None, SimpleNamespace(live_stream_fps=20))
+
+    def tearDown(self):
+        live_stream.STREAM_KEEPALIVE_INTERVAL = self._keepalive
+
+    def test_keepalive_without_frames(self):
+        frames = self.broadcaster.frames()
+        received = []
+        reader = threading.Thread(target=lambda: received.append(next(frames)), daemon=True)
+        reader.start()
+        reader.join(2.0)
+        self.assertTrue(received, 'Kein Keepalive ohne Kamera-Frames')
+        chunk = received[0]
+        self.assertTrue(chunk.startswith(f'--{STREAM_BOUNDARY}\r\n'.encode('ascii')))
+        self.assertIn(b'\xff\xd8', chunk)  # Platzhalter-JPEG
+        self.assertEqual(self.broadcaster.viewer_count, 1)
+
+        frames.close()
+        self.assertEqual(self.broadcaster.viewer_count, 0)
+        self.assertTrue(wait_until(lambda: self.broadcaster._producer is None))
+
+    def test_dropped_http_viewer_is_removed(self):
+        from werkzeug.serving import make_server
+
+        def app(environ, start_response):
+            start_response('200 OK', [('Content-Type', f'multipart/x-mixed-replace; boundary={STREAM_BOUNDARY}')])
+            return self.broadcaster.frames()
+
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            client = socket.create_connection(('127.0.0.1', server.server_port), timeout=3.0)
+            client.sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+            self.assertIn(b'200 OK', client.recv(4096))
+            self.assertTrue(wait_until(lambda: self.broadcaster.viewer_count == 1))
+
+            # Viewer schließt den Tab - ohne neue Frames
+            client.close()
+            self.assertTrue(wait_until(lambda: self.broadcaster.viewer_count == 0))
+            self.assertTrue(wait_until(lambda: self.broadcaster._producer is None))
+        finally:
+            server.shutdown()
+
+if __name__ == '__main__':
+    unittest.main()
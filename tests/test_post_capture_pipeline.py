@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests der Post-Capture-Pipeline: bei voller Warteschlange wird der Upload trotzdem eingereiht
+"""
+
+import os
+import sys
+import threading
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import AppConfig
+from post_capture_pipeline import PostCapturePipeline
+
+class BlockingThumbnails:
+    """Hält den Worker im ersten Schritt fest, bis release gesetzt wird"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def warm(self, photo_path):
+        self.started.set()
+        self.release.wait(5.0)
+
+class RecordingUploadQueue:
+
+    def __init__(self):
+        self.paths = []
+
+    def enqueue(self, photo_path):
+        self.paths.append(photo_path)
+        return {'success': True, 'message': 'Upload eingereiht'}
+
+class PipelineOverflowTest(unittest.TestCase):
+
+    def setUp(self):
+        config = AppConfig()
+        config.pipeline_workers = 1
+        config.pipeline_queue_size = 1
+        config.overlay.enabled = False
+        config.printing.enabled = False
+        config.upload.enabled = True
+        config.upload.auto_upload = True
+        self.thumbnails = BlockingThumbnails()
+        self.uploads = RecordingUploadQueue()
+        self.pipeline = PostCapturePipeline(config, self.thumbnails, SimpleNamespace(),
+                                            SimpleNamespace(), self.uploads)
+
+    def tearDown(self):
+        self.thumbnails.release.set()
+
+    def test_full_queue_still_enqueues_upload(self):
+        self.pipeline.submit('/photos/photo_1.jpg')
+        self.assertTrue(self.thumbnails.started.wait(2.0))  # Worker belegt
+        self.pipeline.submit('/photos/photo_2.jpg')          # füllt die Warteschlange
+
+        status = self.pipeline.submit('/photos/photo_3.jpg')
+        self.assertEqual(status['status'], 'rejected')
+        self.assertEqual(status['stages']['upload']['status'], 'done')
+        self.assertEqual(status['stages']['overlay']['status'], 'skipped')
+        self.assertEqual(self.uploads.paths, ['/photos/photo_3.jpg'])
+
+if __name__ == '__main__':
+    unittest.main()
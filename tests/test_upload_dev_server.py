@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Tests der Upload-Pfade gegen den lokalen Upload-Server (Server_Upload/dev_server.py):
+Batch-Upload, Prüfsummen-Abfrage (auch für komprimierte Fotos) und Chunk-Upload
+"""
+
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'Server_Upload'))
+
+from werkzeug.serving import make_server
+
+from config import AppConfig
+from dev_server import create_app
+from upload_manager import UploadManager, http_session_pool
+
+API_KEY = 'geheim'
+
+def sha256_of(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def write_photo(path, size=(320, 240), noise=False):
+    """Schreibt ein Test-JPEG (mit Rauschen groß und schlecht komprimierbar)"""
+    if noise:
+        img = Image.frombytes('RGB', size, os.urandom(size[0] * size[1] * 3))
+    else:
+        img = Image.new('RGB', size, (200, 120, 40))
+    img.save(path, 'JPEG', quality=95)
+    return path
+
+def start_dev_server(upload_dir):
+    """Startet den Upload-Server auf einem freien Port"""
+    server = make_server('127.0.0.1', 0, create_app(upload_dir, API_KEY), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def point_at(upload_config, server):
+    upload_config.enabled = True
+    upload_config.upload_method = 'http'
+    upload_config.http_endpoint = f'http://127.0.0.1:{server.server_port}/upload.php'
+    upload_config.http_api_key = API_KEY
+
+def stored_photos(upload_dir):
+    return [os.path.join(root, name) for root, _, files in os.walk(upload_dir)
+            if '.partial' not in root for name in files if name.endswith('.jpg')]
+
+class UploadManagerDevServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix='fotobox_upload_test_')
+        self.upload_dir = os.path.join(self.tmp, 'server')
+        self.server = start_dev_server(self.upload_dir)
+        self.manager = self.new_manager('client')
+
+    def tearDown(self):
+        self.server.shutdown()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def new_manager(self, name):
+        """UploadManager mit eigenem Ledger (wie eine zweite Fotobox)"""
+        config = AppConfig()
+        config.temp_dir = os.path.join(self.tmp, name)
+        os.makedirs(config.temp_dir, exist_ok=True)
+        point_at(config.upload, self.server)
+        return UploadManager(config)
+
+    def server_stats(self):
+        return http_session_pool.request('GET', f'http://127.0.0.1:{self.server.server_port}/stats').json()
+
+    def test_upload_many_and_ledger_skip(self):
+        photos = [write_photo(os.path.join(self.tmp, f'photo_{i}.jpg'), size=(320 + i, 240)) for i in range(3)]
+
+        result = self.manager.upload_many(photos, concurrency=3)
+        self.assertTrue(result['success'], result)
+        self.assertEqual((result['uploaded'], result['skipped']), (3, 0))
+        self.assertEqual(self.server_stats()['uploads'], 3)
+        for photo, item in zip(photos, result['results']):
+            self.assertEqual(item['checksum'], sha256_of(photo))
+
+        again = self.manager.upload_many(photos)
+        self.assertEqual(again['skipped'], 3)
+        self.assertEqual(self.server_stats()['uploads'], 3)
+
+    def test_server_probe_finds_compressed_photo(self):
+        self.manager.upload_config.max_file_size = 0.2  # MB - Foto wird komprimiert
+        photo = write_photo(os.path.join(self.tmp, 'big.jpg'), size=(600, 400), noise=True)
+        self.assertGreater(os.path.getsize(photo), 0.2 * 1024 * 1024)
+
+        result = self.manager.upload_photo(photo)
+        self.assertTrue(result['success'], result)
+        self.assertEqual(result['checksum'], sha256_of(photo))
+        [stored] = stored_photos(self.upload_dir)
+        self.assertEqual(result['uploaded_checksum'], sha256_of(stored))
+        self.assertNotEqual(result['uploaded_checksum'], result['checksum'])
+
+        # Zweite Fotobox ohne Ledger-Eintrag: Server kennt das Original
+        other = self.new_manager('other')
+        other.upload_config.server_hash_probe = True
+        skipped = other.upload_photo(photo)
+        self.assertTrue(skipped.get('skipped'), skipped)
+        self.assertEqual(skipped['checksum'], result['checksum'])
+        self.assertEqual(skipped['url'], result['url'])
+        self.assertEqual(self.server_stats()['uploads'], 1)
+
+    def test_chunked_upload_hashes_once(self):
+        self.manager.upload_config.compress_images = False
+        self.manager.upload_config.chunked_upload = True
+        self.manager.upload_config.chunk_size_kb = 64
+        photo = write_photo(os.path.join(self.tmp, 'chunked.jpg'), size=(600, 400), noise=True)
+        self.assertGreater(os.path.getsize(photo), 3 * 64 * 1024)
+
+        calls = []
+        calculate = self.manager._calculate_checksum
+        self.manager._calculate_checksum = lambda path: calls.append(path) or calculate(path)
+
+        result = self.manager.upload_photo(photo)
+        self.assertTrue(result['success'], result)
+        self.assertIn('Teilstücken', result['message'])
+        self.assertEqual(calls, [photo])
+
+        [stored] = stored_photos(self.upload_dir)
+        self.assertEqual(sha256_of(stored), sha256_of(photo))
+
+        other = self.new_manager('other')
+        other.upload_config.server_hash_probe = True
+        self.assertTrue(other.upload_photo(photo).get('skipped'))
+
+class UploadBatchApiTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp(prefix='fotobox_app_test_')
+        cwd = os.getcwd()
+        os.chdir(cls.tmp)  # Ohne config.json: Standard-Konfiguration, Verzeichnisse im Temp-Ordner
+        try:
+            import app
+        finally:
+            os.chdir(cwd)
+        cls.app = app
+        app.config.photo_dir = os.path.join(cls.tmp, 'photos')
+        app.config.temp_dir = os.path.join(cls.tmp, 'temp')
+        cls.upload_dir = os.path.join(cls.tmp, 'server')
+        cls.server = start_dev_server(cls.upload_dir)
+        point_at(app.upload_manager.upload_config, cls.server)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        shutil.rmtree(cls.tmp, ignore_errors=True)
+
+    def test_upload_batch(self):
+        names = [f'photo_2026101{i}.jpg' for i in range(4)]
+        for i, name in enumerate(names):
+            write_photo(os.path.join(self.app.config.photo_dir, name), size=(300, 200 + i))
+
+        worker_starts = self.app.image_workers.get_stats()['worker_starts']
+        client = self.app.app.test_client()
+        response = client.post('/api/upload_batch', json={'filenames': names, 'concurrency': 2})
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertTrue(data['success'], data)
+        self.assertEqual((data['uploaded'], data['concurrency']), (4, 2))
+        self.assertEqual(len(stored_photos(self.upload_dir)), 4)
+        # Kleine Fotos brauchen keine Komprimierung - kein Umweg über Worker-Prozesse
+        self.assertEqual(self.app.image_workers.get_stats()['worker_starts'], worker_starts)
+
+        response = client.post('/api/upload_batch', json={'filenames': names})
+        self.assertEqual(response.get_json()['skipped'], 4)
+
+if __name__ == '__main__':
+    unittest.main()
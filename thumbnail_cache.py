@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Fotobox Thumbnail-Cache
+Erzeugt verkleinerte Versionen (Thumbnail/Bildschirm) der Fotos einmalig und
+hält sie mit LRU-Verdrängung unter einem konfigurierbaren Speicherbudget
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from PIL import Image, ImageOps
+
+# Unterstützte Größen (Original = 'full')
+DERIVATIVE_SIZES = ('thumb', 'screen')
+
+class ThumbnailCache:
+    """Festplatten-Cache für verkleinerte Foto-Versionen"""
+
+    def __init__(self, config):
+        self.config = config
+        self.cache_dir = os.path.abspath(os.path.join(config.temp_dir, 'thumbnails'))
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # Dateiname -> Bytes, älteste zuerst
+        self._total_bytes = 0
+        self._load_index()
+
+    @property
+    def max_bytes(self) -> int:
+        """Speicherbudget in Bytes"""
+        return self.config.thumbnail_cache_mb * 1024 * 1024
+
+    def _dimension_for(self, size: str) -> int:
+        """Maximale Kantenlänge für eine Größe"""
+        if size == 'thumb':
+            return self.config.gallery_thumbnail_size
+        return self.config.gallery_screen_size
+
+    def _load_index(self):
+        """Baut den LRU-Index aus vorhandenen Cache-Dateien auf (Reihenfolge nach letztem Zugriff)"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith('.jpg'):
+                    stat = entry.stat()
+                    entries.append((stat.st_atime, entry.name, stat.st_size))
+
+        for _, name, size in sorted(entries):
+            self._entries[name] = size
+            self._total_bytes += size
+
+    def _cache_name(self, source_path: str, size: str) -> Optional[str]:
+        """Cache-Dateiname aus Quelldatei, mtime und Dateigröße"""
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            return None
+        filename = os.path.basename(source_path)
+        return f"{filename}.{size}.{stat.st_mtime_ns:x}.{stat.st_size:x}.jpg"
+
+    def get_path(self, source_path: str, size: str = 'thumb') -> Optional[str]:
+        """
+        Gibt Pfad zur gewünschten Größe zurück und erzeugt sie bei Bedarf
+
+        Args:
+            source_path: Pfad zum Original-Foto
+            size: 'thumb', 'screen' oder 'full'
+
+        Returns:
+            Pfad zur Datei oder None falls das Original fehlt
+        """
+        if size not in DERIVATIVE_SIZES:
+            return source_path if os.path.exists(source_path) else None
+
+        name = self._cache_name(source_path, size)
+        if name is None:
+            return None
+        cache_path = os.path.join(self.cache_dir, name)
+
+        with self._lock:
+            if name in self._entries:
+                self._entries.move_to_end(name)
+                hit = True
+            else:
+                hit = False
+                key_lock = self._key_locks.setdefault(name, threading.Lock())
+
+        if hit:
+            try:
+                # Nur Zugriffszeit setzen (LRU nach Neustart), mtime bleibt für ETags stabil
+                stat = os.stat(cache_path)
+                os.utime(cache_path, ns=(time.time_ns(), stat.st_mtime_ns))
+                return cache_path
+            except OSError:
+                # Datei extern gelöscht - neu erzeugen
+                with self._lock:
+                    self._forget(name)
+                    key_lock = self._key_locks.setdefault(name, threading.Lock())
+
+        with key_lock:
+            # Ein paralleler Request hat die Datei evtl. bereits erzeugt
+            with self._lock:
+                if name in self._entries:
+                    return cache_path
+
+            try:
+                self._generate(source_path, cache_path, self._dimension_for(size))
+            except Exception as e:
+                print(f"⚠️ Fehler beim Erzeugen der Vorschau ({size}): {e}")
+                return source_path
+            finally:
+                with self._lock:
+                    self._key_locks.pop(name, None)
+
+            with self._lock:
+                self._drop_stale_variants(os.path.basename(source_path), size, name)
+                if name not in self._entries:
+                    bytes_written = os.path.getsize(cache_path)
+                    self._entries[name] = bytes_written
+                    self._total_bytes += bytes_written
+                    self._evict()
+
+        return cache_path
+
+    def _generate(self, source_path: str, cache_path: str, max_dimension: int):
+        """Erzeugt eine verkleinerte JPEG-Version (mit DCT-Skalierung beim Dekodieren)"""
+        with Image.open(source_path) as img:
+            # JPEG direkt in reduzierter Auflösung dekodieren (1/2, 1/4, 1/8)
+            img.draft('RGB', (max_dimension, max_dimension))
+            img = ImageOps.exif_transpose(img)
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+            temp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+            img.save(temp_path, 'JPEG', quality=85)
+            os.replace(temp_path, cache_path)
+
+    def _drop_stale_variants(self, filename: str, size: str, current: str):
+        """Entfernt veraltete Versionen desselben Fotos (Original wurde geändert)"""
+        prefix = f"{filename}.{size}."
+        for name in [n for n in self._entries if n.startswith(prefix) and n != current]:
+            self._remove(name)
+
+    def _evict(self):
+        """Verdrängt am längsten nicht genutzte Einträge bis das Budget eingehalten ist"""
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            name = next(iter(self._entries))
+            self._remove(name)
+
+    def _remove(self, name: str):
+        """Löscht Cache-Datei und Index-Eintrag"""
+        self._forget(name)
+        try:
+            os.remove(os.path.join(self.cache_dir, name))
+        except OSError:
+            pass
+
+    def _forget(self, name: str):
+        """Entfernt Index-Eintrag"""
+        size = self._entries.pop(name, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def warm(self, source_path: str):
+        """Erzeugt alle Vorschaugrößen für ein Foto"""
+        for size in DERIVATIVE_SIZES:
+            self.get_path(source_path, size)
+
+    def warm_async(self, source_path: str):
+        """Erzeugt Vorschaugrößen im Hintergrund (direkt nach der Aufnahme)"""
+        thread = threading.Thread(target=self.warm, args=(source_path,), daemon=True)
+        thread.start()
+        return thread
+
+    def get_stats(self) -> Dict[str, int]:
+        """Gibt Cache-Statistiken zurück"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes
+            }
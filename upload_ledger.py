@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Fotobox Upload-Ledger
+Inhaltsadressiertes Verzeichnis erfolgreich hochgeladener Fotos (SHA-256),
+damit identische Dateien nicht erneut übertragen werden
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import datetime
+from typing import Dict, Optional
+
+LEDGER_FILENAME = 'upload_ledger.sqlite'
+
+class UploadLedger:
+    """Speichert Prüfsummen bereits hochgeladener Fotos"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self._skipped = 0
+        self._bytes_saved = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Öffnet die Ledger-Datenbank"""
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS uploaded (
+                checksum TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                method TEXT NOT NULL,
+                remote TEXT,
+                uploaded REAL NOT NULL
+            )
+        ''')
+        conn.commit()
+        return conn
+
+    def lookup(self, checksum: str) -> Optional[Dict]:
+        """Gibt den Ledger-Eintrag zu einer Prüfsumme zurück (oder None)"""
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM uploaded WHERE checksum = ?', (checksum,)).fetchone()
+        if row is None:
+            return None
+        return {
+            'checksum': row['checksum'],
+            'filename': row['filename'],
+            'size': row['size'],
+            'method': row['method'],
+            'remote': row['remote'],
+            'uploaded': datetime.datetime.fromtimestamp(row['uploaded']).isoformat()
+        }
+
+    def record(self, checksum: str, filename: str, size: int, method: str, remote: Optional[str] = None):
+        """Merkt sich einen erfolgreichen Upload"""
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO uploaded (checksum, filename, size, method, remote, uploaded) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (checksum, filename, size, method, remote, time.time())
+            )
+            self._conn.commit()
+
+    def record_skip(self, size: int):
+        """Zählt einen übersprungenen Duplikat-Upload"""
+        with self._lock:
+            self._skipped += 1
+            self._bytes_saved += size
+
+    def clear(self) -> int:
+        """Leert das Ledger (erzwingt erneute Uploads)"""
+        with self._lock:
+            count = self._conn.execute('DELETE FROM uploaded').rowcount
+            self._conn.commit()
+        return count
+
+    def get_stats(self) -> Dict:
+        """Gibt Anzahl der Einträge und eingesparte Bytes zurück"""
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM uploaded'
+            ).fetchone()
+            return {
+                'entries': entries,
+                'bytes_uploaded': total_bytes,
+                'duplicates_skipped': self._skipped,
+                'bytes_saved': self._bytes_saved
+            }
@@ -7,14 +7,506 @@ Verwaltet Upload von Fotos auf Server via HTTP/SFTP
 import os
 import requests
 import json
-from typing import Dict, Optional
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import paramiko
 import ftplib
+import io
 from PIL import Image
 import tempfile
 import hashlib
 import datetime
 from urllib.parse import urljoin
+from upload_ledger import UploadLedger, LEDGER_FILENAME
+
+# Connection-Pool für HTTP-Uploads
+HTTP_POOL_CONNECTIONS = 4   # Anzahl gecachter Hosts
+HTTP_POOL_MAXSIZE = 8       # Keep-Alive-Verbindungen pro Host
+
+class HTTPSessionPool:
+    """Langlebige requests.Session mit Keep-Alive-Pool und Retry-Adapter für alle Upload-HTTP-Zugriffe"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._session = None
+        self._adapter = None
+        self._stats = {'requests': 0, 'errors': 0}
+    
+    @property
+    def session(self) -> requests.Session:
+        """Erzeugt die Session beim ersten Zugriff"""
+        with self._lock:
+            if self._session is None:
+                # Nur Verbindungsfehler wiederholen (vor dem Senden des Bodys) sowie
+                # 502/503/504 bei idempotenten Methoden - Upload-Wiederholungen
+                # übernimmt die Upload-Warteschlange
+                retry = Retry(
+                    total=3,
+                    connect=3,
+                    read=0,
+                    status=2,
+                    backoff_factor=0.5,
+                    status_forcelist=(502, 503, 504),
+                    allowed_methods=frozenset({'GET', 'HEAD', 'OPTIONS'}),
+                    raise_on_status=False
+                )
+                self._adapter = HTTPAdapter(
+                    pool_connections=HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=HTTP_POOL_MAXSIZE,
+                    max_retries=retry
+                )
+                session = requests.Session()
+                session.mount('http://', self._adapter)
+                session.mount('https://', self._adapter)
+                session.headers['User-Agent'] = 'Fotobox-Uploader'
+                self._session = session
+            return self._session
+    
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Führt einen HTTP-Request über den gemeinsamen Pool aus"""
+        session = self.session
+        with self._lock:
+            self._stats['requests'] += 1
+        try:
+            return session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            with self._lock:
+                self._stats['errors'] += 1
+            raise
+    
+    def get_stats(self) -> Dict[str, any]:
+        """Gibt Pool-Statistiken zurück (Requests vs. neu aufgebaute Verbindungen)"""
+        with self._lock:
+            stats = dict(self._stats)
+            pools = []
+            if self._adapter is not None:
+                pool_manager = self._adapter.poolmanager
+                for key in list(pool_manager.pools.keys()):
+                    pool = pool_manager.pools.get(key)
+                    if pool is None:
+                        continue
+                    pools.append({
+                        'host': f"{pool.scheme}://{pool.host}:{pool.port}",
+                        'connections_opened': pool.num_connections,
+                        'requests': pool.num_requests,
+                        'idle_connections': sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0,
+                        'max_size': HTTP_POOL_MAXSIZE
+                    })
+        
+        stats['pools'] = pools
+        stats['connections_opened'] = sum(p['connections_opened'] for p in pools)
+        return stats
+
+# Gemeinsamer HTTP-Pool für Uploads, Verbindungstests und Server-Konfiguration
+http_session_pool = HTTPSessionPool()
+
+# Bandbreiten-Steuerung
+SHAPED_BLOCK_SIZE = 64 * 1024   # Sendeblöcke bei aktivem Limit (gleichmäßiger Datenstrom)
+THROUGHPUT_WINDOW = 10.0        # Sekunden für die gemessene Übertragungsrate
+BUSY_HOLD_SECONDS = 5.0         # Nach gemeldeter Aktivität so lange als 'busy' werten
+
+class BandwidthShaper:
+    """
+    Token-Bucket für Upload-Bandbreite mit drei Betriebsarten:
+    
+    - busy:   Aufnahme/Countdown/Live-View aktiv -> bandwidth_busy_kbps (0 = Uploads pausieren)
+    - normal: bandwidth_limit_kbps (0 = unbegrenzt)
+    - idle:   keine Aktivität seit bandwidth_idle_after Sekunden -> unbegrenzt (Nachholen)
+    """
+    
+    def __init__(self, upload_config):
+        self.upload_config = upload_config
+        self._lock = threading.Lock()
+        self._activity_probes: List[Callable[[], bool]] = []
+        self._last_activity = time.monotonic()
+        self._tokens = 0.0
+        self._last_refill = time.monotonic()
+        self._samples = deque()  # (Zeitpunkt, Bytes) im Messfenster
+        self._bytes_sent = 0
+        self._throttled_seconds = 0.0
+    
+    def add_activity_probe(self, probe: Callable[[], bool]):
+        """Registriert eine Funktion, die True liefert solange die Fotobox aktiv benutzt wird"""
+        self._activity_probes.append(probe)
+    
+    def notify_activity(self):
+        """Meldet Benutzer-Aktivität (Aufnahme, Preview-Abfrage, ...)"""
+        self._last_activity = time.monotonic()
+    
+    def current_mode(self) -> str:
+        """Aktuelle Betriebsart: 'busy', 'normal' oder 'idle'"""
+        for probe in self._activity_probes:
+            try:
+                if probe():
+                    self.notify_activity()
+                    return 'busy'
+            except Exception:
+                pass
+        
+        if time.monotonic() - self._last_activity < BUSY_HOLD_SECONDS:
+            return 'busy'
+        if time.monotonic() - self._last_activity >= self.upload_config.bandwidth_idle_after:
+            return 'idle'
+        return 'normal'
+    
+    def current_rate(self, mode: Optional[str] = None) -> Optional[float]:
+        """Erlaubte Rate in Bytes/s (None = unbegrenzt, 0 = pausiert)"""
+        mode = mode or self.current_mode()
+        if mode == 'busy':
+            return max(self.upload_config.bandwidth_busy_kbps, 0) * 125.0
+        if mode == 'normal' and self.upload_config.bandwidth_limit_kbps > 0:
+            return self.upload_config.bandwidth_limit_kbps * 125.0
+        return None
+    
+    def block_size(self) -> int:
+        """Blockgröße beim Lesen: klein bei aktivem Limit, groß ohne Limit"""
+        return UPLOAD_BUFFER_SIZE if self.current_rate() is None else SHAPED_BLOCK_SIZE
+    
+    def consume(self, nbytes: int):
+        """Wartet bis nbytes gesendet werden dürfen"""
+        waited = 0.0
+        while True:
+            rate = self.current_rate()
+            with self._lock:
+                now = time.monotonic()
+                if rate is None:
+                    self._tokens = 0.0
+                    self._last_refill = now
+                    break
+                
+                if rate == 0:
+                    # Pausiert - nichts ansparen, Betriebsart regelmäßig neu prüfen
+                    self._tokens = 0.0
+                    self._last_refill = now
+                    wait = 0.5
+                else:
+                    # Bucket fasst eine Sekunde; größere Blöcke gehen bei vollem Bucket (Schuld)
+                    capacity = rate
+                    self._tokens = min(self._tokens + (now - self._last_refill) * rate, capacity)
+                    self._last_refill = now
+                    needed = min(nbytes, capacity)
+                    if self._tokens >= needed:
+                        self._tokens -= nbytes
+                        break
+                    wait = (needed - self._tokens) / rate
+            
+            # Kurz schlafen und Betriebsart neu prüfen (Burst sobald die Box frei ist)
+            pause = min(wait, 0.5)
+            time.sleep(pause)
+            waited += pause
+        
+        with self._lock:
+            now = time.monotonic()
+            self._bytes_sent += nbytes
+            self._throttled_seconds += waited
+            self._samples.append((now, nbytes))
+            while self._samples and now - self._samples[0][0] > THROUGHPUT_WINDOW:
+                self._samples.popleft()
+    
+    def get_stats(self) -> Dict[str, any]:
+        """Gibt Betriebsart, aktuelles Limit und gemessenen Durchsatz zurück"""
+        mode = self.current_mode()
+        rate = self.current_rate(mode)
+        with self._lock:
+            now = time.monotonic()
+            while self._samples and now - self._samples[0][0] > THROUGHPUT_WINDOW:
+                self._samples.popleft()
+            window_bytes = sum(n for _, n in self._samples)
+            bytes_sent = self._bytes_sent
+            throttled = self._throttled_seconds
+        
+        throughput_kbps = window_bytes * 8 / 1000 / THROUGHPUT_WINDOW
+        if rate is None:
+            limit = 'unbegrenzt'
+        elif rate == 0:
+            limit = 'pausiert'
+        else:
+            limit = f"{rate / 125:.0f} kbit/s"
+        return {
+            'mode': mode,
+            'limit_kbps': round(rate / 125) if rate is not None else None,
+            'limit': limit,
+            'throughput_kbps': round(throughput_kbps, 1),
+            'throughput': f"{throughput_kbps / 1000:.2f} Mbit/s",
+            'bytes_sent': bytes_sent,
+            'sent': f"{bytes_sent / (1024 * 1024):.1f} MB",
+            'throttled_seconds': round(throttled, 1)
+        }
+
+class ShapedBytes:
+    """Request-Body aus einem Bytes-Block, der über den BandwidthShaper gesendet wird"""
+    
+    def __init__(self, data: bytes, shaper: BandwidthShaper):
+        self._data = data
+        self._shaper = shaper
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def __iter__(self) -> Iterator[bytes]:
+        view = memoryview(self._data)
+        offset = 0
+        while offset < len(view):
+            block = view[offset:offset + self._shaper.block_size()]
+            self._shaper.consume(len(block))
+            offset += len(block)
+            yield bytes(block)
+
+# Streaming-Upload
+UPLOAD_BUFFER_SIZE = 1024 * 1024  # 1 MB Lesepuffer (SD-Karte des Raspberry Pi)
+CHECKSUM_PLACEHOLDER = '?' * 64   # Gleiche Länge wie ein SHA-256-Hexdigest
+CHUNK_RETRIES = 3                 # Wiederholungen pro Teilstück bevor der Upload abbricht
+
+class ChecksumReader:
+    """Datei-Wrapper, der beim Lesen die SHA-256-Prüfsumme mitberechnet"""
+    
+    def __init__(self, fileobj, shaper: Optional[BandwidthShaper] = None):
+        self._file = fileobj
+        self._hash = hashlib.sha256()
+        self._shaper = shaper
+        self.bytes_read = 0
+    
+    def read(self, size: int = -1) -> bytes:
+        data = self._file.read(size)
+        self._hash.update(data)
+        self.bytes_read += len(data)
+        if self._shaper is not None and data:
+            self._shaper.consume(len(data))
+        return data
+    
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+class MultipartUploadBody:
+    """
+    Streamender multipart/form-data-Body (Foto + Metadaten) mit bekannter Länge
+    
+    Das Foto wird in einem Durchgang gelesen, gehasht und gesendet; das Metadaten-Feld
+    folgt nach dem Foto und enthält die dabei berechnete Prüfsumme.
+    """
+    
+    def __init__(self, photo_path: str, filename: str, metadata: Dict,
+                 field_name: str = 'photo', content_type: str = 'image/jpeg',
+                 shaper: Optional[BandwidthShaper] = None):
+        self.photo_path = photo_path
+        self.shaper = shaper
+        self.file_size = os.path.getsize(photo_path)
+        self.checksum = None
+        self.boundary = uuid.uuid4().hex
+        
+        safe_filename = filename.replace('"', '%22')
+        self._head = (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{field_name}"; filename="{safe_filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        ).encode('utf-8')
+        self._middle = (
+            f'\r\n--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="metadata"\r\n\r\n'
+        ).encode('utf-8')
+        self._metadata = json.dumps(metadata).encode('utf-8')
+        self._tail = f'\r\n--{self.boundary}--\r\n'.encode('utf-8')
+    
+    @property
+    def content_type(self) -> str:
+        return f'multipart/form-data; boundary={self.boundary}'
+    
+    def __len__(self) -> int:
+        return (len(self._head) + self.file_size + len(self._middle)
+                + len(self._metadata) + len(self._tail))
+    
+    def __iter__(self) -> Iterator[bytes]:
+        yield self._head
+        
+        with open(self.photo_path, 'rb', buffering=UPLOAD_BUFFER_SIZE) as f:
+            reader = ChecksumReader(f, self.shaper)
+            while True:
+                block_size = self.shaper.block_size() if self.shaper else UPLOAD_BUFFER_SIZE
+                chunk = reader.read(block_size)
+                if not chunk:
+                    break
+                yield chunk
+        self.checksum = reader.hexdigest()
+        
+        yield self._middle
+        yield self._metadata.replace(CHECKSUM_PLACEHOLDER.encode('ascii'), self.checksum.encode('ascii'), 1)
+        yield self._tail
+
+# SFTP-Verbindung
+SFTP_KEEPALIVE_INTERVAL = 30  # Sekunden zwischen SSH-Keepalive-Paketen
+SFTP_CONNECT_TIMEOUT = 30
+
+class SFTPConnection:
+    """Dauerhaft gehaltene SFTP-Verbindung mit Keepalive, automatischem Neuaufbau und Verzeichnis-Cache"""
+    
+    def __init__(self, upload_config, shaper: Optional[BandwidthShaper] = None):
+        self.upload_config = upload_config
+        self.shaper = shaper
+        self._lock = threading.RLock()  # Verbindungszustand, Verzeichnis-Cache, Statistik (nur kurz gehalten)
+        self._transfer_lock = threading.Lock()  # Eine Übertragung zur Zeit (inkl. Drosselung)
+        self._ssh_client = None
+        self._sftp_client = None
+        self._connection_key = None
+        self._known_dirs = set()
+        self._stats = {'connects': 0, 'reconnects': 0, 'uploads': 0, 'directories_created': 0}
+    
+    def _current_key(self) -> tuple:
+        """Verbindungsparameter - bei Änderung wird neu verbunden"""
+        return (
+            self.upload_config.sftp_host,
+            self.upload_config.sftp_port,
+            self.upload_config.sftp_username,
+            self.upload_config.sftp_password
+        )
+    
+    def _is_alive(self) -> bool:
+        """Prüft ob die SSH-Transportverbindung noch aktiv ist"""
+        if self._ssh_client is None or self._sftp_client is None:
+            return False
+        transport = self._ssh_client.get_transport()
+        return transport is not None and transport.is_active()
+    
+    def _connect(self):
+        """Baut SSH- und SFTP-Verbindung (neu) auf"""
+        had_connection = self._ssh_client is not None
+        self.close()
+        
+        ssh_client = paramiko.SSHClient()
+        ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        ssh_client.connect(
+            hostname=self.upload_config.sftp_host,
+            port=self.upload_config.sftp_port,
+            username=self.upload_config.sftp_username,
+            password=self.upload_config.sftp_password,
+            timeout=SFTP_CONNECT_TIMEOUT
+        )
+        ssh_client.get_transport().set_keepalive(SFTP_KEEPALIVE_INTERVAL)
+        
+        self._ssh_client = ssh_client
+        self._sftp_client = ssh_client.open_sftp()
+        self._connection_key = self._current_key()
+        self._stats['connects'] += 1
+        if had_connection:
+            self._stats['reconnects'] += 1
+        print(f"🔐 SFTP-Verbindung zu {self.upload_config.sftp_host} aufgebaut")
+    
+    def get_client(self) -> paramiko.SFTPClient:
+        """Gibt den SFTP-Client zurück und verbindet bei Bedarf neu"""
+        with self._lock:
+            if self._connection_key != self._current_key() or not self._is_alive():
+                self._connect()
+            return self._sftp_client
+    
+    def ensure_directory(self, directory: str):
+        """Stellt sicher, dass ein Remote-Verzeichnis existiert (bekannte Verzeichnisse ohne Roundtrip)"""
+        with self._lock:
+            if directory in self._known_dirs:
+                return
+            
+            sftp_client = self.get_client()
+            
+            # Von unten nach oben das erste existierende Verzeichnis suchen
+            missing = []
+            current = directory
+            while current and current != '/' and current not in self._known_dirs:
+                try:
+                    sftp_client.stat(current)
+                    break
+                except FileNotFoundError:
+                    missing.append(current)
+                    current = os.path.dirname(current).replace('\\', '/')
+            
+            for path in reversed(missing):
+                try:
+                    sftp_client.mkdir(path)
+                    self._stats['directories_created'] += 1
+                except IOError:
+                    # Parallel angelegt - nur fehlschlagen wenn es wirklich fehlt
+                    sftp_client.stat(path)
+            
+            self._known_dirs.add(directory)
+    
+    def upload(self, local_path: str, remote_path: str,
+               extra_files: Optional[Dict[str, Union[bytes, Callable[[str], bytes]]]] = None) -> str:
+        """
+        Lädt eine Datei (plus kleine In-Memory-Dateien) über die bestehende Verbindung hoch
+        
+        Bei Verbindungsabbruch wird einmal neu verbunden und wiederholt. Übertragungen
+        laufen nacheinander unter einer eigenen Sperre; die Verbindungssperre wird nur für
+        Verbindungsaufbau, Verzeichnisse und Statistik gehalten (get_stats blockiert nicht).
+        
+        Args:
+            local_path: Lokale Datei
+            remote_path: Ziel-Pfad auf dem Server
+            extra_files: Zusätzliche Dateien {Remote-Pfad: Inhalt oder Funktion(Prüfsumme) -> Inhalt}
+            
+        Returns:
+            SHA-256 der übertragenen Datei (beim Senden berechnet)
+        """
+        remote_dir = os.path.dirname(remote_path).replace('\\', '/')
+        
+        with self._transfer_lock:
+            for attempt in (1, 2):
+                try:
+                    self.ensure_directory(remote_dir)
+                    sftp_client = self.get_client()
+                    
+                    # putfo schreibt pipelined (ohne auf jede Schreibbestätigung zu warten)
+                    with open(local_path, 'rb', buffering=UPLOAD_BUFFER_SIZE) as f:
+                        reader = ChecksumReader(f, self.shaper)
+                        sftp_client.putfo(reader, remote_path, file_size=os.path.getsize(local_path), confirm=True)
+                    checksum = reader.hexdigest()
+                    
+                    for extra_path, content in (extra_files or {}).items():
+                        if callable(content):
+                            content = content(checksum)
+                        sftp_client.putfo(io.BytesIO(content), extra_path, file_size=len(content), confirm=False)
+                    
+                    with self._lock:
+                        self._stats['uploads'] += 1
+                    return checksum
+                except FileNotFoundError:
+                    # Remote-Verzeichnis wurde extern gelöscht - Cache verwerfen
+                    if attempt == 2:
+                        raise
+                    with self._lock:
+                        self._known_dirs.discard(remote_dir)
+                except paramiko.AuthenticationException:
+                    raise
+                except (paramiko.SSHException, EOFError, OSError):
+                    if attempt == 2:
+                        raise
+                    print("⚠️ SFTP-Verbindung unterbrochen - verbinde neu")
+                    self.close()
+    
+    def close(self):
+        """Schließt die Verbindung"""
+        with self._lock:
+            for client in (self._sftp_client, self._ssh_client):
+                if client is not None:
+                    try:
+                        client.close()
+                    except Exception:
+                        pass
+            self._sftp_client = None
+            self._ssh_client = None
+            self._connection_key = None
+            self._known_dirs.clear()
+    
+    def get_stats(self) -> Dict[str, any]:
+        """Gibt Verbindungsstatistiken zurück"""
+        with self._lock:
+            return {
+                **self._stats,
+                'connected': self._is_alive(),
+                'known_directories': len(self._known_dirs)
+            }
 
 class UploadManager:
     """Manager für Foto-Upload"""
@@ -22,14 +514,31 @@ class UploadManager:
     def __init__(self, config):
         self.config = config
         self.upload_config = config.upload
+        self.bandwidth = BandwidthShaper(self.upload_config)
+        self.sftp_connection = SFTPConnection(self.upload_config, self.bandwidth)
+        self.image_workers = None  # ImageWorkerPool: Komprimierung in Worker-Prozessen (optional)
+        self._ledger = None
+        self._ledger_lock = threading.Lock()
+    
+    @property
+    def ledger(self) -> UploadLedger:
+        """Upload-Ledger (wird erst bei Bedarf geöffnet, z.B. nicht in Bild-Worker-Prozessen)"""
+        with self._ledger_lock:
+            if self._ledger is None:
+                self._ledger = UploadLedger(os.path.join(self.config.temp_dir, LEDGER_FILENAME))
+            return self._ledger
         
-    def upload_photo(self, photo_path: str, metadata: Optional[Dict] = None) -> Dict[str, any]:
+    def upload_photo(self, photo_path: str, metadata: Optional[Dict] = None,
+                     force: bool = False) -> Dict[str, any]:
         """
         Lädt ein Foto auf den konfigurierten Server hoch
         
+        Bereits hochgeladene Inhalte (gleiche SHA-256) werden übersprungen.
+        
         Args:
             photo_path: Pfad zum Foto
             metadata: Zusätzliche Metadaten (optional)
+            force: Auch bereits hochgeladene Fotos erneut senden
             
         Returns:
             Dictionary mit Upload-Ergebnis
@@ -47,9 +556,27 @@ class UploadManager:
             }
         
         try:
-            # Bereite Foto für Upload vor
-            upload_ready_path = self._prepare_photo_for_upload(photo_path)
-            upload_metadata = self._prepare_metadata(photo_path, metadata)
+            # Duplikate am Inhalt erkennen - identische Bytes nicht erneut übertragen
+            checksum = self._calculate_checksum(photo_path)
+            if not force:
+                duplicate = self._find_duplicate(checksum, photo_path)
+                if duplicate:
+                    self.ledger.record_skip(os.path.getsize(photo_path))
+                    return {
+                        'success': True,
+                        'skipped': True,
+                        'message': 'Foto bereits hochgeladen - Duplikat übersprungen',
+                        'checksum': checksum,
+                        'url': duplicate.get('remote') or '',
+                        'upload_method': duplicate['method']
+                    }
+            
+            # Bereite Foto und Metadaten in einem Durchgang vor (Prüfsumme wird weitergereicht);
+            # nur die Komprimierung lohnt den Weg über einen Worker-Prozess
+            if self.image_workers is not None and self._needs_compression(photo_path):
+                upload_ready_path, upload_metadata = self.image_workers.prepare_upload(photo_path, metadata, checksum)
+            else:
+                upload_ready_path, upload_metadata = self._prepare_upload(photo_path, metadata, checksum)
             
             # Wähle Upload-Methode
             if self.upload_config.upload_method == 'http':
@@ -68,6 +595,19 @@ class UploadManager:
             if upload_ready_path != photo_path:
                 os.remove(upload_ready_path)
             
+            if result.get('success'):
+                # Ergebnis, Ledger und Server-Index verwenden dieselbe Prüfsumme (Original)
+                if result.get('checksum') and result['checksum'] != checksum:
+                    result['uploaded_checksum'] = result['checksum']
+                result['checksum'] = checksum
+                self.ledger.record(
+                    checksum,
+                    os.path.basename(photo_path),
+                    os.path.getsize(photo_path),
+                    result.get('upload_method', self.upload_config.upload_method),
+                    result.get('url') or result.get('remote_path')
+                )
+            
             return result
             
         except Exception as e:
@@ -76,54 +616,130 @@ class UploadManager:
                 'message': f'Upload-Fehler: {str(e)}'
             }
     
-    def _prepare_photo_for_upload(self, photo_path: str) -> str:
-        """Bereitet Foto für Upload vor (Komprimierung, Thumbnail)"""
-        if not self.upload_config.compress_images:
-            return photo_path
+    def _find_duplicate(self, checksum: str, photo_path: str) -> Optional[Dict]:
+        """Sucht eine Prüfsumme im lokalen Ledger und optional auf dem Server"""
+        entry = self.ledger.lookup(checksum)
+        if entry:
+            return entry
+        
+        if self.upload_config.server_hash_probe and self.upload_config.upload_method == 'http':
+            remote = self._probe_server_checksum(checksum)
+            if remote is not None:
+                # Server kennt das Foto bereits - lokal merken
+                self.ledger.record(checksum, os.path.basename(photo_path), os.path.getsize(photo_path),
+                                   'http', remote.get('url'))
+                return self.ledger.lookup(checksum)
+        
+        return None
+    
+    def _probe_server_checksum(self, checksum: str) -> Optional[Dict]:
+        """
+        Pre-Flight-Abfrage: GET <http_endpoint>?checksum=<sha256>
+        
+        Returns:
+            Server-Eintrag falls vorhanden, sonst None (auch bei Fehlern - dann wird hochgeladen)
+        """
+        if not self.upload_config.http_endpoint:
+            return None
+        
+        headers = {}
+        if self.upload_config.http_api_key:
+            headers['Authorization'] = f'Bearer {self.upload_config.http_api_key}'
         
         try:
-            with Image.open(photo_path) as img:
-                # Konvertiere zu RGB falls nötig
-                if img.mode in ('RGBA', 'P'):
-                    img = img.convert('RGB')
-                
-                # Prüfe Dateigröße
-                original_size = os.path.getsize(photo_path) / (1024 * 1024)  # MB
-                
-                if original_size <= self.upload_config.max_file_size:
-                    return photo_path
-                
-                # Komprimiere Bild
-                quality = self.upload_config.compression_quality
-                
-                # Berechne neue Dimensionen falls nötig
-                max_dimension = 2048  # Maximale Breite/Höhe
-                if max(img.size) > max_dimension:
-                    ratio = max_dimension / max(img.size)
-                    new_size = (int(img.width * ratio), int(img.height * ratio))
-                    img = img.resize(new_size, Image.Resampling.LANCZOS)
-                
-                # Speichere komprimierte Version
-                temp_fd, temp_path = tempfile.mkstemp(suffix='.jpg', prefix='fotobox_upload_')
-                os.close(temp_fd)
-                
-                img.save(temp_path, 'JPEG', quality=quality, optimize=True)
-                
-                # Prüfe ob Komprimierung erfolgreich war
-                compressed_size = os.path.getsize(temp_path) / (1024 * 1024)
-                if compressed_size <= self.upload_config.max_file_size:
-                    return temp_path
-                else:
-                    os.remove(temp_path)
-                    return photo_path  # Verwende Original falls Komprimierung nicht ausreicht
-                    
-        except Exception as e:
-            print(f"⚠️ Fehler bei Foto-Vorbereitung: {e}")
-            return photo_path
+            response = http_session_pool.request(
+                'GET',
+                self.upload_config.http_endpoint,
+                params={'checksum': checksum},
+                headers=headers,
+                timeout=10
+            )
+            if response.status_code != 200:
+                return None
+            data = response.json()
+            if isinstance(data, dict) and data.get('exists'):
+                return data.get('data') or {}
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"⚠️ Prüfsummen-Abfrage fehlgeschlagen: {e}")
+        
+        return None
+    
+    def upload_many(self, photo_paths: List[str], metadata: Optional[Dict] = None,
+                    concurrency: Optional[int] = None) -> Dict[str, any]:
+        """
+        Lädt mehrere Fotos mit begrenzter Parallelität hoch
+        
+        Alle Requests teilen sich den Keep-Alive-Pool bzw. die SFTP-Verbindung. SFTP
+        überträgt nacheinander über einen Kanal - dort wird mit einem Upload gearbeitet.
+        
+        Args:
+            photo_paths: Pfade der Fotos
+            metadata: Zusätzliche Metadaten für alle Fotos (optional)
+            concurrency: Parallele Uploads (Standard: batch_concurrency)
+            
+        Returns:
+            Dictionary mit Einzelergebnissen und Durchsatz
+        """
+        workers = concurrency or self.upload_config.batch_concurrency
+        workers = max(1, min(workers, HTTP_POOL_MAXSIZE, len(photo_paths) or 1))
+        if self.upload_config.upload_method == 'sftp':
+            workers = 1
+        
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='upload-batch') as executor:
+            results = list(executor.map(lambda path: self.upload_photo(path, metadata), photo_paths))
+        duration = time.monotonic() - started
+        
+        items = []
+        uploaded_bytes = 0
+        for photo_path, result in zip(photo_paths, results):
+            items.append({'filename': os.path.basename(photo_path), **result})
+            if result.get('success') and not result.get('skipped'):
+                try:
+                    uploaded_bytes += os.path.getsize(photo_path)
+                except OSError:
+                    pass
+        
+        uploaded = sum(1 for result in results if result.get('success'))
+        skipped = sum(1 for result in results if result.get('skipped'))
+        failed = len(results) - uploaded
+        
+        return {
+            'success': failed == 0,
+            'message': f'{uploaded} von {len(results)} Fotos hochgeladen',
+            'uploaded': uploaded,
+            'skipped': skipped,
+            'failed': failed,
+            'concurrency': workers,
+            'duration': round(duration, 3),
+            'bytes': uploaded_bytes,
+            'photos_per_second': round(uploaded / duration, 2) if duration > 0 else 0.0,
+            'mbit_per_second': round(uploaded_bytes * 8 / duration / 1_000_000, 2) if duration > 0 else 0.0,
+            'results': items
+        }
     
-    def _prepare_metadata(self, photo_path: str, additional_metadata: Optional[Dict] = None) -> Dict:
-        """Erstellt Metadaten für Upload"""
+    def _prepare_upload(self, photo_path: str,
+                        additional_metadata: Optional[Dict] = None,
+                        checksum: Optional[str] = None) -> Tuple[str, Dict]:
+        """
+        Bereitet Foto und Metadaten vor und öffnet das Bild dabei nur einmal
+        
+        Größe, Format und EXIF stammen aus dem bereits gelesenen Header; dekodiert wird
+        das Bild nur, wenn es komprimiert werden muss. Die Prüfsumme des Originals wird
+        als original_checksum übernommen (Schlüssel für Ledger und Server-Index). Wird
+        komprimiert, entsteht die Prüfsumme der gesendeten Datei erst beim Senden
+        (Platzhalter CHECKSUM_PLACEHOLDER).
+        
+        Args:
+            photo_path: Pfad zum Foto
+            additional_metadata: Zusätzliche Metadaten (optional)
+            checksum: Bereits berechnete SHA-256 des Originals (optional)
+        
+        Returns:
+            (Pfad der hochzuladenden Datei, Metadaten)
+        """
         now = datetime.datetime.now()
+        upload_ready_path = photo_path
         
         # Basis-Metadaten
         metadata = {
@@ -134,12 +750,12 @@ class UploadManager:
             'upload_time': now.strftime('%H:%M:%S'),
             'source': 'fotobox',
             'version': self.config.version,
-            'checksum': self._calculate_checksum(photo_path)
+            'checksum': CHECKSUM_PLACEHOLDER
         }
         
-        # Foto-Metadaten extrahieren
         try:
             with Image.open(photo_path) as img:
+                # Foto-Metadaten aus dem Header (ohne Dekodierung)
                 metadata.update({
                     'width': img.width,
                     'height': img.height,
@@ -148,24 +764,77 @@ class UploadManager:
                 })
                 
                 # EXIF-Daten falls vorhanden
-                if hasattr(img, '_getexif') and img._getexif():
-                    exif = img._getexif()
+                exif = img._getexif() if hasattr(img, '_getexif') else None
+                if exif:
                     metadata['exif'] = {k: str(v) for k, v in exif.items() if isinstance(v, (str, int, float))}
-                    
-        except Exception:
-            pass
+                
+                upload_ready_path = self._compress_for_upload(img, photo_path)
+                
+        except Exception as e:
+            print(f"⚠️ Fehler bei Foto-Vorbereitung: {e}")
+        
+        if checksum:
+            metadata['original_checksum'] = checksum
+            if upload_ready_path == photo_path:
+                metadata['checksum'] = checksum
+        
+        if upload_ready_path != photo_path:
+            metadata['filesize'] = os.path.getsize(upload_ready_path)
         
         # Zusätzliche Metadaten hinzufügen
         if additional_metadata:
             metadata.update(additional_metadata)
         
-        return metadata
+        return upload_ready_path, metadata
+    
+    def _needs_compression(self, photo_path: str) -> bool:
+        """Prüft anhand der Dateigröße, ob das Foto vor dem Upload komprimiert wird"""
+        if not self.upload_config.compress_images:
+            return False
+        return os.path.getsize(photo_path) / (1024 * 1024) > self.upload_config.max_file_size
+    
+    def _compress_for_upload(self, img: Image.Image, photo_path: str) -> str:
+        """Komprimiert das bereits geöffnete Foto falls es max_file_size überschreitet"""
+        if not self._needs_compression(photo_path):
+            return photo_path
+        
+        # Komprimiere Bild
+        quality = self.upload_config.compression_quality
+        
+        # Berechne neue Dimensionen falls nötig
+        max_dimension = 2048  # Maximale Breite/Höhe
+        if max(img.size) > max_dimension:
+            # JPEG direkt in reduzierter Auflösung dekodieren
+            img.draft('RGB', (max_dimension, max_dimension))
+        
+        # Konvertiere zu RGB falls nötig
+        if img.mode in ('RGBA', 'P'):
+            img = img.convert('RGB')
+        
+        if max(img.size) > max_dimension:
+            ratio = max_dimension / max(img.size)
+            new_size = (int(img.width * ratio), int(img.height * ratio))
+            img = img.resize(new_size, Image.Resampling.LANCZOS)
+        
+        # Speichere komprimierte Version
+        temp_fd, temp_path = tempfile.mkstemp(suffix='.jpg', prefix='fotobox_upload_')
+        os.close(temp_fd)
+        
+        img.save(temp_path, 'JPEG', quality=quality, optimize=True)
+        
+        # Prüfe ob Komprimierung erfolgreich war
+        compressed_size = os.path.getsize(temp_path) / (1024 * 1024)
+        if compressed_size <= self.upload_config.max_file_size:
+            return temp_path
+        
+        os.remove(temp_path)
+        return photo_path  # Verwende Original falls Komprimierung nicht ausreicht
     
     def _calculate_checksum(self, file_path: str) -> str:
         """Berechnet SHA256-Checksum einer Datei"""
         sha256_hash = hashlib.sha256()
         with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
+            for byte_block in iter(lambda: f.read(UPLOAD_BUFFER_SIZE), b""):
                 sha256_hash.update(byte_block)
         return sha256_hash.hexdigest()
     
@@ -177,49 +846,48 @@ class UploadManager:
                 'message': 'HTTP-Endpoint nicht konfiguriert'
             }
         
+        chunk_size = max(64, self.upload_config.chunk_size_kb) * 1024
+        if self.upload_config.chunked_upload and os.path.getsize(photo_path) > chunk_size:
+            return self._upload_http_chunked(photo_path, metadata, chunk_size)
+        
         try:
-            # Bereite Upload-Daten vor
-            files = {
-                'photo': (metadata['filename'], open(photo_path, 'rb'), 'image/jpeg')
-            }
-            
-            data = {
-                'metadata': json.dumps(metadata)
-            }
+            # Streamender Body: Foto wird beim Senden gelesen und gehasht
+            body = MultipartUploadBody(photo_path, metadata['filename'], metadata, shaper=self.bandwidth)
             
             # Authentifizierung
-            headers = {}
+            headers = {'Content-Type': body.content_type}
             if self.upload_config.http_api_key:
                 headers['Authorization'] = f'Bearer {self.upload_config.http_api_key}'
             
             # Upload durchführen
-            response = requests.post(
+            response = http_session_pool.request(
+                'POST',
                 self.upload_config.http_endpoint,
-                files=files,
-                data=data,
+                data=body,
                 headers=headers,
                 timeout=self.upload_config.http_timeout
             )
             
-            # Schließe Datei
-            files['photo'][1].close()
-            
             # Prüfe Antwort
             if response.status_code == 200:
                 try:
                     result_data = response.json()
+                    # upload.php liefert url/id unter 'data'
+                    file_data = result_data.get('data') or result_data
                     return {
                         'success': True,
                         'message': 'Upload erfolgreich',
+                        'checksum': body.checksum,
                         'response': result_data,
-                        'url': result_data.get('url', ''),
-                        'file_id': result_data.get('id', ''),
+                        'url': file_data.get('url', ''),
+                        'file_id': file_data.get('id', ''),
                         'upload_method': 'http'
                     }
                 except json.JSONDecodeError:
                     return {
                         'success': True,
                         'message': 'Upload erfolgreich (keine JSON-Antwort)',
+                        'checksum': body.checksum,
                         'response': response.text,
                         'upload_method': 'http'
                     }
@@ -245,6 +913,120 @@ class UploadManager:
                 'message': f'HTTP-Upload fehlgeschlagen: {str(e)}'
             }
     
+    def _upload_http_chunked(self, photo_path: str, metadata: Dict, chunk_size: int) -> Dict[str, any]:
+        """
+        Lädt Foto in Teilstücken hoch (upload.php?action=init|chunk|commit)
+        
+        Die SHA-256 dient als Upload-ID: nach Timeout oder Neustart fragt init den
+        bereits empfangenen Offset ab und der Upload wird dort fortgesetzt. Der Server
+        prüft die Prüfsumme beim Commit. Sie wird aus den Metadaten übernommen und nur
+        für komprimierte Dateien (Platzhalter) hier berechnet.
+        """
+        checksum = metadata.get('checksum')
+        if not checksum or checksum == CHECKSUM_PLACEHOLDER:
+            checksum = self._calculate_checksum(photo_path)
+            metadata = {**metadata, 'checksum': checksum}
+        file_size = os.path.getsize(photo_path)
+        
+        headers = {}
+        if self.upload_config.http_api_key:
+            headers['Authorization'] = f'Bearer {self.upload_config.http_api_key}'
+        
+        def call(action: str, params: Optional[Dict] = None, **kwargs) -> Tuple[int, Dict]:
+            response = http_session_pool.request(
+                'POST',
+                self.upload_config.http_endpoint,
+                params={'action': action, 'upload_id': checksum, **(params or {})},
+                timeout=self.upload_config.http_timeout,
+                **kwargs
+            )
+            try:
+                payload = response.json()
+            except ValueError:
+                payload = {}
+            return response.status_code, payload if isinstance(payload, dict) else {}
+        
+        def server_offset() -> Tuple[int, Dict]:
+            return call('init', data={'filename': metadata['filename'], 'size': file_size}, headers=headers)
+        
+        try:
+            status, payload = server_offset()
+            if status != 200 or not payload.get('success'):
+                return {
+                    'success': False,
+                    'message': f"Chunk-Upload nicht möglich: HTTP {status} {payload.get('error', '')}".strip()
+                }
+            
+            offset = resumed_from = int(payload.get('offset', 0))
+            if resumed_from:
+                print(f"☁️ Setze Upload von {metadata['filename']} bei {resumed_from // 1024} KB fort")
+            
+            failures = 0
+            chunk_headers = {**headers, 'Content-Type': 'application/octet-stream'}
+            with open(photo_path, 'rb', buffering=0) as f:
+                while offset < file_size:
+                    f.seek(offset)
+                    chunk = f.read(chunk_size)
+                    try:
+                        status, payload = call('chunk', params={'offset': offset},
+                                               data=ShapedBytes(chunk, self.bandwidth), headers=chunk_headers)
+                    except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                        failures += 1
+                        if failures > CHUNK_RETRIES:
+                            raise
+                        status, payload = server_offset()
+                        offset = int(payload.get('offset', offset))
+                        continue
+                    
+                    if status == 409 and failures < CHUNK_RETRIES:
+                        # Server hat einen anderen Stand - dort weitermachen
+                        failures += 1
+                        offset = int(payload.get('offset', 0))
+                        continue
+                    if status != 200 or not payload.get('success'):
+                        return {
+                            'success': False,
+                            'message': f"Teilstück bei Offset {offset} abgelehnt: HTTP {status} {payload.get('error', '')}".strip()
+                        }
+                    
+                    offset = int(payload['offset'])
+                    failures = 0
+            
+            status, payload = call('commit', data={'metadata': json.dumps(metadata)}, headers=headers)
+            if status != 200 or not payload.get('success'):
+                return {
+                    'success': False,
+                    'message': f"Abschluss des Uploads fehlgeschlagen: HTTP {status} {payload.get('error', '')}".strip()
+                }
+            
+            file_data = payload.get('data') or payload
+            return {
+                'success': True,
+                'message': 'Upload erfolgreich (in Teilstücken)',
+                'checksum': checksum,
+                'response': payload,
+                'url': file_data.get('url', ''),
+                'file_id': file_data.get('id', ''),
+                'resumed_from': resumed_from,
+                'upload_method': 'http'
+            }
+            
+        except requests.exceptions.Timeout:
+            return {
+                'success': False,
+                'message': 'Upload-Timeout erreicht (bisheriger Fortschritt bleibt erhalten)'
+            }
+        except requests.exceptions.ConnectionError:
+            return {
+                'success': False,
+                'message': 'Verbindung zum Server fehlgeschlagen (bisheriger Fortschritt bleibt erhalten)'
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'message': f'Chunk-Upload fehlgeschlagen: {str(e)}'
+            }
+    
     def _upload_sftp(self, photo_path: str, metadata: Dict) -> Dict[str, any]:
         """Lädt Foto via SFTP hoch"""
         if not all([self.upload_config.sftp_host, self.upload_config.sftp_username]):
@@ -253,25 +1035,7 @@ class UploadManager:
                 'message': 'SFTP-Verbindungsdaten unvollständig'
             }
         
-        ssh_client = None
-        sftp_client = None
-        
         try:
-            # SSH-Verbindung aufbauen
-            ssh_client = paramiko.SSHClient()
-            ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            
-            ssh_client.connect(
-                hostname=self.upload_config.sftp_host,
-                port=self.upload_config.sftp_port,
-                username=self.upload_config.sftp_username,
-                password=self.upload_config.sftp_password,
-                timeout=30
-            )
-            
-            # SFTP-Client erstellen
-            sftp_client = ssh_client.open_sftp()
-            
             # Ziel-Pfad erstellen
             now = datetime.datetime.now()
             remote_dir = os.path.join(
@@ -281,29 +1045,24 @@ class UploadManager:
                 now.strftime('%d')
             ).replace('\\', '/')
             
-            # Verzeichnis erstellen (falls nicht vorhanden)
-            self._ensure_sftp_directory(sftp_client, remote_dir)
-            
-            # Datei-Upload
             remote_filename = f"{now.strftime('%H%M%S')}_{metadata['filename']}"
             remote_path = f"{remote_dir}/{remote_filename}".replace('\\', '/')
             
-            sftp_client.put(photo_path, remote_path)
-            
-            # Metadaten als JSON-Datei hochladen
+            # Metadaten als JSON-Datei direkt aus dem Speicher hochladen
             metadata_filename = f"{os.path.splitext(remote_filename)[0]}.json"
             metadata_path = f"{remote_dir}/{metadata_filename}".replace('\\', '/')
+            def metadata_bytes(checksum: str) -> bytes:
+                if metadata.get('checksum') == CHECKSUM_PLACEHOLDER:
+                    metadata['checksum'] = checksum
+                return json.dumps(metadata, indent=2, ensure_ascii=False).encode('utf-8')
             
-            temp_metadata_file = tempfile.mktemp(suffix='.json')
-            with open(temp_metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, indent=2, ensure_ascii=False)
-            
-            sftp_client.put(temp_metadata_file, metadata_path)
-            os.remove(temp_metadata_file)
+            # Verzeichnis wird bei Bedarf angelegt, Verbindung bleibt bestehen
+            checksum = self.sftp_connection.upload(photo_path, remote_path, {metadata_path: metadata_bytes})
             
             return {
                 'success': True,
                 'message': 'SFTP-Upload erfolgreich',
+                'checksum': checksum,
                 'remote_path': remote_path,
                 'metadata_path': metadata_path,
                 'upload_method': 'sftp'
@@ -324,23 +1083,6 @@ class UploadManager:
                 'success': False,
                 'message': f'SFTP-Upload fehlgeschlagen: {str(e)}'
             }
-        finally:
-            if sftp_client:
-                sftp_client.close()
-            if ssh_client:
-                ssh_client.close()
-    
-    def _ensure_sftp_directory(self, sftp_client, directory: str):
-        """Stellt sicher, dass SFTP-Verzeichnis existiert"""
-        try:
-            sftp_client.stat(directory)
-        except FileNotFoundError:
-            # Verzeichnis existiert nicht, erstelle es rekursiv
-            parent_dir = os.path.dirname(directory).replace('\\', '/')
-            if parent_dir and parent_dir != '/':
-                self._ensure_sftp_directory(sftp_client, parent_dir)
-            
-            sftp_client.mkdir(directory)
     
     def _upload_ftp(self, photo_path: str, metadata: Dict) -> Dict[str, any]:
         """Lädt Foto via FTP hoch (einfache Implementierung)"""
@@ -374,6 +1116,22 @@ class UploadManager:
             print(f"⚠️ Fehler beim Erstellen des Thumbnails: {e}")
             return None
     
+    def get_http_pool_stats(self) -> Dict[str, any]:
+        """Gibt Statistiken des HTTP-Connection-Pools zurück"""
+        return http_session_pool.get_stats()
+    
+    def get_sftp_stats(self) -> Dict[str, any]:
+        """Gibt Statistiken der SFTP-Verbindung zurück"""
+        return self.sftp_connection.get_stats()
+    
+    def get_bandwidth_stats(self) -> Dict[str, any]:
+        """Gibt Betriebsart, Limit und gemessenen Upload-Durchsatz zurück"""
+        return self.bandwidth.get_stats()
+    
+    def get_ledger_stats(self) -> Dict[str, any]:
+        """Gibt Statistiken des Upload-Ledgers zurück"""
+        return self.ledger.get_stats()
+    
     def test_connection(self) -> Dict[str, any]:
         """Testet die Upload-Verbindung"""
         if not self.upload_config.enabled:
@@ -406,7 +1164,8 @@ class UploadManager:
             if self.upload_config.http_api_key:
                 headers['Authorization'] = f'Bearer {self.upload_config.http_api_key}'
             
-            response = requests.get(
+            response = http_session_pool.request(
+                'GET',
                 self.upload_config.http_endpoint,
                 headers=headers,
                 timeout=10
@@ -432,19 +1191,9 @@ class UploadManager:
                 'message': 'SFTP-Verbindungsdaten unvollständig'
             }
         
-        ssh_client = None
-        
         try:
-            ssh_client = paramiko.SSHClient()
-            ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            
-            ssh_client.connect(
-                hostname=self.upload_config.sftp_host,
-                port=self.upload_config.sftp_port,
-                username=self.upload_config.sftp_username,
-                password=self.upload_config.sftp_password,
-                timeout=10
-            )
+            # Bestehende Verbindung wiederverwenden bzw. aufbauen
+            self.sftp_connection.get_client().listdir('.')
             
             return {
                 'success': True,
@@ -452,13 +1201,11 @@ class UploadManager:
             }
             
         except Exception as e:
+            self.sftp_connection.close()
             return {
                 'success': False,
                 'message': f'SFTP-Verbindung fehlgeschlagen: {str(e)}'
             }
-        finally:
-            if ssh_client:
-                ssh_client.close()
 
 def test_upload_manager():
     """Test-Funktion für den Upload-Manager"""
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Fotobox Upload-Warteschlange
+Persistente, absturzsichere Upload-Queue (SQLite in temp_dir) mit Wiederholung,
+exponentiellem Backoff und Versuchs-Historie pro Foto
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import datetime
+from typing import Dict, List, Optional
+
+# Status eines Queue-Eintrags
+STATUS_PENDING = 'pending'
+STATUS_UPLOADING = 'uploading'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+QUEUE_FILENAME = 'upload_queue.sqlite'
+
+class UploadQueue:
+    """Persistente Upload-Warteschlange mit Drain-Workern"""
+
+    def __init__(self, config, upload_manager):
+        self.config = config
+        self.upload_config = config.upload
+        self.upload_manager = upload_manager
+        self.db_path = os.path.join(config.temp_dir, QUEUE_FILENAME)
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._conn = self._connect()
+
+        # Nach Neustart: unterbrochene Uploads wieder einreihen
+        with self._lock:
+            resumed = self._conn.execute(
+                'UPDATE uploads SET status = ? WHERE status = ?',
+                (STATUS_PENDING, STATUS_UPLOADING)
+            ).rowcount
+            self._conn.commit()
+        if resumed:
+            print(f"☁️ Upload-Warteschlange: {resumed} unterbrochene Uploads werden fortgesetzt")
+
+        for index in range(max(1, self.upload_config.queue_concurrency)):
+            worker = threading.Thread(target=self._worker, name=f'upload-queue-{index}', daemon=True)
+            worker.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Öffnet die Queue-Datenbank"""
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS uploads (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                photo_path TEXT NOT NULL,
+                metadata TEXT,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL,
+                last_error TEXT,
+                result TEXT,
+                created REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS upload_attempts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                upload_id INTEGER NOT NULL REFERENCES uploads(id),
+                attempt INTEGER NOT NULL,
+                started REAL NOT NULL,
+                duration REAL NOT NULL,
+                success INTEGER NOT NULL,
+                message TEXT
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_uploads_due ON uploads (status, next_attempt)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_attempts_upload ON upload_attempts (upload_id)')
+        conn.commit()
+        return conn
+
+    def enqueue(self, photo_path: str, metadata: Optional[Dict] = None) -> Dict:
+        """
+        Reiht ein Foto für den Upload ein (kehrt sofort zurück)
+
+        Args:
+            photo_path: Pfad zum Foto
+            metadata: Zusätzliche Metadaten (optional)
+
+        Returns:
+            Dictionary mit Queue-ID
+        """
+        now = time.time()
+        with self._lock:
+            existing = self._conn.execute(
+                'SELECT id FROM uploads WHERE photo_path = ? AND status IN (?, ?)',
+                (photo_path, STATUS_PENDING, STATUS_UPLOADING)
+            ).fetchone()
+            if existing:
+                return {
+                    'success': True,
+                    'message': 'Foto bereits in der Upload-Warteschlange',
+                    'queue_id': existing['id']
+                }
+
+            cursor = self._conn.execute(
+                'INSERT INTO uploads (photo_path, metadata, status, next_attempt, created, updated) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (photo_path, json.dumps(metadata) if metadata else None, STATUS_PENDING, now, now, now)
+            )
+            self._conn.commit()
+            queue_id = cursor.lastrowid
+
+        self._wakeup.set()
+        return {
+            'success': True,
+            'message': 'Foto in Upload-Warteschlange eingereiht',
+            'queue_id': queue_id
+        }
+
+    def retry_failed(self) -> int:
+        """Reiht endgültig fehlgeschlagene Uploads erneut ein"""
+        now = time.time()
+        with self._lock:
+            count = self._conn.execute(
+                'UPDATE uploads SET status = ?, attempts = 0, next_attempt = ?, updated = ? WHERE status = ?',
+                (STATUS_PENDING, now, now, STATUS_FAILED)
+            ).rowcount
+            self._conn.commit()
+        self._wakeup.set()
+        return count
+
+    def get_stats(self) -> Dict:
+        """Gibt Anzahl der Einträge je Status und den nächsten fälligen Versuch zurück"""
+        with self._lock:
+            counts = {
+                row['status']: row['count']
+                for row in self._conn.execute('SELECT status, COUNT(*) AS count FROM uploads GROUP BY status')
+            }
+            next_due = self._conn.execute(
+                'SELECT MIN(next_attempt) FROM uploads WHERE status = ?', (STATUS_PENDING,)
+            ).fetchone()[0]
+
+        return {
+            'pending': counts.get(STATUS_PENDING, 0),
+            'uploading': counts.get(STATUS_UPLOADING, 0),
+            'done': counts.get(STATUS_DONE, 0),
+            'failed': counts.get(STATUS_FAILED, 0),
+            'next_attempt': datetime.datetime.fromtimestamp(next_due).isoformat() if next_due else None,
+            'workers': max(1, self.upload_config.queue_concurrency)
+        }
+
+    def list_items(self, status: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """Gibt Queue-Einträge inkl. Versuchs-Historie zurück (neueste zuerst)"""
+        with self._lock:
+            if status:
+                rows = self._conn.execute(
+                    'SELECT * FROM uploads WHERE status = ? ORDER BY id DESC LIMIT ?', (status, limit)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    'SELECT * FROM uploads ORDER BY id DESC LIMIT ?', (limit,)
+                ).fetchall()
+
+            items = []
+            for row in rows:
+                attempts = self._conn.execute(
+                    'SELECT attempt, started, duration, success, message FROM upload_attempts '
+                    'WHERE upload_id = ? ORDER BY attempt', (row['id'],)
+                ).fetchall()
+                items.append({
+                    'id': row['id'],
+                    'filename': os.path.basename(row['photo_path']),
+                    'status': row['status'],
+                    'attempts': row['attempts'],
+                    'last_error': row['last_error'],
+                    'next_attempt': datetime.datetime.fromtimestamp(row['next_attempt']).isoformat(),
+                    'history': [
+                        {
+                            'attempt': attempt['attempt'],
+                            'started': datetime.datetime.fromtimestamp(attempt['started']).isoformat(),
+                            'duration': round(attempt['duration'], 3),
+                            'success': bool(attempt['success']),
+                            'message': attempt['message']
+                        }
+                        for attempt in attempts
+                    ]
+                })
+        return items
+
+    def _backoff_delay(self, attempts: int) -> float:
+        """Exponentieller Backoff: base * 2^(n-1), begrenzt auf retry_backoff_max"""
+        delay = self.upload_config.retry_backoff_base * (2 ** max(attempts - 1, 0))
+        return min(delay, self.upload_config.retry_backoff_max)
+
+    def _claim_next(self) -> Optional[sqlite3.Row]:
+        """Holt den nächsten fälligen Eintrag und markiert ihn als 'uploading'"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT * FROM uploads WHERE status = ? AND next_attempt <= ? ORDER BY next_attempt, id LIMIT 1',
+                (STATUS_PENDING, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                'UPDATE uploads SET status = ?, updated = ? WHERE id = ?', (STATUS_UPLOADING, now, row['id'])
+            )
+            self._conn.commit()
+            return row
+
+    def _seconds_until_next_due(self) -> float:
+        """Wartezeit bis zum nächsten fälligen Eintrag (max. 30s)"""
+        with self._lock:
+            next_due = self._conn.execute(
+                'SELECT MIN(next_attempt) FROM uploads WHERE status = ?', (STATUS_PENDING,)
+            ).fetchone()[0]
+        if next_due is None:
+            return 30.0
+        return min(max(next_due - time.time(), 0.1), 30.0)
+
+    def _worker(self):
+        """Drain-Worker: arbeitet fällige Einträge ab"""
+        while True:
+            if not self.upload_config.enabled:
+                self._wakeup.wait(30.0)
+                self._wakeup.clear()
+                continue
+
+            item = self._claim_next()
+            if item is None:
+                self._wakeup.wait(self._seconds_until_next_due())
+                self._wakeup.clear()
+                continue
+
+            try:
+                self._process(item)
+            except Exception as e:
+                print(f"❌ Upload-Warteschlange Fehler: {e}")
+                self._record_result(item, started=time.time(), duration=0.0,
+                                    result={'success': False, 'message': str(e)})
+
+    def _process(self, item: sqlite3.Row):
+        """Führt einen Upload-Versuch aus"""
+        photo_path = item['photo_path']
+        metadata = json.loads(item['metadata']) if item['metadata'] else None
+
+        started = time.time()
+        if not os.path.exists(photo_path):
+            result = {'success': False, 'message': f'Foto nicht gefunden: {photo_path}', 'permanent': True}
+        else:
+            result = self.upload_manager.upload_photo(photo_path, metadata)
+
+        self._record_result(item, started, time.time() - started, result)
+
+    def _record_result(self, item: sqlite3.Row, started: float, duration: float, result: Dict):
+        """Speichert Ergebnis und Versuchs-Historie, plant ggf. nächsten Versuch"""
+        attempts = item['attempts'] + 1
+        success = bool(result.get('success'))
+        message = result.get('message', '')
+        now = time.time()
+        filename = os.path.basename(item['photo_path'])
+
+        max_attempts = self.upload_config.queue_max_attempts
+        if success:
+            status, next_attempt = STATUS_DONE, now
+            print(f"✅ Upload erfolgreich: {filename} (Versuch {attempts})")
+        elif result.get('permanent') or (max_attempts and attempts >= max_attempts):
+            status, next_attempt = STATUS_FAILED, now
+            print(f"❌ Upload endgültig fehlgeschlagen: {filename} - {message}")
+        else:
+            delay = self._backoff_delay(attempts)
+            status, next_attempt = STATUS_PENDING, now + delay
+            print(f"⚠️ Upload fehlgeschlagen: {filename} - neuer Versuch in {delay:.0f}s ({message})")
+
+        stored_result = {k: v for k, v in result.items() if isinstance(v, (str, int, float, bool, type(None)))}
+        with self._lock:
+            self._conn.execute(
+                'UPDATE uploads SET status = ?, attempts = ?, next_attempt = ?, last_error = ?, '
+                'result = ?, updated = ? WHERE id = ?',
+                (status, attempts, next_attempt, None if success else message,
+                 json.dumps(stored_result), now, item['id'])
+            )
+            self._conn.execute(
+                'INSERT INTO upload_attempts (upload_id, attempt, started, duration, success, message) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (item['id'], attempts, started, duration, int(success), message)
+            )
+            self._conn.commit()